@@ -0,0 +1,182 @@
+"""
+Admission control and load shedding.
+
+Each endpoint group has an `AdmissionGate` per worker process: at most
+`limit` requests run at once, and the rest wait in a bounded queue. The
+queue timeout is CoDel-style. While the queue keeps draining, a request
+may wait up to `interval`. Once
+the queue has not been empty for a whole `interval`, the backlog is standing
+rather than a burst, so new arrivals wait at most `target` before they are
+shed. A full queue sheds immediately.
+
+Shed /recommend first pages get the user's last list or the shared
+cold-start feed, both served from memory without touching the database.
+Other shed requests (and /recommend pages that need a cursor) get a 503
+with Retry-After. Admissions, sheds and queue waits are counted under
+`admission_<group>` in app.utils.metrics. `admission_state()` adds live
+concurrency and queue depth to /metrics, for sizing workers and limits.
+"""
+import time
+import asyncio
+from collections import deque
+from typing import Dict, Optional
+from fastapi.encoders import jsonable_encoder
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from app.recommender.ranker import shed_recommendations
+from app.utils.metrics import metrics
+
+RETRY_AFTER_SECONDS = 1
+RECOMMEND_FIELDS = ("id", "title", "link", "source", "published_date")
+
+
+class Shed(Exception):
+    """The request was not admitted; `reason` is queue_full or timeout."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class AdmissionGate:
+    """
+    Concurrency limit with a bounded waiting queue and a CoDel-style queue
+    timeout. Used only from the event loop, so it needs no locking.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int, target_ms: float = 10, interval_ms: float = 100):
+        self.name = name
+        self.metric = f"admission_{name}"
+        self.limit = limit
+        self.max_queue = max_queue
+        self.target = target_ms / 1000
+        self.interval = interval_ms / 1000
+        self.active = 0
+        self.peak_active = 0
+        self._waiters = deque()
+        self._last_empty = time.monotonic()   # Last time nobody was waiting
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def queue_timeout(self, now: float) -> float:
+        """`target` while a queue has been standing for an interval, else `interval`."""
+        return self.target if now - self._last_empty > self.interval else self.interval
+
+    async def acquire(self):
+        """Takes a slot, waiting for one if needed; raises Shed instead of waiting too long."""
+        now = time.monotonic()
+        if not self._waiters:
+            self._last_empty = now
+            if self.active < self.limit:
+                self._admit(0.0)
+                return
+        if len(self._waiters) >= self.max_queue:
+            metrics.incr(self.metric, "shed_queue_full")
+            raise Shed("queue_full")
+
+        slot = asyncio.get_running_loop().create_future()
+        self._waiters.append(slot)
+        try:
+            await asyncio.wait_for(slot, self.queue_timeout(now))
+        except asyncio.TimeoutError:
+            metrics.incr(self.metric, "shed_timeout")
+            raise Shed("timeout")
+        except asyncio.CancelledError:
+            if slot.done() and not slot.cancelled():
+                self.release()  # Handed a slot just as the client went away: pass it on
+            raise
+        finally:
+            if not slot.done() or slot.cancelled():
+                self._remove(slot)
+        metrics.incr(self.metric, "queued")
+        self._admit((time.monotonic() - now) * 1000, counted=True)
+
+    def release(self):
+        """Hands the slot to the oldest waiter, or frees it."""
+        while self._waiters:
+            slot = self._waiters.popleft()
+            if not slot.done():
+                slot.set_result(None)  # The slot passes on: `active` stays the same
+                return
+        self._last_empty = time.monotonic()
+        self.active -= 1
+
+    def _admit(self, waited_ms: float, counted: bool = False):
+        if not counted:
+            self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        metrics.incr(self.metric, "admitted")
+        metrics.observe(f"{self.metric}_wait", waited_ms)
+
+    def _remove(self, slot):
+        try:
+            self._waiters.remove(slot)
+        except ValueError:
+            pass
+        if not self._waiters:
+            self._last_empty = time.monotonic()
+
+    def state(self) -> Dict:
+        return {"limit": self.limit, "active": self.active, "peak_active": self.peak_active,
+                "queued": self.queued, "max_queue": self.max_queue}
+
+
+def _recommend_fallback(request: Request, reason: str) -> Response:
+    params = request.query_params
+    try:
+        user_id = int(params["user_id"])
+        limit = int(params.get("limit", 10))
+    except (KeyError, ValueError):
+        return _unavailable(request, reason)
+    if params.get("cursor"):
+        return _unavailable(request, reason)  # A different list would repeat or skip articles mid-scroll
+    articles = shed_recommendations(user_id, limit)
+    if not articles:
+        return _unavailable(request, reason)
+    body = [{field: getattr(article, field) for field in RECOMMEND_FIELDS} for article in articles]
+    return JSONResponse(jsonable_encoder(body), headers={
+        "X-Recommend-Tier": articles.tier, "Cache-Control": "no-store",
+    })
+
+
+def _unavailable(request: Request, reason: str) -> Response:
+    return JSONResponse({"detail": f"Server busy ({reason}), retry shortly"}, status_code=503,
+                        headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+
+
+# path prefix -> (gate, shed response)
+admission_gates = {
+    "/recommend": (AdmissionGate("recommend", limit=12, max_queue=48), _recommend_fallback),
+    "/auth/": (AdmissionGate("auth", limit=4, max_queue=16), _unavailable),  # bcrypt is CPU-bound
+    "/ingest": (AdmissionGate("ingest", limit=2, max_queue=4), _unavailable),
+}
+
+
+def admission_state() -> Dict:
+    return {gate.name: gate.state() for gate, _ in admission_gates.values()}
+
+
+class AdmissionMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        entry = self._match(request.url.path)
+        if entry is None or request.method == "OPTIONS":
+            return await call_next(request)
+        gate, on_shed = entry
+        try:
+            await gate.acquire()
+        except Shed as e:
+            return on_shed(request, e.reason)
+        try:
+            return await call_next(request)
+        finally:
+            gate.release()
+
+    @staticmethod
+    def _match(path: str) -> Optional[tuple]:
+        for prefix, entry in admission_gates.items():
+            if path.startswith(prefix):
+                return entry
+        return None
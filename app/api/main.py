@@ -1,8 +1,16 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Header
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from app.api.routes import recommend, auth, ingest
+from app.api.routes.ingest import verify_cron_secret
 from app.utils.logger import setup_logger
+from app.utils.metrics import metrics
+from app.storage.changefeed import change_feed
+from app.api.admission import AdmissionMiddleware, admission_state
+from app.api.warmup import warmup
+from app.recommender.cooccurrence import cooccurrence_index
+from app.storage.db import SessionLocal
+from app.utils.config import settings
 from fastapi.middleware.cors import CORSMiddleware
 import os
 
@@ -10,12 +18,15 @@ logger = setup_logger("api")
 
 app = FastAPI(title="News Recommender API")
 
+# Added first so it runs inside CORS: shed responses still carry CORS headers
+app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Recommend-Tier", "ETag", "Retry-After"],
 )
 
 # Get the project root directory
@@ -30,6 +41,23 @@ app.include_router(recommend.router)
 app.include_router(auth.router)
 app.include_router(ingest.router)
 
+@app.on_event("startup")
+def start_background_tasks():
+    """
+    Caches in this worker follow ingestion and profile writes (see app/storage/changefeed.py);
+    the co-occurrence index reads new interactions on its own thread; warmup gates /ready.
+    """
+    change_feed.start()
+    warmup.start()
+    if settings.COOCCURRENCE_WEIGHT > 0:
+        cooccurrence_index.start(SessionLocal)
+
+@app.on_event("shutdown")
+def stop_background_tasks():
+    warmup.stop()
+    cooccurrence_index.stop()
+    change_feed.stop()
+
 @app.get("/")
 def serve_frontend():
     """Serve the frontend UI."""
@@ -37,9 +65,23 @@ def serve_frontend():
 
 @app.get("/health")
 def health_check():
-    """Health check endpoint for monitoring."""
+    """Liveness: the process is up (it may still be warming up)."""
     return {"status": "ok", "service": "news-recommender"}
 
+@app.get("/ready")
+def readiness_check():
+    """Readiness: 200 once warmup (DB pool, caches, indexes) has finished, 503 before."""
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+@app.get("/metrics")
+def get_metrics(x_cron_secret: str = Header(None)):
+    """Per-process counters and latencies (e.g. recommendation tiers served); protected like /ingest."""
+    verify_cron_secret(x_cron_secret)
+    snapshot = metrics.snapshot()
+    snapshot["admission"] = admission_state()
+    return snapshot
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
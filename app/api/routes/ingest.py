@@ -1,9 +1,11 @@
 """
 Ingestion trigger endpoint for external cron services.
 Protected by a secret token to prevent unauthorized access.
+Ingestion runs as a background job; the trigger returns a job ID at once.
 """
 from fastapi import APIRouter, HTTPException, Header
-from app.ingestion.service import ingest_feeds
+from fastapi.responses import JSONResponse
+from app.ingestion.jobs import submit_ingestion, get_job
 from app.utils.config import settings
 from app.utils.logger import setup_logger
 
@@ -21,25 +23,51 @@ FEEDS = [
 ]
 
 
-@router.post("/ingest")
-def trigger_ingestion(x_cron_secret: str = Header(None)):
-    """
-    Trigger RSS feed ingestion.
-    Protected by X-Cron-Secret header matching CRON_SECRET env var.
-    """
+def verify_cron_secret(x_cron_secret: str | None):
     expected_secret = getattr(settings, 'CRON_SECRET', None)
-    
+
     if not expected_secret:
         raise HTTPException(status_code=500, detail="CRON_SECRET not configured")
-    
+
     if x_cron_secret != expected_secret:
-        logger.warning("Unauthorized ingestion attempt")
+        logger.warning("Unauthorized request: invalid X-Cron-Secret")
         raise HTTPException(status_code=401, detail="Invalid secret")
-    
+
+
+@router.post("/ingest", status_code=202)
+def trigger_ingestion(x_cron_secret: str = Header(None)):
+    """
+    Trigger RSS feed ingestion.
+    Protected by X-Cron-Secret header matching CRON_SECRET env var.
+    Returns 202 with the job ID; if an ingestion is already queued or
+    running, its job is returned instead of starting another.
+    """
+    verify_cron_secret(x_cron_secret)
+
     logger.info("Ingestion triggered via API")
     try:
-        ingest_feeds(FEEDS)
-        return {"status": "success", "message": "Ingestion completed"}
+        job, created = submit_ingestion(FEEDS)
     except Exception as e:
-        logger.error(f"Ingestion failed: {e}")
+        logger.error(f"Could not queue ingestion: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+    return JSONResponse(
+        status_code=202,
+        content={
+            "status": "accepted" if created else "already_running",
+            "job_id": job["job_id"],
+            "job_status": job["status"],
+            "status_url": f"/ingest/{job['job_id']}",
+        },
+    )
+
+
+@router.get("/ingest/{job_id}")
+def get_ingestion_job(job_id: str, x_cron_secret: str = Header(None)):
+    """Progress, counts and timings of an ingestion job."""
+    verify_cron_secret(x_cron_secret)
+
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    return job
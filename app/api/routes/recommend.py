@@ -1,14 +1,50 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
-from app.recommender.ranker import recommend_articles, build_user_embedding
+from app.recommender.ranker import recommend_articles, build_user_embedding, degraded_recommendations
+from app.recommender.sessions import recommendation_sessions, InvalidCursor, SESSION_DEPTH, SESSION_FILL_DEADLINE_MS
+from app.recommender.versions import recommendation_version
+from app.storage.changefeed import publish, INTERACTIONS
 from app.storage.db import get_db
-from app.storage.models import Interaction, Article
+from app.storage.models import Interaction, Article, User
+from app.utils.config import settings
+from app.utils.singleflight import SingleFlight, TooManyWaiters
+from app.utils.timing import Deadline
 import datetime
+import orjson
 
 router = APIRouter()
 
+# Identical concurrent /recommend calls (reloads, several tabs) share one ranking
+RECOMMEND_MAX_WAITERS = 16
+recommend_flights = SingleFlight("recommend", max_waiters=RECOMMEND_MAX_WAITERS)
+# Left of a waiter's deadline for its own fallback once it stops waiting
+FALLBACK_RESERVE_MS = 20
+
+# First pages are per user and must be revalidated every time (ETag below)
+RECOMMEND_CACHE_CONTROL = "private, no-cache"
+# Degraded lists get no validator, so clients refetch them in full
+VALIDATED_TIERS = {"full", "cold_start"}
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+def _articles_response(items, headers: dict) -> Response:
+    """
+    Serializes FeedItems (or anything with their fields) straight to JSON bytes,
+    skipping per-item ArticleResponse validation; the shape is ArticleResponse's.
+    """
+    body = orjson.dumps([
+        {"id": item.id, "title": item.title, "link": item.link,
+         "source": item.source, "published_date": item.published_date}
+        for item in items
+    ], option=orjson.OPT_UTC_Z)
+    return Response(body, media_type="application/json", headers=headers)
+
 class ArticleResponse(BaseModel):
     id: int
     title: str
@@ -25,13 +61,67 @@ class InteractionRequest(BaseModel):
     interaction_type: str = "click"
 
 @router.get("/recommend", response_model=List[ArticleResponse])
-def get_recommendations(user_id: int, limit: int = 10, db: Session = Depends(get_db)):
+def get_recommendations(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    user_id: int,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    deadline_ms: Optional[int] = Query(None, ge=10, le=10000),
+    db: Session = Depends(get_db),
+):
     """
     Get personalized recommendations for a user.
+    The first call ranks `limit` articles within the deadline; the deeper
+    list for later pages (SESSION_DEPTH) is ranked after the response is sent.
+    Pass the X-Next-Cursor header back as `cursor` for the next page.
+    A 410 means the cursor expired or the ranking changed: start over without it.
+    `deadline_ms` (default RECOMMEND_DEADLINE_MS) bounds the ranking time;
+    the X-Recommend-Tier header says whether the result was degraded.
+    Concurrent first-page calls for the same user, depth and profile version
+    share one ranking; too many of them at once get a 429. A call that waits on
+    another's ranking waits no longer than its own deadline allows, then
+    serves the fallback tiers (the user's last list, the cold-start feed).
+    First pages carry an ETag built from the user's profile and seen-set
+    versions and the corpus epoch; a matching If-None-Match gets a 304
+    without ranking.
     """
     try:
-        articles = recommend_articles(user_id, limit)
-        return articles
+        headers = {}
+        if cursor:
+            page = recommendation_sessions.next_page(db, cursor, user_id, limit)
+        else:
+            budget_ms = deadline_ms or settings.RECOMMEND_DEADLINE_MS
+            deadline = Deadline(budget_ms)
+            version = recommendation_version(db, user_id)
+            if _etag_matches(request.headers.get("If-None-Match"), version.etag):
+                return Response(status_code=304, headers={
+                    "ETag": version.etag, "Cache-Control": RECOMMEND_CACHE_CONTROL,
+                })
+            articles = recommend_flights.do(
+                (user_id, limit, version.profile_version),
+                lambda: recommend_articles(user_id, limit, deadline_ms=budget_ms),
+                timeout=(deadline.remaining_ms() - FALLBACK_RESERVE_MS) / 1000,
+                on_timeout=lambda: degraded_recommendations(user_id, limit),
+            )
+            depth = max(limit, SESSION_DEPTH)
+            page = recommendation_sessions.first_page(db, user_id, articles, limit, version,
+                                                      fill_later=depth > limit)
+            if page.session_id:
+                background_tasks.add_task(recommendation_sessions.fill, page.session_id, lambda: recommend_articles(
+                    user_id, depth, candidates=depth * 2, deadline_ms=SESSION_FILL_DEADLINE_MS, record=False,
+                ))
+            headers["Cache-Control"] = RECOMMEND_CACHE_CONTROL
+            if page.tier in VALIDATED_TIERS:
+                headers["ETag"] = version.etag
+        headers["X-Recommend-Tier"] = page.tier
+        if page.next_cursor:
+            headers["X-Next-Cursor"] = page.next_cursor
+        return _articles_response(page.items, headers)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except TooManyWaiters as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -47,6 +137,13 @@ def log_interaction(request: InteractionRequest, background_tasks: BackgroundTas
             interaction_type=request.interaction_type
         )
         db.add(interaction)
+        # The seen set changed: first-page ETags no longer match
+        db.query(User).filter(User.id == request.user_id).update(
+            {User.seen_version: User.seen_version + 1}, synchronize_session=False
+        )
+        if request.interaction_type != "dislike":
+            # A read: counts towards the cold-start feed's popularity
+            publish(db, INTERACTIONS, [request.article_id])
         db.commit()
         
         # Trigger profile update in background
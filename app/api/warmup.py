@@ -0,0 +1,165 @@
+"""
+Worker warmup and readiness.
+
+A fresh worker has no open DB connections, an empty cold-start feed, no
+exact-search matrix and an empty SQL compilation cache, so its first
+requests are slow. `warmup.start()` (on app startup) pays those costs on a
+background thread: the worker answers /health at once, but /ready returns
+503 until warmup has finished, so a rolling deploy only sends traffic to
+warm workers.
+
+The database step is retried until it succeeds: a worker that can't reach
+the database is not ready. Later steps are best effort: a failure is logged
+and recorded in the status, and the worker still becomes ready.
+"""
+import time
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import text
+from app.storage.db import engine, SessionLocal
+from app.storage.models import User
+from app.storage.vectors import EMBEDDING_DIM
+from app.recommender.cold_start import cold_start_feed
+from app.recommender.exact_search import exact_scorer
+from app.recommender.cooccurrence import cooccurrence_index
+from app.recommender.projection import active_projection
+from app.recommender.ranker import recommend_articles
+from app.ingestion.preprocess import load_tokenizer
+from app.utils.config import settings
+from app.utils.logger import setup_logger
+
+logger = setup_logger("warmup")
+
+POOL_CONNECTIONS = 4           # Connections opened up front (the pool keeps them)
+RETRY_SECONDS = 1.0            # First retry delay of the database step, doubled up to MAX_RETRY_SECONDS
+MAX_RETRY_SECONDS = 30.0
+
+
+def _summary(error: Exception) -> str:
+    return (str(error).splitlines() or [repr(error)])[0]
+
+
+def prime_pool():
+    """Opens POOL_CONNECTIONS connections at once so the pool holds them warm."""
+    connections = []
+    try:
+        for _ in range(POOL_CONNECTIONS):
+            conn = engine.connect()
+            connections.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in connections:
+            conn.close()
+
+
+def build_cold_start_feed():
+    db = SessionLocal()
+    try:
+        cold_start_feed.refresh(db)
+    finally:
+        db.close()
+
+
+def load_exact_search():
+    if exact_scorer.processes <= 0:
+        return
+    db = SessionLocal()
+    try:
+        exact_scorer.refresh(db)
+    finally:
+        db.close()
+    exact_scorer.search([0.0] * EMBEDDING_DIM, 1)  # Starts the worker pool for a large matrix
+
+
+def load_cooccurrence():
+    if settings.COOCCURRENCE_WEIGHT <= 0:
+        return
+    db = SessionLocal()
+    try:
+        cooccurrence_index.update(db)
+    finally:
+        db.close()
+
+
+def load_projection():
+    active_projection()
+
+
+def load_ingestion_tokenizer():
+    """Ingestion jobs run in API workers too: load their tokenizer from the local cache now."""
+    load_tokenizer()
+
+
+def rank_once():
+    """
+    One personalized ranking (search, decode, MMR) for some user with a
+    profile: compiles and caches the statements the first users would pay
+    for. An empty database only has the cold-start path to warm. Nothing is
+    recorded: the user's cached list and the tier metrics stay as they were.
+    """
+    db = SessionLocal()
+    try:
+        row = db.query(User.id).filter(User.user_embedding.isnot(None)).limit(1).first()
+    finally:
+        db.close()
+    recommend_articles(row.id if row is not None else 0, limit=10, record=False)
+
+
+STEPS: List[Tuple[str, Callable[[], None]]] = [
+    ("db_pool", prime_pool),
+    ("cold_start_feed", build_cold_start_feed),
+    ("exact_search", load_exact_search),
+    ("cooccurrence", load_cooccurrence),
+    ("projection", load_projection),
+    ("tokenizer", load_ingestion_tokenizer),
+    ("ranker", rank_once),
+]
+
+
+class Warmup:
+    def __init__(self, steps: List[Tuple[str, Callable[[], None]]] = None):
+        self.steps = steps if steps is not None else STEPS
+        self.ready = False
+        self.results: Dict[str, Dict] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self):
+        started = time.perf_counter()
+        for index, (name, step) in enumerate(self.steps):
+            backoff = RETRY_SECONDS
+            while not self._stop.is_set():
+                step_started = time.perf_counter()
+                try:
+                    step()
+                    self.results[name] = {"ms": round((time.perf_counter() - step_started) * 1000, 1)}
+                    break
+                except Exception as e:
+                    if index > 0:
+                        logger.error(f"Warmup step {name} failed: {e}")
+                        self.results[name] = {"error": _summary(e)}
+                        break
+                    logger.warning(f"Warmup step {name} failed: {e}; retrying in {backoff:.0f}s")
+                    self.results[name] = {"error": _summary(e)}
+                    self._stop.wait(backoff)
+                    backoff = min(backoff * 2, MAX_RETRY_SECONDS)
+            if self._stop.is_set():
+                return
+        self.ready = True
+        logger.info(f"Warmup done in {(time.perf_counter() - started) * 1000:.0f} ms: {self.results}")
+
+    def status(self) -> Dict:
+        return {"ready": self.ready, "steps": dict(self.results)}
+
+
+warmup = Warmup()
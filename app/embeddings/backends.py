@@ -0,0 +1,84 @@
+"""
+Chooses the embedder implementation from settings.EMBEDDER_BACKEND:
+
+    api      HuggingFace Inference API (default, no local model)
+    local    SentenceTransformer loaded in this process
+    sidecar  Shared embedding server over a Unix socket (app/embeddings/server.py)
+
+Implementations are imported lazily so unused backends cost nothing at startup.
+
+`get_embedder()` embeds with the active model (app/storage/embedding_model.py),
+looked up on every call, so a process that outlives a re-embed swap writes
+new vectors in the new space. `get_embedder(model=...)` pins one model, as a
+re-embed does.
+"""
+import threading
+from typing import Dict, List, Tuple
+from app.utils.config import settings
+from app.utils.logger import setup_logger
+
+logger = setup_logger("embedder_backends")
+
+_embedders: Dict[Tuple[str, str], object] = {}
+_embedders_lock = threading.Lock()
+
+
+def _load(backend: str, model: str):
+    if backend == "api":
+        from app.embeddings.embedder_api import embedder, EmbedderAPI as cls
+    elif backend == "local":
+        from app.embeddings.embedder import embedder, Embedder as cls
+    elif backend == "sidecar":
+        from app.embeddings.embedder_client import embedder, EmbedderClient as cls
+    else:
+        raise ValueError(f"Unknown EMBEDDER_BACKEND '{backend}' (expected api, local or sidecar)")
+    if embedder.model_name == model:
+        return embedder
+    return cls(model_name=model)
+
+
+def load_embedder(backend: str, model: str):
+    """The `backend` embedder for `model`, created once per process."""
+    backend = backend.lower()
+    with _embedders_lock:
+        embedder = _embedders.get((backend, model))
+        if embedder is None:
+            embedder = _embedders[(backend, model)] = _load(backend, model)
+        return embedder
+
+
+def current_model() -> str:
+    """The active embedding model; settings.EMBEDDING_MODEL if the database can't say."""
+    from app.storage.db import SessionLocal
+    from app.storage.embedding_model import active_model
+    db = SessionLocal()
+    try:
+        return active_model(db)
+    except Exception as e:
+        logger.warning(f"Could not read the active embedding model ({e}); using {settings.EMBEDDING_MODEL}")
+        return settings.EMBEDDING_MODEL
+    finally:
+        db.close()
+
+
+class ActiveModelEmbedder:
+    """Embeds with whichever model is active at the time of each call."""
+
+    def __init__(self, backend: str):
+        self.backend = backend
+
+    @property
+    def model_name(self) -> str:
+        return current_model()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return load_embedder(self.backend, current_model()).embed(texts)
+
+
+def get_embedder(backend: str = None, model: str = None):
+    backend = (backend or settings.EMBEDDER_BACKEND).lower()
+    if model:
+        return load_embedder(backend, model)
+    if backend not in ("api", "local", "sidecar"):
+        raise ValueError(f"Unknown EMBEDDER_BACKEND '{backend}' (expected api, local or sidecar)")
+    return ActiveModelEmbedder(backend)
@@ -1,7 +1,7 @@
 """
 Lightweight embedder using HuggingFace Inference API via huggingface_hub library.
 Much lower memory footprint than loading models locally.
-Uses the same all-MiniLM-L6-v2 model, just hosted remotely.
+Uses the same SentenceTransformer models (all-MiniLM-L6-v2 by default), just hosted remotely.
 """
 from huggingface_hub import InferenceClient
 from typing import List
@@ -10,12 +10,14 @@ from app.utils.config import settings
 
 logger = setup_logger("embedder_api")
 
-# Model ID on HuggingFace Hub
-MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
+# Models named without an owner are looked up under this one on HuggingFace Hub
+MODEL_OWNER = "sentence-transformers"
 
 
 class EmbedderAPI:
-    def __init__(self):
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+        self.model_name = model_name
+        self.model_id = model_name if "/" in model_name else f"{MODEL_OWNER}/{model_name}"
         self._client = None
 
     @property
@@ -47,7 +49,7 @@ class EmbedderAPI:
                 # Use feature_extraction for embeddings
                 batch_embeddings = self.client.feature_extraction(
                     batch,
-                    model=MODEL_ID
+                    model=self.model_id
                 )
                 
                 # Convert to list format
@@ -0,0 +1,80 @@
+"""
+Client for the shared embedding server (app/embeddings/server.py).
+Same `embed()` interface as the in-process embedders, but the model lives in
+one separate process, so API workers and ingestion don't each load a copy.
+A client created for a model refuses vectors the server made with another
+(e.g. a server not restarted after a re-embed swap).
+"""
+import json
+import socket
+import threading
+from typing import List
+
+import numpy as np
+
+from app.embeddings.server import send_frame, recv_frame
+from app.utils.logger import setup_logger
+from app.utils.config import settings
+
+logger = setup_logger("embedder_client")
+
+
+class EmbedderClient:
+    def __init__(self, socket_path: str = None, timeout: float = None, model_name: str = None):
+        self.model_name = model_name  # None accepts whatever the server runs
+        self.socket_path = socket_path or settings.EMBEDDER_SOCKET
+        self.timeout = timeout if timeout is not None else settings.EMBEDDER_TIMEOUT_SECONDS
+        self._local = threading.local()  # One connection per thread, reused across calls
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            finally:
+                self._local.sock = None
+
+    def _request(self, texts: List[str]) -> List[List[float]]:
+        sock = self._connection()
+        send_frame(sock, json.dumps({"texts": texts}).encode())
+        header = json.loads(recv_frame(sock))
+        if header.get("status") != "ok":
+            raise RuntimeError(header.get("error", "embedding server error"))
+        if self.model_name and header.get("model") != self.model_name:
+            recv_frame(sock)  # Keep the connection in step
+            raise RuntimeError(f"server embeds with {header.get('model')}, not {self.model_name}")
+        vectors = np.frombuffer(recv_frame(sock), dtype="<f4").reshape(header["count"], header["dim"])
+        return vectors.tolist()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeds a list of texts via the embedding server.
+        Returns a list of vectors (list of floats), or [] on failure.
+        """
+        if not texts:
+            return []
+
+        try:
+            try:
+                return self._request(texts)
+            except (ConnectionError, BrokenPipeError):
+                # Server restarted since this thread connected; reconnect once
+                self._close()
+                return self._request(texts)
+        except Exception as e:
+            self._close()
+            logger.error(f"Embedding server error ({self.socket_path}): {e}")
+            return []
+
+
+# Global instance
+embedder = EmbedderClient()
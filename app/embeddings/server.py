@@ -0,0 +1,227 @@
+"""
+Local embedding server: one SentenceTransformer shared by every worker.
+
+Each gunicorn/uvicorn worker that uses the local `Embedder` loads its own copy
+of the model. This process loads it once (optionally warming it up before it
+accepts connections) and serves `embed()` calls over a Unix socket.
+Requests from all clients that arrive within a short window are encoded as a
+single batch.
+
+Usage:
+    python -m app.embeddings.server
+    python -m app.embeddings.server --socket /tmp/embedder.sock --max-batch 64 --max-wait-ms 10
+
+Wire format: every message is a frame (4-byte big-endian length + payload).
+A request is one JSON frame {"texts": [...]}. A response is a JSON frame
+{"status": "ok", "count": n, "dim": d, "model": name} followed by a frame holding the n*d
+float32 vectors (little-endian), or {"status": "error", "error": "..."}.
+"""
+import os
+import json
+import time
+import queue
+import struct
+import socket
+import argparse
+import threading
+import socketserver
+from typing import List, Optional
+
+import numpy as np
+
+from app.utils.logger import setup_logger
+from app.utils.config import settings
+
+logger = setup_logger("embedding_server")
+
+_HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+
+def send_frame(sock: socket.socket, payload: bytes):
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("Connection closed mid-frame")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_frame(sock: socket.socket) -> bytes:
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    if size > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame of {size} bytes exceeds limit")
+    return _recv_exact(sock, size)
+
+
+class _Pending:
+    """One client request waiting for its slice of a batch."""
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.vectors: Optional[np.ndarray] = None
+        self.error: Optional[str] = None
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """
+    Collects requests from concurrent clients and encodes them together.
+    A batch closes when it holds `max_batch_size` texts or `max_wait_ms`
+    after its first request arrived, whichever comes first.
+    """
+
+    def __init__(self, model, max_batch_size: int = 64, max_wait_ms: float = 10.0):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[_Pending]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self.batches = 0
+
+    def start(self):
+        self._thread.start()
+
+    def submit(self, texts: List[str]) -> _Pending:
+        pending = _Pending(texts)
+        if texts:
+            self._queue.put(pending)
+        else:
+            pending.vectors = np.zeros((0, 0), dtype=np.float32)
+            pending.done.set()
+        return pending
+
+    def _collect(self) -> List[_Pending]:
+        batch = [self._queue.get()]
+        size = len(batch[0].texts)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                pending = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(pending)
+            size += len(pending.texts)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [text for pending in batch for text in pending.texts]
+            try:
+                vectors = np.asarray(
+                    self.model.encode(texts, convert_to_numpy=True, batch_size=self.max_batch_size),
+                    dtype=np.float32,
+                )
+                start = 0
+                for pending in batch:
+                    pending.vectors = vectors[start:start + len(pending.texts)]
+                    start += len(pending.texts)
+            except Exception as e:
+                logger.error(f"Error generating embeddings: {e}")
+                for pending in batch:
+                    pending.error = str(e)
+            self.batches += 1
+            for pending in batch:
+                pending.done.set()
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        batcher: MicroBatcher = self.server.batcher
+        while True:
+            try:
+                request = json.loads(recv_frame(self.request))
+            except (ConnectionError, OSError):
+                return  # Client went away
+            except ValueError as e:
+                send_frame(self.request, json.dumps({"status": "error", "error": str(e)}).encode())
+                return
+
+            pending = batcher.submit([str(t) for t in request.get("texts", [])])
+            pending.done.wait()
+            if pending.error is not None:
+                send_frame(self.request, json.dumps({"status": "error", "error": pending.error}).encode())
+                continue
+
+            vectors = np.ascontiguousarray(pending.vectors, dtype="<f4")
+            count, dim = vectors.shape
+            send_frame(self.request, json.dumps(
+                {"status": "ok", "count": count, "dim": dim, "model": self.server.model_name}
+            ).encode())
+            send_frame(self.request, vectors.tobytes())
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix-socket server; one thread per client connection, one shared batcher."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, model=None, model_name: str = "all-MiniLM-L6-v2",
+                 max_batch_size: int = 64, max_wait_ms: float = 10.0, warmup: bool = True):
+        self.model_name = model_name
+        if model is None:
+            from app.embeddings.embedder import Embedder
+            model = Embedder(model_name).model
+        if warmup:
+            # Pay for weight loading and kernel setup before the first client does
+            model.encode(["warmup"], convert_to_numpy=True)
+            logger.info("Embedding model warmed up")
+
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)  # Stale socket from a previous run
+        self.socket_path = socket_path
+        self.batcher = MicroBatcher(model, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+        self.batcher.start()
+        super().__init__(socket_path, _Handler)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared local embedding server")
+    parser.add_argument("--socket", default=settings.EMBEDDER_SOCKET, help="Unix socket path")
+    parser.add_argument("--model", default=None,
+                        help="SentenceTransformer model name (default: the active embedding model)")
+    parser.add_argument("--max-batch", type=int, default=settings.EMBEDDER_MAX_BATCH,
+                        help="Most texts encoded in one batch")
+    parser.add_argument("--max-wait-ms", type=float, default=settings.EMBEDDER_MAX_WAIT_MS,
+                        help="How long a batch stays open for other clients")
+    parser.add_argument("--no-warmup", action="store_true", help="Skip the warm-up encode at startup")
+    args = parser.parse_args()
+    if args.model is None:
+        from app.embeddings.backends import current_model
+        args.model = current_model()
+
+    logger.info(f"Loading {args.model} for the embedding server...")
+    server = EmbeddingServer(
+        args.socket,
+        model_name=args.model,
+        max_batch_size=args.max_batch,
+        max_wait_ms=args.max_wait_ms,
+        warmup=not args.no_warmup,
+    )
+    logger.info(f"Embedding server listening on {args.socket} "
+                f"(batch {args.max_batch}, window {args.max_wait_ms:g} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Embedding server stopped.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
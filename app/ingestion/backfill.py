@@ -0,0 +1,203 @@
+"""
+Embedding backfill.
+
+Articles saved by the lite ingestion service, or whose embedding failed, have
+no vector and never show up in vector search. `backfill_embeddings` pages
+through the articles missing a vector in id order (keyset pagination),
+embeds them in rate-limited batches and writes each batch back with one
+executemany UPDATE. The last id done is checkpointed in job_checkpoints in
+the same transaction, so an interrupted run resumes where it stopped.
+
+Re-embedding the corpus under a new model uses the same loop on the
+`embedding_next` shadow columns of both the hot rows and the archive (see
+app/storage/archive.py; profiles mix in archived vectors): search keeps using
+`embedding` while they fill, and `swap_embeddings` then promotes all new
+vectors and the new model (app/storage/embedding_model.py) in one
+transaction. Gap filling skips archived articles.
+"""
+import time
+from typing import Callable, Dict, Optional
+from sqlalchemy import update, bindparam, exists
+from sqlalchemy.orm import Session
+from app.ingestion.preprocess import truncate_tokens
+from app.storage.models import Article, ArticleArchive
+from app.storage.checkpoints import get_checkpoint, set_checkpoint
+from app.storage.embedding_model import next_model, set_next_model, promote_next_model
+from app.storage.vectors import EMBEDDING_DIM
+from app.storage.changefeed import publish, ARTICLES, RESYNC
+from app.recommender.projection import get_projection
+from app.utils.logger import setup_logger
+
+logger = setup_logger("backfill")
+
+BACKFILL_BATCH_SIZE = 64
+BACKFILL_MAX_PER_MINUTE = 600   # Texts sent to the embedder per minute (API quotas, shared model server)
+
+TARGETS = {
+    "embedding": "embedding_backfill",            # Fill gaps with the current model
+    "embedding_next": "embedding_reembed",        # Re-embed everything under a new model
+    "archive_next": "archive_reembed",            # ... and the archived articles' vectors
+}
+REEMBED_TARGETS = ("embedding_next", "archive_next")
+
+
+class RateLimiter:
+    """Spaces out work so that at most `max_per_minute` items go through per minute."""
+
+    def __init__(self, max_per_minute: float, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.interval = 60.0 / max_per_minute if max_per_minute else 0.0
+        self.clock = clock
+        self.sleep = sleep
+        self._next = None
+
+    def wait(self, items: int):
+        """Blocks until `items` more may be processed."""
+        now = self.clock()
+        if self._next is not None and now < self._next:
+            self.sleep(self._next - now)
+            now = self._next
+        self._next = now + items * self.interval
+
+
+def _pending(db: Session, target: str):
+    if target == "archive_next":
+        return db.query(ArticleArchive.article_id.label("id"), Article.title, ArticleArchive.content).join(
+            Article, Article.id == ArticleArchive.article_id
+        ).filter(ArticleArchive.embedding.isnot(None), ArticleArchive.embedding_next.is_(None))
+    column = getattr(Article, target)
+    return db.query(Article.id, Article.title, Article.content).filter(
+        column.is_(None),
+        ~exists().where(ArticleArchive.article_id == Article.id),
+    )
+
+
+def _statement(target: str, **values):
+    """UPDATE writing the "vector" parameter into the target column of row "row_id"."""
+    if target == "archive_next":
+        table, key, column = ArticleArchive.__table__, ArticleArchive.__table__.c.article_id, "embedding_next"
+    else:
+        table, key, column = Article.__table__, Article.__table__.c.id, target
+    return update(table).where(key == bindparam("row_id")).values({column: bindparam("vector"), **values})
+
+
+def check_dimension(embedder):
+    """Raises ValueError unless `embedder` returns EMBEDDING_DIM-d vectors, the width of the vector columns."""
+    vectors = embedder.embed(["dimension check"])
+    if not vectors:
+        raise ValueError("The embedder returned no vector")
+    if len(vectors[0]) != EMBEDDING_DIM:
+        raise ValueError(f"The embedder returns {len(vectors[0])}-d vectors; the vector columns hold {EMBEDDING_DIM}")
+
+
+def count_pending(db: Session, target: str = "embedding") -> int:
+    return _pending(db, target).count()
+
+
+def backfill_embeddings(db: Session, embedder, target: str = "embedding", batch_size: int = BACKFILL_BATCH_SIZE,
+                        max_per_minute: float = BACKFILL_MAX_PER_MINUTE, max_batches: Optional[int] = None,
+                        limiter: Optional[RateLimiter] = None, model: Optional[str] = None) -> Dict:
+    """
+    Embeds articles whose `target` column is NULL, resuming after the
+    checkpoint. A full pass resets the checkpoint, so the next run starts
+    over and picks up articles that failed or arrived meanwhile.
+    Stops at the first embedding failure without advancing past it.
+    A re-embed names the `model` it embeds with; it is recorded with the
+    first batch, and a re-embed under another model is refused until swapped.
+    """
+    if target not in TARGETS:
+        raise ValueError(f"Unknown backfill target '{target}' (expected one of {', '.join(TARGETS)})")
+    if target in REEMBED_TARGETS:
+        if not model:
+            raise ValueError("A re-embed needs the name of the model it embeds with")
+        recorded = next_model(db)
+        if recorded and recorded != model:
+            raise ValueError(f"embedding_next already holds {recorded} vectors; swap them in before re-embedding")
+        if not recorded:
+            set_next_model(db, model)  # Committed with the first batch
+    checkpoint = TARGETS[target]
+    limiter = limiter or RateLimiter(max_per_minute)
+    projection = get_projection() if target == "embedding" else None
+    if projection is not None:
+        # Keep projected retrieval in step with the new vectors
+        statement = _statement(target, embedding_proj=bindparam("projected"), projection_version=projection.version)
+    else:
+        statement = _statement(target)
+
+    position = get_checkpoint(db, checkpoint)
+    stats = {"status": "ok", "target": target, "resumed_from": position, "embedded": 0, "batches": 0,
+             "complete": False}
+    while max_batches is None or stats["batches"] < max_batches:
+        rows = _pending(db, target).filter(Article.id > position).order_by(Article.id).limit(batch_size).all()
+        if not rows:
+            stats["complete"] = True
+            break
+
+        limiter.wait(len(rows))
+        vectors = embedder.embed([truncate_tokens(f"{row.title} {row.content or ''}") for row in rows])
+        if not vectors or len(vectors) != len(rows):
+            logger.error(f"Embedding failed for articles {rows[0].id}-{rows[-1].id}; stopping at checkpoint {position}")
+            stats["status"] = "error"
+            break
+
+        try:
+            params = [{"row_id": row.id, "vector": list(vector)} for row, vector in zip(rows, vectors)]
+            if projection is not None:
+                for param, projected in zip(params, projection.project(vectors)):
+                    param["projected"] = projected.tolist()
+            db.execute(statement, params)
+            position = rows[-1].id
+            set_checkpoint(db, checkpoint, position)
+            if target == "embedding":
+                publish(db, ARTICLES, [row.id for row in rows])  # Newly searchable
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        stats["embedded"] += len(rows)
+        stats["batches"] += 1
+        logger.info(f"Backfilled {stats['embedded']} {target} vectors (up to article {position})")
+
+    if stats["complete"]:
+        set_checkpoint(db, checkpoint, 0)
+        db.commit()
+    stats["position"] = position
+    return stats
+
+
+def swap_embeddings(db: Session, model: str) -> int:
+    """
+    Promotes every `embedding_next` vector, hot and archived, to `embedding`
+    and makes `model` the active embedding model, in one transaction, so
+    ingestion embeds new articles in the new space from then on.
+    Refuses unless the re-embed ran under `model` and reached every article;
+    run it to completion first (with ingestion paused, so nothing new slips in).
+    Projected vectors belong to the old model and are cleared; refit the
+    projection (scripts/fit_projection.py) afterwards.
+    Returns the number of articles swapped.
+    """
+    recorded = next_model(db)
+    if recorded != model:
+        raise RuntimeError(f"embedding_next holds {recorded or 'no'} vectors, not {model}; re-embed with {model} first")
+    remaining = sum(count_pending(db, target) for target in REEMBED_TARGETS)
+    if remaining:
+        raise RuntimeError(f"{remaining} articles have no new embedding yet; finish the re-embed first")
+    try:
+        swapped = db.execute(
+            update(Article).where(Article.embedding_next.isnot(None)).values(
+                embedding=Article.embedding_next, embedding_next=None, embedding_proj=None, projection_version=None
+            )
+        ).rowcount
+        db.execute(update(ArticleArchive).where(ArticleArchive.embedding_next.isnot(None)).values(
+            embedding=ArticleArchive.embedding_next, embedding_next=None,
+        ))
+        promote_next_model(db)
+        for target in REEMBED_TARGETS:
+            set_checkpoint(db, TARGETS[target], 0)
+        publish(db, RESYNC)  # Every vector changed
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    logger.info(f"Swapped in {model} embeddings for {swapped} articles")
+    return swapped
@@ -0,0 +1,142 @@
+"""
+Near-duplicate story detection for ingestion.
+
+The same wire story is often published by several feeds under different links.
+Articles are fingerprinted with a 64-bit SimHash over word shingles of the
+cleaned title and content; an LSH table keyed on four 16-bit bands finds every
+fingerprint within SIMHASH_MAX_DISTANCE bits (pigeonhole: at least one band
+matches exactly). Rewrites that SimHash misses are caught afterwards by cosine
+similarity against the embeddings of recent articles.
+"""
+import re
+import hashlib
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+# Max Hamming distance between fingerprints to count as a near copy
+SIMHASH_MAX_DISTANCE = 3
+SIMHASH_BANDS = 4  # 4 x 16 bits; must exceed SIMHASH_MAX_DISTANCE
+SHINGLE_SIZE = 3
+
+# Cosine similarity above which two embeddings are the same story
+EMBEDDING_DUPLICATE_THRESHOLD = 0.92
+
+# Only compare against articles published within this window
+RECENT_WINDOW_HOURS = 72
+
+_WORD_RE = re.compile(r"\w+")
+_BAND_BITS = 64 // SIMHASH_BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+
+def simhash(text: str) -> Optional[int]:
+    """
+    Returns the unsigned 64-bit SimHash of `text`.
+    Near-identical texts produce fingerprints a few bits apart.
+    None for text without words: it has nothing to compare on, and a shared
+    fingerprint would put every such article in one cluster.
+    """
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return None
+    if len(words) < SHINGLE_SIZE:
+        shingles = words
+    else:
+        shingles = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+
+    digests = b"".join(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest() for s in shingles)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8), axis=1)
+    # Each shingle votes +1/-1 on every bit position
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(shingles)
+    packed = np.packbits(votes > 0)
+    return int(packed.view("<u8")[0])
+
+
+def to_signed64(value: int) -> int:
+    """Maps an unsigned 64-bit fingerprint onto a signed BIGINT column."""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def from_signed64(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class SimHashIndex:
+    """
+    LSH table over SimHash fingerprints.
+    Each entry carries the cluster it belongs to.
+    """
+
+    def __init__(self, max_distance: int = SIMHASH_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._bands: List[Dict[int, List[Tuple[int, object]]]] = [{} for _ in range(SIMHASH_BANDS)]
+
+    def add(self, fingerprint: int, cluster) -> None:
+        for band, table in enumerate(self._bands):
+            key = (fingerprint >> (band * _BAND_BITS)) & _BAND_MASK
+            table.setdefault(key, []).append((fingerprint, cluster))
+
+    def query(self, fingerprint: int) -> Optional[Tuple[object, int]]:
+        """Returns (cluster, distance) of the closest indexed fingerprint, or None."""
+        best = None
+        for band, table in enumerate(self._bands):
+            key = (fingerprint >> (band * _BAND_BITS)) & _BAND_MASK
+            for other, cluster in table.get(key, ()):
+                distance = hamming(fingerprint, other)
+                if distance <= self.max_distance and (best is None or distance < best[1]):
+                    best = (cluster, distance)
+                    if distance == 0:
+                        return best
+        return best
+
+
+class EmbeddingIndex:
+    """
+    In-memory cosine index over the embeddings of recent articles.
+    Vectors are normalized once so each lookup is a single mat-vec product.
+    Rows are written in place into a matrix that grows by doubling, so
+    interleaved adds and queries never rebuild it.
+    """
+
+    INITIAL_CAPACITY = 256
+
+    def __init__(self, threshold: float = EMBEDDING_DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self._clusters: List[object] = []
+        self._matrix: Optional[np.ndarray] = None
+
+    def __len__(self):
+        return len(self._clusters)
+
+    def add(self, embedding, cluster) -> None:
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        if norm == 0:
+            return
+        n = len(self._clusters)
+        if self._matrix is None:
+            self._matrix = np.empty((self.INITIAL_CAPACITY, len(vec)), dtype=np.float32)
+        elif n == len(self._matrix):
+            grown = np.empty((2 * n, self._matrix.shape[1]), dtype=np.float32)
+            grown[:n] = self._matrix
+            self._matrix = grown
+        self._matrix[n] = vec / norm
+        self._clusters.append(cluster)
+
+    def query(self, embedding) -> Optional[Tuple[object, float]]:
+        """Returns (cluster, similarity) of the most similar indexed vector above threshold."""
+        if not self._clusters:
+            return None
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        if norm == 0:
+            return None
+        sims = self._matrix[:len(self._clusters)] @ (vec / norm)
+        best = int(np.argmax(sims))
+        if sims[best] >= self.threshold:
+            return self._clusters[best], float(sims[best])
+        return None
@@ -0,0 +1,161 @@
+"""
+Streaming fast path for well-formed RSS 2.0 and Atom 1.0 feeds.
+
+feedparser builds a full document model and normalizes far more than
+ingestion uses. `FastFeed` walks the document with ElementTree's
+incremental parser (expat) and yields one dict per entry as soon as its
+closing tag is read. It keeps only the title, link, summary, content and
+publish date, then drops the element, so no element tree for the whole
+document is ever built. The raw body is still held in memory: the caller
+needs it to fall back to feedparser, and it consumes every entry before
+saving any (see fetch_feeds._parse_fast). Peak memory is the body, plus
+the entry dicts, plus one entry's elements.
+Dates are parsed straight into naive UTC datetimes, without struct_time.
+
+Anything outside that happy path raises `FeedFormatError`, and the caller
+falls back to feedparser. That covers malformed XML, undeclared entities,
+RSS 1.0/RDF, Atom 0.3, relative links and dates in unusual formats.
+"""
+import io
+import re
+import datetime
+import xml.etree.ElementTree as ET
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, Optional
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+CONTENT_ENCODED = "{http://purl.org/rss/1.0/modules/content/}encoded"
+DC_DATE = "{http://purl.org/dc/elements/1.1/}date"
+RSS_VERSIONS = ("2.0", "0.91", "0.92")
+
+# fromisoformat() in Python 3.10 rejects "Z" and fractions that aren't 3 or 6 digits
+_ISO_DATE_RE = re.compile(
+    r"^(\d{4})-(\d{2})-(\d{2})"
+    r"(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:\.\d+)?)?)?"
+    r"\s*(Z|[+-]\d{2}:?\d{2})?$"
+)
+
+
+class FeedFormatError(ValueError):
+    """The feed is not one the fast path handles; use feedparser instead."""
+
+
+def parse_date(value: Optional[str]) -> Optional[datetime.datetime]:
+    """
+    RFC 822 (RSS) or ISO 8601 (Atom, dc:date) to a naive UTC datetime,
+    truncated to seconds like feedparser's struct_time. Raises FeedFormatError
+    for a date it can't read. Returns None if there is no date.
+    """
+    value = (value or "").strip()
+    if not value:
+        return None
+    match = _ISO_DATE_RE.match(value)
+    try:
+        if match:
+            year, month, day, hour, minute, second, zone = match.groups()
+            parsed = datetime.datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0),
+                                       int(second or 0))
+            if zone and zone != "Z":
+                sign = -1 if zone[0] == "-" else 1
+                digits = zone[1:].replace(":", "")
+                parsed -= sign * datetime.timedelta(hours=int(digits[:2]), minutes=int(digits[2:]))
+            return parsed
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, OverflowError) as e:
+        raise FeedFormatError(f"unreadable date {value!r}") from e
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return parsed.replace(microsecond=0)
+
+
+def _text(elem: Optional[ET.Element]) -> str:
+    """All text inside `elem` (CDATA included; xhtml content flattened)."""
+    if elem is None:
+        return ""
+    return "".join(elem.itertext())
+
+
+def _absolute(link: str) -> str:
+    link = link.strip()
+    if link and "://" not in link:
+        raise FeedFormatError(f"relative link {link!r}")
+    return link
+
+
+class FastFeed:
+    """
+    One feed document. `entries()` yields dicts with title, summary,
+    content, link and published (None when the entry has no date).
+    `title` holds the feed's title once the parser has passed it.
+    """
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.title: Optional[str] = None
+        self.format: Optional[str] = None
+
+    def entries(self) -> Iterator[Dict]:
+        stack = []
+        try:
+            for event, elem in ET.iterparse(io.BytesIO(self.data), events=("start", "end")):
+                if event == "start":
+                    if not stack:
+                        self._detect(elem)
+                    stack.append(elem)
+                    continue
+                stack.pop()
+                depth = len(stack)
+                if self.format == "rss":
+                    if elem.tag == "item":
+                        yield self._rss_entry(elem)
+                        stack[-1].remove(elem)
+                    elif elem.tag == "title" and depth == 2:  # rss > channel > title
+                        self.title = _text(elem).strip()
+                else:
+                    if elem.tag == ATOM + "entry":
+                        yield self._atom_entry(elem)
+                        stack[-1].remove(elem)
+                    elif elem.tag == ATOM + "title" and depth == 1:  # feed > title
+                        self.title = _text(elem).strip()
+        except ET.ParseError as e:
+            raise FeedFormatError(f"malformed XML: {e}") from e
+
+    def _detect(self, root: ET.Element):
+        if root.tag == "rss" and root.get("version") in RSS_VERSIONS:
+            self.format = "rss"
+        elif root.tag == ATOM + "feed":
+            self.format = "atom"
+        else:
+            raise FeedFormatError(f"unsupported feed root {root.tag!r}")
+
+    @staticmethod
+    def _rss_entry(item: ET.Element) -> Dict:
+        link = item.findtext("link") or ""
+        if not link.strip():
+            guid = item.find("guid")
+            if guid is not None and guid.get("isPermaLink", "true").lower() != "false":
+                link = guid.text or ""
+        date = item.findtext("pubDate") or item.findtext(DC_DATE)
+        return {
+            "title": _text(item.find("title")),
+            "summary": _text(item.find("description")),
+            "content": _text(item.find(CONTENT_ENCODED)),
+            "link": _absolute(link),
+            "published": parse_date(date),
+        }
+
+    @staticmethod
+    def _atom_entry(entry: ET.Element) -> Dict:
+        link = ""
+        for candidate in entry.findall(ATOM + "link"):
+            if candidate.get("rel", "alternate") == "alternate":
+                link = candidate.get("href", "")
+                break
+        published = entry.findtext(ATOM + "published") or entry.findtext(ATOM + "updated")
+        return {
+            "title": _text(entry.find(ATOM + "title")),
+            "summary": _text(entry.find(ATOM + "summary")),
+            "content": _text(entry.find(ATOM + "content")),
+            "link": _absolute(link),
+            "published": parse_date(published),
+        }
@@ -1,61 +1,105 @@
-import feedparser
+import gzip
 import datetime
-from typing import List, Dict
+import urllib.error
+import urllib.request
+import feedparser
+from typing import List, Dict, Optional
 from app.utils.logger import setup_logger
 from app.ingestion.preprocess import clean_text
+from app.ingestion.fast_parser import FastFeed, FeedFormatError
 
 logger = setup_logger("ingestion")
 
-def parse_feed(url: str) -> List[Dict]:
+FETCH_TIMEOUT_SECONDS = 20
+USER_AGENT = "news-recommender/1.0"
+
+def fetch_feed(url: str) -> bytes:
+    """
+    Downloads a feed document into memory (the feedparser fallback needs the
+    whole body); HTTP errors raise with their status.
+    """
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT, "Accept-Encoding": "gzip"})
+    try:
+        with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT_SECONDS) as response:
+            data = response.read()
+            if response.headers.get("Content-Encoding") == "gzip":
+                data = gzip.decompress(data)
+            return data
+    except urllib.error.HTTPError as e:
+        raise Exception(f"HTTP {e.code}") from e
+
+def _article(title: str, summary: str, content: str, link: str, published_date: Optional[datetime.datetime],
+             source: str) -> Optional[Dict]:
+    title = clean_text(title)
+    link = link.strip()
+    if not (title and link):
+        return None
+    return {
+        "title": title,
+        # Prefer content if available, else summary
+        "content": clean_text(content) if content else clean_text(summary),
+        "link": link,
+        "published_date": published_date or datetime.datetime.utcnow(),
+        "source": source,
+    }
+
+def _parse_fast(data: bytes, url: str) -> List[Dict]:
+    feed = FastFeed(data)
+    # Consumed fully before anything is returned: a late parse error falls back for the whole feed
+    entries = list(feed.entries())
+    source = feed.title or url
+    articles = (_article(e["title"], e["summary"], e["content"], e["link"], e["published"], source) for e in entries)
+    return [a for a in articles if a]
+
+def _parse_feedparser(data: bytes, url: str) -> List[Dict]:
+    feed = feedparser.parse(data)
+    if feed.bozo and not feed.entries:
+        # feedparser reports parse failures instead of raising
+        raise Exception(str(feed.get('bozo_exception', 'unreadable feed')))
+    articles = []
+    for entry in feed.entries:
+        # published_parsed is a struct_time in UTC; Atom entries may only have updated
+        published_parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+        published_date = datetime.datetime(*published_parsed[:6]) if published_parsed else None
+        content = entry.content[0].value if 'content' in entry else ''
+        article = _article(entry.get('title', ''), entry.get('summary', ''), content, entry.get('link', ''),
+                           published_date, feed.feed.get('title', url))
+        if article:
+            articles.append(article)
+    return articles
+
+def parse_feed(url: str, errors: Optional[Dict[str, str]] = None) -> List[Dict]:
     """
     Fetches and parses a single RSS feed.
     Returns a list of dictionaries with article data.
+    Well-formed RSS 2.0 and Atom go through the streaming fast path
+    (fast_parser.py); anything else is handed to feedparser.
+    Fetch failures are logged and, if `errors` is given, recorded there by URL.
     """
     try:
         logger.info(f"Fetching feed: {url}")
-        feed = feedparser.parse(url)
-        articles = []
-        
-        for entry in feed.entries:
-            # Extract basic info
-            title = clean_text(entry.get('title', ''))
-            summary = clean_text(entry.get('summary', ''))
-            link = entry.get('link', '')
-            
-            # published_parsed is a struct_time, convert to datetime
-            published_parsed = entry.get('published_parsed')
-            if published_parsed:
-                published_date = datetime.datetime(*published_parsed[:6])
-            else:
-                published_date = datetime.datetime.utcnow()
-                
-            # Prefer content if available, else summary
-            content = summary
-            if 'content' in entry:
-                content = clean_text(entry.content[0].value)
-            
-            if title and link:
-                articles.append({
-                    "title": title,
-                    "content": content,
-                    "link": link,
-                    "published_date": published_date,
-                    "source": feed.feed.get('title', url)
-                })
-        
+        data = fetch_feed(url)
+        try:
+            articles = _parse_fast(data, url)
+        except FeedFormatError as e:
+            logger.info(f"Fast parser declined {url} ({e}); using feedparser")
+            articles = _parse_feedparser(data, url)
+
         logger.info(f"Fetched {len(articles)} articles from {url}")
         return articles
         
     except Exception as e:
         logger.error(f"Error fetching feed {url}: {e}")
+        if errors is not None:
+            errors[url] = str(e)
         return []
 
-def fetch_all_feeds(feed_urls: List[str]) -> List[Dict]:
+def fetch_all_feeds(feed_urls: List[str], errors: Optional[Dict[str, str]] = None) -> List[Dict]:
     """
     Fetches multiple feeds and aggregates articles.
     """
     all_articles = []
     for url in feed_urls:
-        articles = parse_feed(url)
+        articles = parse_feed(url, errors)
         all_articles.extend(articles)
     return all_articles
@@ -0,0 +1,119 @@
+"""
+Background ingestion jobs.
+
+POST /ingest records a job row and returns immediately; the job runs on a
+single background thread in the worker that accepted it. Job rows live in
+the database so any worker can report progress, and a PostgreSQL advisory
+lock guarantees only one ingestion runs at a time across all workers and the
+scheduler process. The scheduler's per-feed jobs hold that lock shared, plus
+an exclusive lock of their own feed (`feed_lock`), so feeds run side by side
+but never during a full run or an embedding swap.
+"""
+import uuid
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from app.storage.db import SessionLocal
+from app.storage.locks import advisory_lock
+from app.storage.models import IngestionJob
+from app.utils.logger import setup_logger
+
+logger = setup_logger("ingestion_jobs")
+
+INGESTION_LOCK = "news-recommender:ingestion"
+ACTIVE_STATUSES = ("queued", "running")
+
+# A job still marked active after this long belongs to a worker that died
+STALE_AFTER = datetime.timedelta(hours=2)
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingestion")
+
+def feed_lock(url: str) -> str:
+    """Lock name for one feed; advisory_lock hashes it into the key."""
+    return f"{INGESTION_LOCK}:feed:{url}"
+
+def job_to_dict(job: IngestionJob) -> dict:
+    def iso(value):
+        return value.isoformat() if value else None
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "stage": job.stage,
+        "stats": job.stats,
+        "error": job.error,
+        "created_at": iso(job.created_at),
+        "started_at": iso(job.started_at),
+        "finished_at": iso(job.finished_at),
+    }
+
+def _update_job(job_id: str, **fields):
+    db = SessionLocal()
+    try:
+        db.query(IngestionJob).filter(IngestionJob.id == job_id).update(fields)
+        db.commit()
+    except Exception as e:
+        logger.error(f"Failed to update ingestion job {job_id}: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+def find_active_job(db) -> Optional[IngestionJob]:
+    cutoff = datetime.datetime.utcnow() - STALE_AFTER
+    return db.query(IngestionJob).filter(
+        IngestionJob.status.in_(ACTIVE_STATUSES),
+        IngestionJob.created_at >= cutoff,
+    ).order_by(IngestionJob.created_at.desc()).first()
+
+def get_job(job_id: str) -> Optional[dict]:
+    db = SessionLocal()
+    try:
+        job = db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
+        return job_to_dict(job) if job else None
+    finally:
+        db.close()
+
+def submit_ingestion(feed_urls: List[str]) -> Tuple[dict, bool]:
+    """
+    Queues an ingestion job. If one is already queued or running anywhere,
+    returns that job instead. Returns (job, created).
+    """
+    db = SessionLocal()
+    try:
+        active = find_active_job(db)
+        if active:
+            return job_to_dict(active), False
+        job = IngestionJob(id=str(uuid.uuid4()), status="queued", feeds=list(feed_urls))
+        db.add(job)
+        db.commit()
+        data = job_to_dict(job)
+    finally:
+        db.close()
+
+    _executor.submit(run_job, data["job_id"], list(feed_urls))
+    logger.info(f"Queued ingestion job {data['job_id']} for {len(feed_urls)} feeds")
+    return data, True
+
+def run_job(job_id: str, feed_urls: List[str]):
+    """Runs one ingestion job under the cluster-wide ingestion lock."""
+    with advisory_lock(INGESTION_LOCK) as acquired:
+        if not acquired:
+            logger.info(f"Ingestion job {job_id} skipped: another ingestion holds the lock")
+            _update_job(job_id, status="skipped", error="Another ingestion is already running",
+                        finished_at=datetime.datetime.utcnow())
+            return
+
+        _update_job(job_id, status="running", started_at=datetime.datetime.utcnow())
+        try:
+            # Imported here: feedparser and the embedding clients stay out of API worker startup
+            from app.ingestion.service import ingest_feeds
+            stats = ingest_feeds(
+                feed_urls,
+                progress=lambda stage, current: _update_job(job_id, stage=stage, stats=dict(current)),
+            )
+            status = "succeeded" if stats.get("status") == "ok" else "failed"
+            _update_job(job_id, status=status, stage=None, stats=stats, error=stats.get("error"),
+                        finished_at=datetime.datetime.utcnow())
+            logger.info(f"Ingestion job {job_id} {status}: {stats.get('saved', 0)} saved")
+        except Exception as e:
+            logger.error(f"Ingestion job {job_id} failed: {e}")
+            _update_job(job_id, status="failed", error=str(e), finished_at=datetime.datetime.utcnow())
@@ -1,21 +1,108 @@
 import re
 import html
+import threading
+from app.utils.logger import setup_logger
+
+logger = setup_logger("preprocess")
+
+# One alternation, applied in a single pass: script/style blocks (with their
+# contents), comments, CDATA and tags each become a space. Every branch starts
+# with '<' so the regex engine can skip plain text quickly. Tags must start
+# with a letter, '/', '!' or '?' so literal text such as "a < b" survives.
+_MARKUP_RE = re.compile(
+    r"<(?:(script|style)\b[^>]*>.*?</\1\s*>|!--.*?-->|!\[CDATA\[.*?\]\]>|[a-zA-Z/!?][^>]*>)",
+    re.IGNORECASE | re.DOTALL,
+)
+
+# Word and punctuation tokens, roughly what BERT's basic tokenizer splits on
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+# all-MiniLM-L6-v2 reads at most 256 word pieces; everything after is dropped
+EMBEDDING_TOKENIZER = "sentence-transformers/all-MiniLM-L6-v2"
+MODEL_MAX_TOKENS = 256
+SPECIAL_TOKENS = 2  # [CLS] and [SEP]
+
+_tokenizer = None
+_tokenizer_loaded = False
+_tokenizer_lock = threading.Lock()
 
 def clean_text(text: str) -> str:
     """
-    Cleans raw text by removing HTML tags, normalizing whitespace, 
+    Cleans raw text by removing HTML tags, normalizing whitespace,
     and unescaping HTML entities.
+    Tags are stripped before unescaping so entity-escaped markup
+    (e.g. "&lt;p&gt;") is removed too instead of surviving as text.
     """
     if not text:
         return ""
-    
-    # Unescape HTML entities
-    text = html.unescape(text)
-    
-    # Remove HTML tags using regex
-    text = re.sub(r'<[^>]+>', '', text)
-    
-    # Normalize whitespace (replace multiple spaces/newlines with single space)
-    text = re.sub(r'\s+', ' ', text).strip()
-    
+
+    if "<" in text:
+        text = _MARKUP_RE.sub(" ", text)
+
+    if "&" in text:
+        text = html.unescape(text)
+        if "<" in text:
+            # Entity-escaped markup only becomes visible after unescaping
+            text = _MARKUP_RE.sub(" ", text)
+
+    # str.split() collapses all Unicode whitespace (including &nbsp;) in C
+    return " ".join(text.split())
+
+def load_tokenizer(download: bool = False):
+    """
+    Loads the model's fast tokenizer from the local Hugging Face cache, if the
+    `tokenizers` package is available. With `download`, fetches it into the
+    cache first when it isn't there. Called at startup (API warmup, the
+    scheduler, the image build) so ingestion itself never goes to the network.
+    Returns None when unavailable: truncation then counts words.
+    """
+    global _tokenizer, _tokenizer_loaded
+    with _tokenizer_lock:
+        if _tokenizer is None:
+            try:
+                from huggingface_hub import hf_hub_download
+                from tokenizers import Tokenizer
+                try:
+                    path = hf_hub_download(EMBEDDING_TOKENIZER, "tokenizer.json", local_files_only=True)
+                except Exception:
+                    if not download:
+                        raise
+                    path = hf_hub_download(EMBEDDING_TOKENIZER, "tokenizer.json")
+                _tokenizer = Tokenizer.from_file(path)
+            except Exception as e:
+                logger.info(f"Tokenizer unavailable ({e}); truncating by word count")
+        _tokenizer_loaded = True
+    return _tokenizer
+
+def _get_tokenizer():
+    """The tokenizer from `load_tokenizer`; on first use, tries the local cache only."""
+    if not _tokenizer_loaded:
+        load_tokenizer()
+    return _tokenizer
+
+def truncate_tokens(text: str, max_tokens: int = MODEL_MAX_TOKENS) -> str:
+    """
+    Cuts `text` to the prefix the embedding model will actually read.
+    Uses the model's word-piece tokenizer when available; otherwise counts
+    words and punctuation, which never exceeds the word-piece count, so the
+    fallback may keep a little more than the model reads but never less.
+    """
+    budget = max_tokens - SPECIAL_TOKENS
+    if not text or budget <= 0:
+        return ""
+
+    tokenizer = _get_tokenizer()
+    if tokenizer is not None:
+        # No word piece is longer than its word; cap the text handed to the tokenizer
+        window = text[:budget * 24]
+        encoding = tokenizer.encode(window, add_special_tokens=False)
+        if len(encoding.offsets) <= budget and len(window) == len(text):
+            return text
+        if len(encoding.offsets) <= budget:
+            return window
+        return window[:encoding.offsets[budget - 1][1]]
+
+    for count, match in enumerate(_WORD_RE.finditer(text), start=1):
+        if count == budget:
+            return text[:match.end()]
     return text
@@ -0,0 +1,180 @@
+"""
+Adaptive per-feed polling.
+
+Each feed's publish rate is learned from the number of new items seen per
+fetch (an exponentially weighted moving average of items/hour). The next
+interval is the time expected to accumulate TARGET_NEW_ITEMS new items,
+clamped to [min_interval, max_interval]. Failing feeds back off exponentially
+on their own without affecting the others.
+"""
+import json
+import os
+import random
+import datetime
+import threading
+from typing import Dict, List, Optional
+from app.utils.logger import setup_logger
+
+logger = setup_logger("feed_scheduler")
+
+MIN_INTERVAL_MINUTES = 15
+MAX_INTERVAL_MINUTES = 360
+TARGET_NEW_ITEMS = 5       # Fetch when about this many new items are expected
+RATE_SMOOTHING = 0.3       # EWMA weight of the newest observation
+IDLE_GROWTH = 1.5          # Interval multiplier when a fetch finds nothing new
+BACKOFF_JITTER = 0.1       # +/- fraction applied to error backoff
+
+
+class FeedState:
+    """Learned schedule and health of one feed."""
+
+    def __init__(self, url: str, interval_minutes: float):
+        self.url = url
+        self.interval_minutes = interval_minutes
+        self.rate_per_hour: Optional[float] = None
+        self.last_fetch: Optional[datetime.datetime] = None
+        self.last_success: Optional[datetime.datetime] = None
+        self.next_fetch: Optional[datetime.datetime] = None
+        self.last_new_items = 0
+        self.consecutive_errors = 0
+        self.last_error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        def iso(value):
+            return value.isoformat() if value else None
+        return {
+            "url": self.url,
+            "interval_minutes": round(self.interval_minutes, 2),
+            "rate_per_hour": round(self.rate_per_hour, 3) if self.rate_per_hour is not None else None,
+            "last_fetch": iso(self.last_fetch),
+            "last_success": iso(self.last_success),
+            "next_fetch": iso(self.next_fetch),
+            "last_new_items": self.last_new_items,
+            "consecutive_errors": self.consecutive_errors,
+            "last_error": self.last_error,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "FeedState":
+        def parse(value):
+            return datetime.datetime.fromisoformat(value) if value else None
+        state = cls(data["url"], data["interval_minutes"])
+        state.rate_per_hour = data.get("rate_per_hour")
+        state.last_fetch = parse(data.get("last_fetch"))
+        state.last_success = parse(data.get("last_success"))
+        state.next_fetch = parse(data.get("next_fetch"))
+        state.last_new_items = data.get("last_new_items", 0)
+        state.consecutive_errors = data.get("consecutive_errors", 0)
+        state.last_error = data.get("last_error")
+        return state
+
+
+class AdaptivePoller:
+    """
+    Tracks per-feed state and computes when each feed should be fetched next.
+    Thread-safe: feeds are fetched concurrently by the scheduler's workers.
+    """
+
+    def __init__(self, feed_urls: List[str], min_interval_minutes: float = MIN_INTERVAL_MINUTES,
+                 max_interval_minutes: float = MAX_INTERVAL_MINUTES, target_new_items: float = TARGET_NEW_ITEMS,
+                 state_file: Optional[str] = None):
+        self.min_interval = min_interval_minutes
+        self.max_interval = max_interval_minutes
+        self.target_new_items = target_new_items
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self.feeds: Dict[str, FeedState] = {url: FeedState(url, min_interval_minutes) for url in feed_urls}
+        if state_file:
+            self._load()
+
+    def _clamp(self, minutes: float) -> float:
+        return max(self.min_interval, min(self.max_interval, minutes))
+
+    def record_success(self, url: str, new_items: int, now: Optional[datetime.datetime] = None) -> datetime.datetime:
+        """Updates the feed's publish rate from a successful fetch. Returns the next fetch time."""
+        now = now or datetime.datetime.utcnow()
+        with self._lock:
+            state = self.feeds[url]
+            if state.last_success is not None:
+                elapsed_hours = max((now - state.last_success).total_seconds() / 3600, 1e-3)
+                observed = new_items / elapsed_hours
+                if state.rate_per_hour is None:
+                    state.rate_per_hour = observed
+                else:
+                    state.rate_per_hour = RATE_SMOOTHING * observed + (1 - RATE_SMOOTHING) * state.rate_per_hour
+
+                if state.rate_per_hour > 0:
+                    state.interval_minutes = self._clamp(60 * self.target_new_items / state.rate_per_hour)
+                else:
+                    state.interval_minutes = self._clamp(state.interval_minutes * IDLE_GROWTH)
+            # The first fetch only establishes a baseline: its item count is the feed's backlog
+
+            state.last_fetch = now
+            state.last_success = now
+            state.last_new_items = new_items
+            state.consecutive_errors = 0
+            state.last_error = None
+            state.next_fetch = now + datetime.timedelta(minutes=state.interval_minutes)
+            self._save()
+            return state.next_fetch
+
+    def record_failure(self, url: str, error: str, now: Optional[datetime.datetime] = None) -> datetime.datetime:
+        """Backs the feed off exponentially. Its learned interval is kept for when it recovers."""
+        now = now or datetime.datetime.utcnow()
+        with self._lock:
+            state = self.feeds[url]
+            state.consecutive_errors += 1
+            state.last_fetch = now
+            state.last_error = error
+            backoff = self.min_interval * (2 ** (state.consecutive_errors - 1))
+            backoff *= 1 + random.uniform(-BACKOFF_JITTER, BACKOFF_JITTER)
+            state.next_fetch = now + datetime.timedelta(minutes=min(self.max_interval, backoff))
+            self._save()
+            return state.next_fetch
+
+    def next_fetch(self, url: str, now: Optional[datetime.datetime] = None) -> datetime.datetime:
+        """When the feed is due; feeds never fetched (or overdue after a restart) are due now."""
+        now = now or datetime.datetime.utcnow()
+        with self._lock:
+            state = self.feeds[url]
+            if state.next_fetch is None or state.next_fetch < now:
+                return now
+            return state.next_fetch
+
+    def status(self, now: Optional[datetime.datetime] = None) -> List[Dict]:
+        """Per-feed schedule and freshness lag (time since the last successful fetch)."""
+        now = now or datetime.datetime.utcnow()
+        with self._lock:
+            rows = []
+            for state in self.feeds.values():
+                row = state.to_dict()
+                row["freshness_lag_minutes"] = (
+                    round((now - state.last_success).total_seconds() / 60, 1) if state.last_success else None
+                )
+                rows.append(row)
+            return rows
+
+    def _save(self):
+        if not self.state_file:
+            return
+        try:
+            tmp_path = f"{self.state_file}.tmp"
+            with open(tmp_path, "w") as fh:
+                json.dump([s.to_dict() for s in self.feeds.values()], fh, indent=2)
+            os.replace(tmp_path, self.state_file)
+        except OSError as e:
+            logger.warning(f"Could not save scheduler state: {e}")
+
+    def _load(self):
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file) as fh:
+                for data in json.load(fh):
+                    if data.get("url") in self.feeds:
+                        state = FeedState.from_dict(data)
+                        state.interval_minutes = self._clamp(state.interval_minutes)
+                        self.feeds[data["url"]] = state
+            logger.info(f"Loaded scheduler state for {len(self.feeds)} feeds from {self.state_file}")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable scheduler state {self.state_file}: {e}")
@@ -1,76 +1,230 @@
+import datetime
+import numpy as np
+from typing import Callable, Optional
 from sqlalchemy.orm import Session
 from app.ingestion.fetch_feeds import fetch_all_feeds
-from app.embeddings.embedder_api import embedder  # Use API-based embedder
+from app.ingestion.preprocess import truncate_tokens
+from app.ingestion.dedupe import (
+    SimHashIndex, EmbeddingIndex, simhash, to_signed64, from_signed64, RECENT_WINDOW_HOURS,
+)
+from app.embeddings.backends import get_embedder
 from app.storage.models import Article
+from app.storage.vectors import vector_column, decode_vectors
+from app.storage.changefeed import publish, ARTICLES
+from app.recommender.projection import get_projection
 from app.utils.logger import setup_logger
+from app.utils.config import settings
+from app.utils.timing import StageTimer
 from app.storage.db import SessionLocal
 
 logger = setup_logger("ingestion_service")
 
-def ingest_feeds(feed_urls: list[str]):
+embedder = get_embedder()  # Active embedding model; API-based unless EMBEDDER_BACKEND says otherwise
+
+def _load_recent_index(db: Session):
+    """
+    Indexes articles from the recent window for near-duplicate lookups.
+    Returns (simhash_index, embedding_index, embeddings by cluster id).
+    """
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(hours=RECENT_WINDOW_HOURS)
+    rows = db.query(
+        Article.id, Article.cluster_id, Article.simhash, vector_column(Article.embedding, db)
+    ).filter(
+        Article.published_date >= cutoff
+    ).all()
+    embeddings = decode_vectors([row.embedding for row in rows])
+
+    simhash_index = SimHashIndex()
+    embedding_index = EmbeddingIndex()
+    cluster_embeddings = {}
+    for (article_id, cluster_id, fingerprint, _), embedding in zip(rows, embeddings):
+        cluster = cluster_id or article_id
+        if fingerprint:  # 0 is what text without words used to hash to
+            simhash_index.add(from_signed64(fingerprint), cluster)
+        if not np.isnan(embedding[0]):
+            embedding_index.add(embedding, cluster)
+            cluster_embeddings.setdefault(cluster, embedding)
+    return simhash_index, embedding_index, cluster_embeddings
+
+def _resolve_cluster(cluster):
+    """
+    Follows a cluster reference to a stored article id.
+    References are either an existing article id or a canonical article dict
+    from the current batch (whose id is set once it is saved).
+    """
+    while isinstance(cluster, dict):
+        if cluster.get('cluster') is None:
+            return cluster.get('id')
+        cluster = cluster['cluster']
+    return cluster
+
+def ingest_feeds(feed_urls: list[str], progress: Optional[Callable[[str, dict], None]] = None):
+    """
+    Fetches, embeds and stores new articles from the given feeds.
+    Near-duplicates of recent or same-batch articles join their cluster and
+    reuse its embedding instead of being embedded again.
+    Returns a stats dict with article counts, per-feed fetch errors and
+    seconds spent per stage (fetch, dedupe, near_dupes, embed, db_write).
+    `progress(stage, stats)` is called as each stage starts and periodically
+    while saving.
+    """
     db = SessionLocal()
+    timer = StageTimer()
+    stats = {"status": "ok", "fetched": 0, "new_articles": 0, "near_duplicates": 0, "saved": 0, "skipped": 0,
+             "feed_errors": {}}
+
+    def report(stage: str):
+        if progress is None:
+            return
+        try:
+            progress(stage, stats)
+        except Exception as e:
+            logger.warning(f"Progress callback failed: {e}")
+
     try:
+        report("fetch")
         # 1. Fetch articles
-        raw_articles = fetch_all_feeds(feed_urls)
+        with timer.stage("fetch"):
+            raw_articles = fetch_all_feeds(feed_urls, stats["feed_errors"])
+        stats["fetched"] = len(raw_articles)
         if not raw_articles:
             logger.info("No articles found.")
-            return
+            return stats
 
         # 2. Filter duplicates (check by link)
+        report("dedupe")
         new_articles = []
-        existing_links = {
-            link for (link,) in db.query(Article.link).filter(
-                Article.link.in_([a['link'] for a in raw_articles])
-            ).all()
-        }
-
-        for article in raw_articles:
-            if article['link'] not in existing_links:
-                new_articles.append(article)
-        
+        with timer.stage("dedupe"):
+            existing_links = {
+                link for (link,) in db.query(Article.link).filter(
+                    Article.link.in_([a['link'] for a in raw_articles])
+                ).all()
+            }
+
+            for article in raw_articles:
+                if article['link'] not in existing_links:
+                    existing_links.add(article['link'])  # Same link in several feeds
+                    new_articles.append(article)
+        stats["new_articles"] = len(new_articles)
+
         if not new_articles:
             logger.info("No new articles to ingest.")
-            return
-        
-        logger.info(f"Found {len(new_articles)} new articles. Generating embeddings...")
+            return stats
+
+        # 3. Group near-duplicate stories (same story, different link)
+        report("near_dupes")
+        with timer.stage("near_dupes"):
+            simhash_index, embedding_index, cluster_embeddings = _load_recent_index(db)
+            to_embed = []
+            for article in new_articles:
+                article['simhash'] = simhash(f"{article['title']} {article['content']}")
+                # No words, no fingerprint: only the embedding check can match it
+                match = simhash_index.query(article['simhash']) if article['simhash'] is not None else None
+                if match:
+                    cluster = match[0]
+                    article['cluster'] = cluster
+                    if isinstance(cluster, dict) or cluster_embeddings.get(cluster) is not None:
+                        stats["near_duplicates"] += 1
+                        continue  # Reuses the cluster's embedding
+                elif article['simhash'] is not None:
+                    simhash_index.add(article['simhash'], article)
+                to_embed.append(article)
+
+        logger.info(
+            f"Found {len(new_articles)} new articles ({stats['near_duplicates']} near-duplicates). "
+            f"Generating {len(to_embed)} embeddings..."
+        )
 
-        # 3. Generate embeddings
-        contents = [f"{a['title']} {a['content']}" for a in new_articles]
-        embeddings = embedder.embed(contents)
+        # 4. Generate embeddings
+        # Only send what the model reads; it would silently drop the rest
+        contents = [truncate_tokens(f"{a['title']} {a['content']}") for a in to_embed]
+        embeddings = []
+        report("embed")
+        if contents:
+            with timer.stage("embed"):
+                embeddings = embedder.embed(contents)
 
-        # Validate embeddings were generated
-        if not embeddings or len(embeddings) != len(new_articles):
-            logger.error(f"Embedding generation failed: got {len(embeddings) if embeddings else 0} embeddings for {len(new_articles)} articles")
-            raise Exception("Failed to generate embeddings - check HF_API_TOKEN")
+            # Validate embeddings were generated
+            if not embeddings or len(embeddings) != len(to_embed):
+                logger.error(f"Embedding generation failed: got {len(embeddings) if embeddings else 0} embeddings for {len(to_embed)} articles")
+                raise Exception(f"Failed to generate embeddings - check the {settings.EMBEDDER_BACKEND} embedder")
 
-        # 4. Save to DB - insert one by one to handle duplicates gracefully
+        with timer.stage("near_dupes"):
+            # Rewrites SimHash missed: match new stories against recent embeddings
+            for article, embedding in zip(to_embed, embeddings):
+                article['embedding'] = embedding
+                if article.get('cluster') is None:
+                    match = embedding_index.query(embedding)
+                    if match:
+                        article['cluster'] = match[0]
+                    else:
+                        embedding_index.add(embedding, article)
+
+            # Copies take the embedding of the story they duplicate
+            for article in new_articles:
+                if 'embedding' not in article:
+                    cluster = article['cluster']
+                    article['embedding'] = cluster['embedding'] if isinstance(cluster, dict) else cluster_embeddings[cluster]
+
+        # 5. Save to DB - insert one by one to handle duplicates gracefully
         saved_count = 0
         skipped_count = 0
-        
-        for i, article_data in enumerate(new_articles):
+        report("db_write")
+
+        projection = get_projection()  # Reduced-dimension copy for projected retrieval, if fitted
+        with timer.stage("db_write"):
+            for n, article_data in enumerate(new_articles, start=1):
+                try:
+                    article = Article(
+                        title=article_data['title'],
+                        content=article_data['content'],
+                        link=article_data['link'],
+                        source=article_data['source'],
+                        published_date=article_data['published_date'],
+                        embedding=article_data['embedding'],
+                        embedding_proj=projection.project(article_data['embedding']).tolist() if projection else None,
+                        projection_version=projection.version if projection else None,
+                        simhash=to_signed64(article_data['simhash']) if article_data['simhash'] is not None else None,
+                        cluster_id=_resolve_cluster(article_data.get('cluster')),
+                    )
+                    db.add(article)
+                    db.flush()
+                    if article.cluster_id is None:
+                        article.cluster_id = article.id  # First article of a new story
+                    db.commit()
+                    article_data['id'] = article.id
+                    saved_count += 1
+                except Exception as e:
+                    db.rollback()
+                    if "duplicate key" in str(e).lower() or "unique" in str(e).lower():
+                        skipped_count += 1
+                    else:
+                        logger.error(f"Error saving article: {e}")
+                if n % 25 == 0:
+                    stats["saved"] = saved_count
+                    stats["skipped"] = skipped_count
+                    report("db_write")
+
+        stats["saved"] = saved_count
+        stats["skipped"] = skipped_count
+        saved_ids = [a['id'] for a in new_articles if 'id' in a]
+        if saved_ids:
+            # API workers refresh the cold-start feed and search matrix from this
             try:
-                article = Article(
-                    title=article_data['title'],
-                    content=article_data['content'],
-                    link=article_data['link'],
-                    source=article_data['source'],
-                    published_date=article_data['published_date'],
-                    embedding=embeddings[i]
-                )
-                db.add(article)
+                publish(db, ARTICLES, saved_ids, epoch=max(saved_ids))
                 db.commit()
-                saved_count += 1
             except Exception as e:
                 db.rollback()
-                if "duplicate key" in str(e).lower() or "unique" in str(e).lower():
-                    skipped_count += 1
-                else:
-                    logger.error(f"Error saving article: {e}")
-        
+                logger.warning(f"Could not announce {len(saved_ids)} new articles: {e}")
         logger.info(f"Successfully saved {saved_count} articles with embeddings. Skipped {skipped_count} duplicates.")
+        return stats
 
     except Exception as e:
         logger.error(f"Ingestion failed: {e}")
         db.rollback()
+        stats["status"] = "error"
+        stats["error"] = str(e)
+        return stats
     finally:
+        stats["timings"] = timer.summary()
         db.close()
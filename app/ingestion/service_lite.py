@@ -5,6 +5,7 @@ Articles are stored without embeddings - recommendations fall back to recency-ba
 """
 from app.ingestion.fetch_feeds import fetch_all_feeds
 from app.storage.models import Article
+from app.storage.changefeed import publish, ARTICLES
 from app.utils.logger import setup_logger
 from app.storage.db import SessionLocal
 
@@ -54,6 +55,9 @@ def ingest_feeds_lite(feed_urls: list[str]):
             ))
         
         db.add_all(db_articles)
+        db.flush()
+        saved_ids = [a.id for a in db_articles]
+        publish(db, ARTICLES, saved_ids, epoch=max(saved_ids))
         db.commit()
         logger.info(f"Successfully saved {len(db_articles)} articles (no embeddings).")
         return {"status": "ok", "new_articles": len(db_articles)}
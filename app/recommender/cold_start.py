@@ -0,0 +1,245 @@
+"""
+Shared cold-start feed.
+
+Users without a profile (new and logged-out traffic) all get the same
+"fresh + popular" ranking, so it is computed once per process instead of per
+request: the newest articles, scored by recency and recent engagement,
+folded to one article per story and reordered for source variety. A request
+then only filters out what that user has already seen.
+
+The list is rebuilt from the database when it is older than
+COLD_START_TTL_SECONDS or after `invalidate()` (on RESYNC). In between, the
+change feed's new articles and reads of pooled articles are merged into the
+pool and its popularity counts, and the pool is re-ranked in memory on the
+next request, without re-reading the pool or recounting interactions.
+"""
+import math
+import datetime
+import threading
+from collections import deque
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.storage.models import Article, Interaction
+from app.storage.changefeed import change_feed, Event, ARTICLES, INTERACTIONS, RESYNC
+from app.utils.logger import setup_logger
+
+logger = setup_logger("cold_start")
+
+COLD_START_TTL_SECONDS = 300
+POOL_SIZE = 300            # Newest articles considered for the feed
+POPULARITY_HOURS = 48      # Interactions counted towards popularity
+POPULARITY_WEIGHT = 0.5    # Boost per log-unit of recent interactions
+SOURCE_PENALTY = 0.15      # Same penalty the ranker's MMR step applies per repeated source
+DIVERSITY_WINDOW = 10      # Source repeats are counted within this many preceding items
+
+
+class FeedItem(NamedTuple):
+    """The fields a recommendation response needs, without an ORM instance per request."""
+    id: int
+    title: str
+    link: str
+    source: Optional[str]
+    published_date: datetime.datetime
+    cluster_id: Optional[int]
+
+
+# Query columns matching FeedItem's fields
+FEED_ITEM_COLUMNS = (Article.id, Article.title, Article.link, Article.source, Article.published_date, Article.cluster_id)
+
+
+def load_feed_items(db: Session, ids: List[int]) -> List[FeedItem]:
+    """Loads FeedItems for `ids` in one query, in the order given (missing ids are dropped)."""
+    if not ids:
+        return []
+    rows = db.query(*FEED_ITEM_COLUMNS).filter(Article.id.in_(ids)).all()
+    items = {item.id: item for item in (FeedItem(*row) for row in rows)}
+    return [items[i] for i in ids if i in items]
+
+
+def rank_feed(items: List[FeedItem], popularity: Dict[int, float], now: datetime.datetime) -> List[FeedItem]:
+    """
+    Orders `items` (newest first) into the shared feed.
+    Each story keeps its newest article and the engagement of all its copies;
+    the score is the ranker's recency decay boosted by popularity. Items are
+    then picked greedily with a penalty for sources seen in the last
+    DIVERSITY_WINDOW picks, so no page is dominated by one publisher.
+    """
+    stories = {}
+    for item in items:
+        key = item.cluster_id or item.id
+        if key not in stories:
+            stories[key] = [item, 0.0]
+        stories[key][1] += popularity.get(item.id, 0.0)
+
+    scored = []
+    for item, engagement in stories.values():
+        age_hours = max(0.0, (now - item.published_date).total_seconds() / 3600) if item.published_date else 1e6
+        recency = 1.0 / (1.0 + age_hours / 24.0)
+        scored.append((recency * (1 + POPULARITY_WEIGHT * math.log1p(max(0.0, engagement))), item))
+    scored.sort(key=lambda pair: pair[0], reverse=True)
+
+    ranked = []
+    recent_sources = deque(maxlen=DIVERSITY_WINDOW)
+    while scored:
+        best_idx, best_score = 0, float("-inf")
+        for i, (score, item) in enumerate(scored):
+            adjusted = score - SOURCE_PENALTY * recent_sources.count((item.source or "").lower())
+            if adjusted > best_score:
+                best_idx, best_score = i, adjusted
+            if score <= best_score:
+                break  # Sorted by score: nothing further down can win
+        _, item = scored.pop(best_idx)
+        ranked.append(item)
+        recent_sources.append((item.source or "").lower())
+    return ranked
+
+
+class ColdStartFeed:
+    """Process-wide cache of the ranked cold-start list."""
+
+    def __init__(self, ttl_seconds: float = COLD_START_TTL_SECONDS, pool_size: int = POOL_SIZE):
+        self.ttl = datetime.timedelta(seconds=ttl_seconds)
+        self.pool_size = pool_size
+        self._items: Optional[List[FeedItem]] = None
+        self._pool: List[FeedItem] = []                 # Newest articles, newest first
+        self._pool_ids: frozenset = frozenset()
+        self._popularity: Dict[int, float] = {}
+        self._built_at: Optional[datetime.datetime] = None
+        self._stale = True
+        self._pool_full = False
+        self._new_ids: Set[int] = set()                 # Announced articles not merged yet
+        self._changed = False                           # Popularity moved since the last ranking
+        self._changes = threading.Lock()
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        """True once a list has been built (it may be stale)."""
+        return self._items is not None
+
+    def invalidate(self):
+        """Marks the list for rebuilding on the next request."""
+        self._stale = True
+
+    def on_articles(self, event: Event):
+        """Queues announced articles for the next request to merge in (RESYNC rebuilds instead)."""
+        if event.kind == RESYNC:
+            self.invalidate()
+            return
+        with self._changes:
+            self._new_ids.update(event.ids)
+
+    def on_interactions(self, event: Event):
+        """Counts a read of each pooled article towards its popularity."""
+        with self._changes:
+            pooled = [article_id for article_id in event.ids if article_id in self._pool_ids]
+            for article_id in pooled:
+                self._popularity[article_id] = self._popularity.get(article_id, 0.0) + 1.0
+            self._changed = self._changed or bool(pooled)
+
+    def _needs_refresh(self, now: datetime.datetime) -> bool:
+        return self._stale or self._built_at is None or now - self._built_at > self.ttl
+
+    def _has_changes(self) -> bool:
+        return bool(self._new_ids) or self._changed
+
+    def _publish(self, pool: List[FeedItem], popularity: Dict[int, float], now: datetime.datetime):
+        self._items = rank_feed(pool, popularity, now)
+        self._pool = pool
+        self._pool_ids = frozenset(item.id for item in pool)
+        self._pool_full = len(pool) >= self.pool_size
+
+    def refresh(self, db: Session, now: Optional[datetime.datetime] = None):
+        """Rebuilds the list from the newest POOL_SIZE articles and recent interactions."""
+        now = now or datetime.datetime.utcnow()
+        with self._changes:
+            # The query below sees these; later events are merged on top
+            self._new_ids.clear()
+            self._changed = False
+        rows = db.query(*FEED_ITEM_COLUMNS).order_by(Article.published_date.desc()).limit(self.pool_size).all()
+        items = [FeedItem(*row) for row in rows]
+
+        popularity = {}
+        if items:
+            since = now - datetime.timedelta(hours=POPULARITY_HOURS)
+            popularity = {
+                article_id: float(count) for article_id, count in db.query(
+                    Interaction.article_id, func.count(Interaction.id)
+                ).filter(
+                    Interaction.article_id.in_([item.id for item in items]),
+                    Interaction.timestamp >= since,
+                    Interaction.interaction_type != "dislike",
+                ).group_by(Interaction.article_id).all()
+            }
+
+        with self._changes:
+            self._popularity = popularity
+            self._publish(items, popularity, now)
+        self._built_at = now
+        self._stale = False
+        logger.info(f"Rebuilt cold-start feed: {len(self._items)} stories from {len(items)} articles")
+
+    def merge(self, db: Session, now: Optional[datetime.datetime] = None):
+        """
+        Folds announced changes into the list: new articles join the pool (one
+        query by id, the oldest drop out) and counted reads move popularity,
+        then the pool is re-ranked in memory. The TTL rebuild still recounts
+        popularity from the database, which also ages reads out of the window.
+        """
+        now = now or datetime.datetime.utcnow()
+        with self._changes:
+            new_ids = self._new_ids - self._pool_ids
+            self._new_ids = set()
+            self._changed = False
+        pool = self._pool
+        if new_ids:
+            pool = sorted(
+                pool + load_feed_items(db, sorted(new_ids)),
+                key=lambda item: item.published_date or datetime.datetime.min, reverse=True,
+            )[:self.pool_size]
+        with self._changes:
+            self._publish(pool, self._popularity, now)
+
+    def get(self, db: Session, excluded_ids: Iterable[int] = (), limit: int = 10,
+            fallback: Optional[Callable[[], List]] = None, refresh: bool = True) -> List:
+        """
+        Returns the first `limit` feed items the user hasn't seen.
+        Stories whose cluster the user already read are skipped too. If the
+        user has seen most of the feed, `fallback()` is used instead.
+        With `refresh=False` the current list is served as is, without touching the DB.
+        """
+        now = datetime.datetime.utcnow()
+        if refresh and (self._needs_refresh(now) or self._has_changes()):
+            # One thread updates; the others keep serving the previous list if there is one
+            if self._lock.acquire(blocking=self._items is None):
+                try:
+                    if self._needs_refresh(now):
+                        self.refresh(db, now)
+                    elif self._has_changes():
+                        self.merge(db, now)
+                except Exception:
+                    if self._items is None:
+                        raise
+                    logger.exception("Cold-start feed update failed; serving the previous list")
+                finally:
+                    self._lock.release()
+
+        excluded = set(excluded_ids)
+        results = []
+        for item in self._items or []:
+            if item.id in excluded or (item.cluster_id or item.id) in excluded:
+                continue
+            results.append(item)
+            if len(results) == limit:
+                return results
+
+        if fallback is not None and self._pool_full:
+            # The feed ran dry for this user, but older articles exist
+            return fallback()
+        return results
+
+
+cold_start_feed = ColdStartFeed()
+change_feed.subscribe(ARTICLES, cold_start_feed.on_articles)
+change_feed.subscribe(INTERACTIONS, cold_start_feed.on_interactions)
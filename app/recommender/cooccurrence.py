@@ -0,0 +1,284 @@
+"""
+Item-to-item co-occurrence ("readers of X also read Y").
+
+Two articles co-occur when the same user reads both within CO_READ_HOURS.
+Counting that with SQL is a self-join of `interactions` on user_id, so
+`CooccurrenceIndex` keeps the pair weights in memory instead: a scipy.sparse
+matrix with one row and one column per article, fed with new interactions in
+id order.
+
+- Each new read is paired with the user's last USER_HISTORY reads, which are
+  kept in memory, so an update costs the new events and not the history.
+- A batch's pairs are summed into a small CSR delta and added to `pending`.
+  `pending` is merged into the main matrix once it holds MERGE_FRACTION of
+  the main matrix's entries, so merging costs amortized O(new pairs).
+- Only the rows a batch touched get their top NEIGHBOURS recomputed, so a
+  list can lag behind read counts of articles that changed since. Lookups
+  read an article id -> neighbours dict.
+- New interactions are read by a background thread (`start()`, every
+  REFRESH_SECONDS; its first pass bootstraps an index warmup didn't load),
+  never on a request. Lookups and additions share one lock; a lookup costs
+  USER_HISTORY x NEIGHBOURS steps, so it never waits long.
+
+Time decay uses forward decay. A pair read at time t is stored with weight
+exp(rate * (t - anchor)), so stored weights never have to be rewritten as time
+passes: at any moment they all share the factor exp(-rate * (now - anchor)).
+Merges move the anchor up to the newest read and drop pairs that have
+decayed below PRUNE_WEIGHT.
+
+A neighbour's score is the decayed co-read weight divided by the geometric
+mean of the two articles' decayed read counts, plus SHRINKAGE. This is a
+cosine in [0, 1). SHRINKAGE keeps one chance co-read between two rarely read
+articles from scoring like a strong link.
+"""
+import math
+import time
+import datetime
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from scipy import sparse
+from sqlalchemy.orm import Session
+from app.storage.models import Interaction
+from app.utils.logger import setup_logger
+
+logger = setup_logger("cooccurrence")
+
+NEIGHBOURS = 20               # Neighbours kept per article
+HALF_LIFE_DAYS = 7.0          # Half-life of a co-read's weight
+CO_READ_HOURS = 24            # Two reads by one user this close together co-occur
+USER_HISTORY = 30             # Recent reads kept per user (pairing partners and ranking seeds)
+BOOTSTRAP_DAYS = 30           # History read on the first update
+BATCH_SIZE = 5000             # Interactions read per query
+MERGE_FRACTION = 0.1          # pending is merged once it holds this share of the main matrix's entries
+MERGE_MIN_ENTRIES = 10000     # ... or this many, whichever is larger
+PRUNE_WEIGHT = 0.05           # Pairs decayed below this weight are dropped at a merge
+SHRINKAGE = 1.0               # Added to the score's denominator
+REFRESH_SECONDS = 30          # How often the background thread reads new interactions
+IGNORED_TYPES = ("dislike",)  # Not a read
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def _seconds(timestamp: datetime.datetime) -> float:
+    """A naive UTC datetime as epoch seconds."""
+    return (timestamp - _EPOCH).total_seconds()
+
+
+class CooccurrenceIndex:
+    def __init__(self, neighbours: int = NEIGHBOURS, half_life_days: float = HALF_LIFE_DAYS,
+                 co_read_hours: float = CO_READ_HOURS, user_history: int = USER_HISTORY):
+        self.neighbours_per_article = neighbours
+        self.rate = math.log(2) / (half_life_days * 86400)  # Per second
+        self.window = co_read_hours * 3600
+        self.user_history = user_history
+        self.watermark = 0             # Id of the last interaction read
+        self.loaded_at: Optional[float] = None
+        self._rows: Dict[int, int] = {}
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._reads = np.zeros(0, dtype=np.float64)   # Forward-decayed read count per row
+        self._matrix = sparse.csr_matrix((0, 0), dtype=np.float64)
+        self._pending = sparse.csr_matrix((0, 0), dtype=np.float64)
+        self._anchor: Optional[float] = None
+        self._latest = 0.0             # Newest read seen (epoch seconds)
+        self._history: Dict[int, "OrderedDict[int, float]"] = {}
+        self._neighbours: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._lock = threading.Lock()
+        self._updating = threading.Lock()  # One update at a time, so none reads past another's watermark
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def pairs(self) -> int:
+        """Stored (article, article) entries, both directions counted."""
+        return self._matrix.nnz + self._pending.nnz
+
+    def _row(self, article_id: int) -> int:
+        row = self._rows.get(article_id)
+        if row is not None:
+            return row
+        row = len(self._rows)
+        if row == len(self._ids):
+            # Grow by doubling so resizing costs amortized O(1) per article
+            capacity = max(1024, 2 * len(self._ids))
+            self._ids = np.resize(self._ids, capacity)
+            self._reads = np.concatenate([self._reads, np.zeros(capacity - len(self._reads))])
+            self._matrix.resize((capacity, capacity))
+            self._pending.resize((capacity, capacity))
+        self._rows[article_id] = row
+        self._ids[row] = article_id
+        self._reads[row] = 0.0
+        return row
+
+    def add(self, events: Iterable[Tuple[int, int, int, str, datetime.datetime]]) -> int:
+        """
+        Adds interactions, as (id, user_id, article_id, interaction_type,
+        timestamp) in id order. A user's repeated reads of one article count
+        once. Returns how many co-read pairs the events formed.
+        """
+        rows, cols, weights = [], [], []
+        with self._lock:
+            for event_id, user_id, article_id, interaction_type, timestamp in events:
+                self.watermark = max(self.watermark, event_id)
+                if interaction_type in IGNORED_TYPES or article_id is None or timestamp is None:
+                    continue
+                history = self._history.setdefault(user_id, OrderedDict())
+                if article_id in history:
+                    continue
+                read_at = _seconds(timestamp)
+                if self._anchor is None:
+                    self._anchor = read_at
+                self._latest = max(self._latest, read_at)
+                row = self._row(article_id)
+                self._reads[row] += math.exp(self.rate * (read_at - self._anchor))
+                for other, other_at in reversed(history.items()):
+                    if read_at - other_at > self.window:
+                        break  # Newest first: the rest are older still
+                    if other_at - read_at > self.window:
+                        continue
+                    weight = math.exp(self.rate * (max(read_at, other_at) - self._anchor))
+                    other_row = self._rows[other]
+                    rows += (row, other_row)
+                    cols += (other_row, row)
+                    weights += (weight, weight)
+                history[article_id] = read_at
+                if len(history) > self.user_history:
+                    history.popitem(last=False)
+            if rows:
+                self._apply(np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64),
+                            np.array(weights, dtype=np.float64))
+        return len(rows) // 2
+
+    def _apply(self, rows: np.ndarray, cols: np.ndarray, weights: np.ndarray):
+        capacity = len(self._ids)
+        delta = sparse.coo_matrix((weights, (rows, cols)), shape=(capacity, capacity)).tocsr()  # Sums repeats
+        self._pending = self._pending + delta
+        if self._pending.nnz > max(MERGE_MIN_ENTRIES, MERGE_FRACTION * self._matrix.nnz):
+            self._merge()
+        self._update_neighbours(np.unique(rows))
+
+    def _merge(self):
+        """Folds pending into the main matrix, moves the decay anchor to the newest read and prunes."""
+        shift = math.exp(-self.rate * (self._latest - self._anchor))
+        matrix = self._matrix + self._pending
+        matrix.data *= shift
+        matrix.data[matrix.data < PRUNE_WEIGHT] = 0.0
+        matrix.eliminate_zeros()
+        self._reads *= shift
+        self._matrix = matrix
+        self._pending = sparse.csr_matrix(matrix.shape, dtype=np.float64)
+        self._anchor = self._latest
+
+    def _update_neighbours(self, rows: np.ndarray):
+        """Recomputes the top neighbours of `rows` (O(entries in those rows))."""
+        block = (self._matrix[rows] + self._pending[rows]).tocsr()
+        decay = math.exp(-self.rate * (self._latest - self._anchor))
+        reads = self._reads * decay
+        k = self.neighbours_per_article
+        for i, row in enumerate(rows):
+            start, end = block.indptr[i], block.indptr[i + 1]
+            cols, values = block.indices[start:end], block.data[start:end] * decay
+            scores = values / (np.sqrt(reads[row] * reads[cols]) + SHRINKAGE)
+            if len(scores) > k:
+                top = np.argpartition(-scores, k)[:k]
+                cols, scores = cols[top], scores[top]
+            order = np.argsort(-scores, kind="stable")
+            self._neighbours[int(self._ids[row])] = (self._ids[cols[order]], scores[order])
+
+    def neighbours(self, article_id: int) -> List[Tuple[int, float]]:
+        """The article's top neighbours as (article_id, score), strongest first."""
+        with self._lock:
+            entry = self._neighbours.get(article_id)
+        if entry is None:
+            return []
+        ids, scores = entry
+        return list(zip(ids.tolist(), scores.tolist()))
+
+    def related(self, user_id: int, limit: int, excluded_ids: Iterable[int] = (),
+                now: Optional[datetime.datetime] = None) -> Dict[int, float]:
+        """
+        Up to `limit` articles that co-occur with the user's recent reads, as
+        article_id -> affinity in [0, 1). Each read counts with its own time
+        decay, and links from several reads combine as a noisy-or. The cost
+        depends only on USER_HISTORY and NEIGHBOURS.
+        """
+        now_s = _seconds(now or datetime.datetime.utcnow())
+        excluded = set(excluded_ids)
+        with self._lock:
+            history = dict(self._history.get(user_id, ()))
+            seeds = [(read_at, self._neighbours.get(article_id)) for article_id, read_at in history.items()]
+        remaining: Dict[int, float] = {}  # article_id -> product of (1 - link)
+        for read_at, entry in seeds:
+            if entry is None:
+                continue
+            seed = math.exp(-self.rate * max(0.0, now_s - read_at))
+            ids, scores = entry
+            for neighbour, score in zip(ids.tolist(), scores.tolist()):
+                if neighbour in excluded or neighbour in history:
+                    continue
+                remaining[neighbour] = remaining.get(neighbour, 1.0) * (1.0 - seed * score)
+        best = sorted(remaining.items(), key=lambda pair: pair[1])[:limit]
+        return {article_id: 1.0 - rest for article_id, rest in best}
+
+    def update(self, db: Session, batch_size: int = BATCH_SIZE, now: Optional[datetime.datetime] = None) -> int:
+        """
+        Reads the interactions above the watermark from the last BOOTSTRAP_DAYS
+        in id order and adds them. Returns how many were read. An interaction
+        committed after a higher id was already read is missed; the index can
+        live without the odd pair.
+        """
+        since = (now or datetime.datetime.utcnow()) - datetime.timedelta(days=BOOTSTRAP_DAYS)
+        read = 0
+        with self._updating:
+            while True:
+                events = db.query(
+                    Interaction.id, Interaction.user_id, Interaction.article_id, Interaction.timestamp
+                ).filter(
+                    Interaction.id > self.watermark,
+                    Interaction.timestamp >= since,
+                    Interaction.interaction_type.notin_(IGNORED_TYPES),
+                ).order_by(Interaction.id).limit(batch_size).all()
+                if not events:
+                    break
+                self.add((e.id, e.user_id, e.article_id, "read", e.timestamp) for e in events)
+                read += len(events)
+                if len(events) < batch_size:
+                    break
+        self.loaded_at = time.monotonic()
+        if read:
+            logger.info(f"Co-occurrence index: {read} new interactions, {len(self)} articles, {self.pairs} pairs")
+        return read
+
+    def start(self, session_factory: Callable[[], Session], interval: float = REFRESH_SECONDS):
+        """Starts the thread that calls `update` every `interval` seconds with a session of its own."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(session_factory, interval), name="cooccurrence", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self, session_factory: Callable[[], Session], interval: float):
+        while not self._stop.is_set():
+            db = session_factory()
+            try:
+                self.update(db)
+            except Exception as e:
+                logger.error(f"Co-occurrence update failed: {e}")
+            finally:
+                db.close()
+            self._stop.wait(interval)
+
+
+cooccurrence_index = CooccurrenceIndex()
@@ -0,0 +1,359 @@
+"""
+Offline replay evaluation of candidate retrieval.
+
+Faster retrieval (time windows, quantization, ANN indexes, projections)
+trades accuracy for speed. `replay` measures that trade-off on real history:
+it walks through each sampled user's interactions in time order and, at a
+few cutoff points, rebuilds the profile the user had then (same weights and
+decay as build_user_embedding), ranks the articles that existed at that time
+with the ranker's scoring and MMR steps, and compares two retrieval paths:
+
+- exact: brute-force cosine search over every eligible article
+- the engine under test, from ENGINES (register new ones with @register_engine)
+
+For each cutoff it records the candidate overlap with exact search,
+recall@k of the final list against the exact final list, their Jaccard
+overlap, nDCG@k of both lists against the articles the user actually
+clicked afterwards, and the search latency of both. Trending injection is
+left out: it doesn't depend on retrieval.
+"""
+import time
+import datetime
+from typing import Dict, List, NamedTuple, Optional
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.storage.models import Article, Interaction, InteractionArchive
+from app.storage.vectors import vector_column, decode_vectors
+from app.storage.archive import archived_embeddings
+from app.recommender.ranker import INTERACTION_WEIGHTS, DECAY_RATE, score_candidates, mmr_select
+from app.recommender.projection import Projection, fit_svd, random_projection, DEFAULT_DIMS
+from app.recommender.exact_search import ExactScorer
+from app.utils.config import settings
+from app.utils.logger import setup_logger
+
+logger = setup_logger("evaluation")
+
+MIN_HISTORY = 3        # Interactions a user needs before the first cutoff
+CUTOFFS_PER_USER = 3   # Evaluation points per user, spread over their history
+HORIZON_DAYS = 7       # Clicks within this long after a cutoff count as relevant
+
+
+class Corpus:
+    """Every article with an embedding, as parallel arrays (row i = one article)."""
+
+    def __init__(self, ids, embeddings, published, sources, clusters):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.embeddings = np.asarray(embeddings, dtype=np.float32)
+        self.published = np.asarray(published, dtype="datetime64[s]")
+        self.sources = list(sources)
+        self.clusters = np.asarray(clusters, dtype=np.int64)
+        norms = np.linalg.norm(self.embeddings, axis=1, keepdims=True)
+        self.unit = self.embeddings / np.maximum(norms, 1e-9)
+        self.rows = {int(article_id): i for i, article_id in enumerate(self.ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, db: Session) -> "Corpus":
+        rows = db.query(
+            Article.id, vector_column(Article.embedding, db), Article.published_date, Article.source, Article.cluster_id
+        ).order_by(Article.id).all()
+        embeddings = decode_vectors([row.embedding for row in rows])
+        missing = [row.id for row, vec in zip(rows, embeddings) if np.isnan(vec[0])]
+        if missing:
+            positions = {row.id: i for i, row in enumerate(rows)}
+            for article_id, vec in archived_embeddings(db, missing).items():
+                embeddings[positions[article_id]] = vec
+
+        keep = [i for i in range(len(rows)) if not np.isnan(embeddings[i, 0]) and rows[i].published_date is not None]
+        return cls(
+            [rows[i].id for i in keep],
+            embeddings[keep] if keep else np.empty((0, embeddings.shape[1]), dtype=np.float32),
+            [rows[i].published_date for i in keep],
+            [rows[i].source for i in keep],
+            [rows[i].cluster_id or rows[i].id for i in keep],
+        )
+
+
+ENGINES: Dict[str, type] = {}
+
+
+def register_engine(cls):
+    """Class decorator: makes an engine available to `replay` and the CLI under `cls.name`."""
+    ENGINES[cls.name] = cls
+    return cls
+
+
+@register_engine
+class ExactEngine:
+    """Brute-force cosine search over every eligible article: the reference."""
+    name = "exact"
+
+    def __init__(self, corpus: Corpus, db: Optional[Session] = None, **options):
+        self.corpus = corpus
+
+    def _top(self, sims: np.ndarray, eligible: np.ndarray, n: int) -> np.ndarray:
+        sims = np.where(eligible, sims, -np.inf)
+        n = min(n, int(eligible.sum()))
+        if n == 0:
+            return np.empty(0, dtype=np.intp)
+        top = np.argpartition(-sims, n - 1)[:n]
+        return top[np.argsort(-sims[top], kind="stable")]
+
+    def search(self, user_vec: np.ndarray, eligible: np.ndarray, now: datetime.datetime, n: int,
+               limit: int) -> np.ndarray:
+        """Corpus rows of the `n` eligible articles closest to `user_vec`, best first."""
+        return self._top(self.corpus.unit @ user_vec, eligible, n)
+
+
+@register_engine
+class WindowEngine(ExactEngine):
+    """The production path: only the last `days` days, widened to everything if that finds fewer than `limit`."""
+    name = "window"
+
+    def __init__(self, corpus: Corpus, db: Optional[Session] = None, days: float = None, **options):
+        super().__init__(corpus)
+        self.days = float(days) if days is not None else float(settings.CANDIDATE_WINDOW_DAYS)
+
+    def search(self, user_vec, eligible, now, n, limit):
+        window_start = np.datetime64(now - datetime.timedelta(days=self.days), "s")
+        in_window = eligible & (self.corpus.published >= window_start)
+        if in_window.sum() >= limit:
+            return self._top(self.corpus.unit @ user_vec, in_window, n)
+        return super().search(user_vec, eligible, now, n, limit)
+
+
+@register_engine
+class Int8Engine(ExactEngine):
+    """Scalar-quantized search: each dimension scaled to int8, scored with integer dot products."""
+    name = "int8"
+
+    def __init__(self, corpus: Corpus, db: Optional[Session] = None, **options):
+        super().__init__(corpus)
+        self.scale = np.maximum(np.abs(corpus.unit).max(axis=0), 1e-9) / 127.0
+        self.codes = np.round(corpus.unit / self.scale).astype(np.int8)
+
+    def search(self, user_vec, eligible, now, n, limit):
+        query = np.round(user_vec * self.scale * 127.0 / np.abs(user_vec * self.scale).max()).astype(np.int32)
+        return self._top((self.codes @ query).astype(np.float32), eligible, n)
+
+
+@register_engine
+class ProjectionEngine(ExactEngine):
+    """
+    Search in a reduced space (app/recommender/projection.py): the saved model
+    with --option path=..., else one fitted on this corpus (method=svd|random, dims=N).
+    """
+    name = "projection"
+
+    def __init__(self, corpus: Corpus, db: Optional[Session] = None, path: str = None, method: str = "svd",
+                 dims: int = DEFAULT_DIMS, **options):
+        super().__init__(corpus)
+        if path:
+            self.projection = Projection.load(path)
+        elif method == "random":
+            self.projection = random_projection(int(dims))
+        else:
+            self.projection = fit_svd(corpus.unit, int(dims))
+        projected = self.projection.project(corpus.unit)
+        self.projected = projected / np.maximum(np.linalg.norm(projected, axis=1, keepdims=True), 1e-9)
+
+    def search(self, user_vec, eligible, now, n, limit):
+        query = self.projection.project(user_vec)
+        return self._top(self.projected @ (query / max(np.linalg.norm(query), 1e-9)), eligible, n)
+
+
+@register_engine
+class ParallelEngine:
+    """
+    The shared-memory multi-process scorer (app/recommender/exact_search.py);
+    should match `exact` exactly. --option processes=N sets the pool size.
+    """
+    name = "parallel"
+
+    def __init__(self, corpus: Corpus, db: Optional[Session] = None, processes: int = 2, **options):
+        self.corpus = corpus
+        self.scorer = ExactScorer.from_arrays(corpus.ids, corpus.embeddings, corpus.published, int(processes))
+
+    def search(self, user_vec, eligible, now, n, limit):
+        # The scorer filters on publish time; the seen articles go in as exclusions
+        published = self.corpus.published <= np.datetime64(now, "s")
+        excluded = self.corpus.ids[published & ~eligible]
+        hits = self.scorer.search(user_vec, n, excluded, until=now)
+        return np.array([self.corpus.rows[article_id] for article_id, _ in hits], dtype=np.intp)
+
+    def close(self):
+        self.scorer.close()
+
+
+@register_engine
+class PgvectorEngine:
+    """
+    The database's own ORDER BY embedding <=> query, so index settings can be
+    compared with data, e.g. --option ivfflat.probes=10 or hnsw.ef_search=40.
+    """
+    name = "pgvector"
+
+    def __init__(self, corpus: Corpus, db: Optional[Session] = None, **options):
+        if db is None or db.get_bind().dialect.name != "postgresql":
+            raise ValueError("The pgvector engine needs a PostgreSQL session")
+        self.corpus = corpus
+        self.db = db
+        self.settings = {key: value for key, value in options.items() if key.startswith(("ivfflat.", "hnsw."))}
+
+    def search(self, user_vec, eligible, now, n, limit):
+        for key, value in self.settings.items():
+            self.db.execute(text(f"SET LOCAL {key} = {int(value)}"))
+        # The index can't see `eligible`; over-fetch by what it excludes and filter afterwards
+        published = self.corpus.published <= np.datetime64(now, "s")
+        extra = int((published & ~eligible).sum())
+        ids = [article_id for (article_id,) in self.db.query(Article.id).filter(
+            Article.published_date <= now
+        ).order_by(Article.embedding.cosine_distance(user_vec.tolist())).limit(n + extra).all()]
+        self.db.rollback()  # Ends the transaction the SET LOCALs belong to
+        rows = np.array([self.corpus.rows[i] for i in ids if i in self.corpus.rows], dtype=np.intp)
+        return rows[eligible[rows]][:n] if len(rows) else rows
+
+
+class Cutoff(NamedTuple):
+    """One evaluation point: what the user had done before `at`, and what they clicked after."""
+    user_id: int
+    at: datetime.datetime
+    history: List[tuple]     # (article_id, interaction_type, timestamp)
+    clicked: List[int]       # Articles clicked within the horizon after `at`
+
+
+def load_cutoffs(db: Session, max_users: Optional[int] = None, cutoffs_per_user: int = CUTOFFS_PER_USER,
+                 min_history: int = MIN_HISTORY, horizon_days: float = HORIZON_DAYS, seed: int = 0) -> List[Cutoff]:
+    """Evaluation points for (a sample of) users with enough history, in time order."""
+    columns = lambda model: (model.user_id, model.article_id, model.interaction_type, model.timestamp)
+    events = db.query(*columns(Interaction)).all() + db.query(*columns(InteractionArchive)).all()
+    by_user: Dict[int, List[tuple]] = {}
+    for user_id, article_id, interaction_type, timestamp in events:
+        if user_id is not None and timestamp is not None:
+            by_user.setdefault(user_id, []).append((article_id, interaction_type, timestamp))
+
+    users = sorted(u for u, history in by_user.items() if len(history) > min_history)
+    if max_users is not None and len(users) > max_users:
+        users = sorted(np.random.default_rng(seed).choice(users, size=max_users, replace=False).tolist())
+
+    horizon = datetime.timedelta(days=horizon_days)
+    cutoffs = []
+    for user_id in users:
+        history = sorted(by_user[user_id], key=lambda e: e[2])
+        positions = np.unique(np.linspace(min_history, len(history) - 1, cutoffs_per_user).astype(int))
+        for pos in positions:
+            at = history[pos][2]
+            clicked = [a for a, kind, ts in history[pos:] if ts <= at + horizon and kind != "dislike"]
+            cutoffs.append(Cutoff(user_id, at, history[:pos], clicked))
+    cutoffs.sort(key=lambda c: c.at)
+    return cutoffs
+
+
+def profile_at(corpus: Corpus, history: List[tuple], now: datetime.datetime) -> Optional[np.ndarray]:
+    """The profile build_user_embedding would have produced from `history` at `now` (unit length)."""
+    rows, weights = [], []
+    for article_id, interaction_type, timestamp in history:
+        row = corpus.rows.get(article_id)
+        if row is None:
+            continue
+        days_diff = (now - timestamp).total_seconds() / 86400
+        rows.append(row)
+        weights.append(INTERACTION_WEIGHTS.get(interaction_type, 1.0) * np.exp(-DECAY_RATE * max(0.0, days_diff)))
+    if not rows or abs(sum(weights)) < 1e-12:
+        return None
+    profile = np.asarray(weights) @ corpus.embeddings[rows] / sum(weights)
+    norm = np.linalg.norm(profile)
+    return (profile / norm).astype(np.float32) if norm > 0 else None
+
+
+def rank(corpus: Corpus, candidates: np.ndarray, user_vec: np.ndarray, now: datetime.datetime,
+         seen_ids: set, k: int) -> List[int]:
+    """The ranker's steps after retrieval: fold story clusters, score, MMR. Returns article ids."""
+    folded, keys = [], set(seen_ids)
+    for row in candidates:
+        key = int(corpus.clusters[row])
+        if key in keys:
+            continue
+        keys.add(key)
+        folded.append(int(row))
+    if not folded:
+        return []
+    age_hours = (np.datetime64(now, "s") - corpus.published[folded]).astype(np.float64) / 3600
+    scores = score_candidates(corpus.embeddings[folded], user_vec, age_hours)
+    picks, _ = mmr_select(corpus.embeddings[folded], scores, [corpus.sources[r] for r in folded], k)
+    return [int(corpus.ids[folded[i]]) for i in picks]
+
+
+def ndcg(ranked: List[int], relevant: set, k: int) -> float:
+    gains = [1.0 / np.log2(i + 2) for i, article_id in enumerate(ranked[:k]) if article_id in relevant]
+    ideal = sum(1.0 / np.log2(i + 2) for i in range(min(len(relevant), k)))
+    return float(sum(gains) / ideal) if ideal else 0.0
+
+
+def _summary(values: List[float]) -> Dict:
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return {"mean": None}
+    return {"mean": round(float(values.mean()), 4), "p50": round(float(np.percentile(values, 50)), 4),
+            "p95": round(float(np.percentile(values, 95)), 4)}
+
+
+def replay(db: Session, engine: str, k: int = 10, candidates: int = 50, corpus: Optional[Corpus] = None,
+           cutoffs: Optional[List[Cutoff]] = None, **options) -> Dict:
+    """
+    Replays `cutoffs` (default: load_cutoffs(db)) and compares `engine` with
+    exact search. `options` go to the engine's constructor.
+    Returns a report with per-metric mean/p50/p95.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}' (expected one of {', '.join(sorted(ENGINES))})")
+    corpus = corpus if corpus is not None else Corpus.load(db)
+    cutoffs = cutoffs if cutoffs is not None else load_cutoffs(db)
+    exact = ExactEngine(corpus)
+    candidate_engine = ENGINES[engine](corpus, db, **options)
+
+    results = {name: [] for name in (
+        "candidate_overlap", "recall_at_k", "jaccard", "ndcg_exact", "ndcg_engine", "exact_ms", "engine_ms",
+    )}
+    evaluated = skipped = 0
+    for cutoff in cutoffs:
+        user_vec = profile_at(corpus, cutoff.history, cutoff.at)
+        seen = {article_id for article_id, _, _ in cutoff.history}
+        existing = corpus.published <= np.datetime64(cutoff.at, "s")
+        relevant = {a for a in cutoff.clicked if a in corpus.rows and existing[corpus.rows[a]] and a not in seen}
+        if user_vec is None or not relevant:
+            skipped += 1  # No profile yet, or nothing recommendable was clicked afterwards
+            continue
+        eligible = existing & ~np.isin(corpus.ids, list(seen))
+
+        start = time.perf_counter()
+        exact_rows = exact.search(user_vec, eligible, cutoff.at, candidates, k)
+        results["exact_ms"].append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        engine_rows = candidate_engine.search(user_vec, eligible, cutoff.at, candidates, k)
+        results["engine_ms"].append((time.perf_counter() - start) * 1000)
+
+        exact_list = rank(corpus, exact_rows, user_vec, cutoff.at, seen, k)
+        engine_list = rank(corpus, engine_rows, user_vec, cutoff.at, seen, k)
+        exact_set, engine_set = set(exact_list), set(engine_list)
+
+        if len(exact_rows):
+            results["candidate_overlap"].append(len(set(exact_rows.tolist()) & set(engine_rows.tolist())) / len(exact_rows))
+        if exact_set:
+            results["recall_at_k"].append(len(exact_set & engine_set) / len(exact_set))
+            results["jaccard"].append(len(exact_set & engine_set) / len(exact_set | engine_set))
+        results["ndcg_exact"].append(ndcg(exact_list, relevant, k))
+        results["ndcg_engine"].append(ndcg(engine_list, relevant, k))
+        evaluated += 1
+    if hasattr(candidate_engine, "close"):
+        candidate_engine.close()
+
+    report = {
+        "engine": engine, "options": options, "k": k, "candidates": candidates,
+        "articles": len(corpus), "cutoffs": evaluated, "skipped": skipped,
+    }
+    report.update({name: _summary(values) for name, values in results.items()})
+    return report
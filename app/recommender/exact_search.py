@@ -0,0 +1,328 @@
+"""
+Exact brute-force candidate search across CPU cores.
+
+The recent articles' unit-length embeddings are copied once into a
+`multiprocessing.shared_memory` block. A pool of worker processes attaches to
+it, so they share one copy of the matrix. A search splits the rows into one
+slice per worker; each worker scores its slice against the query and returns
+a partial top-k (np.argpartition), and the parent merges the partial results.
+Nothing is pickled per request except the query vector and the small results.
+
+`ExactScorer` serves both the ranker (`exact_scorer`, enabled with
+EXACT_SEARCH_PROCESSES > 0) and batch jobs (`ExactScorer.from_arrays`).
+Matrices below PARALLEL_MIN_ROWS are scored in the calling process, where
+pool round-trips would cost more than they save. New articles announced on
+the change feed (app/storage/changefeed.py) are appended to the matrix
+instead of reloading the whole window.
+"""
+import time
+import datetime
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from app.storage.models import Article
+from app.storage.vectors import EMBEDDING_DIM, vector_column, decode_vectors
+from app.storage.changefeed import change_feed, Event, ARTICLES, RESYNC
+from app.recommender.versions import corpus_epoch
+from app.utils.config import settings
+from app.utils.logger import setup_logger
+
+logger = setup_logger("exact_search")
+
+PARALLEL_MIN_ROWS = 50000      # Smaller matrices are scored in-process
+REFRESH_SECONDS = 60           # How often the ranker's matrix checks for new articles
+
+
+class _SharedArrays:
+    """
+    The search arrays (unit embeddings, ids, publish times) in one shared-memory block.
+    `users` counts searches running on it (guarded by the scorer's lock); a
+    replaced block is only released once the last of them is done.
+    """
+
+    def __init__(self, embeddings: np.ndarray, ids: np.ndarray, published: np.ndarray):
+        n, dim = embeddings.shape
+        self.n, self.dim = n, dim
+        self.users = 0
+        self.retired = False
+        size = max(1, n * dim * 4 + n * 8 * 2)
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.embeddings, self.ids, self.published = _views(self.shm.buf, n, dim)
+        self.embeddings[:] = embeddings
+        self.ids[:] = ids
+        self.published[:] = published
+
+    @property
+    def spec(self) -> Tuple[str, int, int]:
+        return self.shm.name, self.n, self.dim
+
+    def release(self):
+        """Unlinks the block; the memory is freed once the last process mapping it lets go."""
+        self.embeddings = self.ids = self.published = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # A search still holds views of it; the mapping goes with them
+        self.shm.unlink()
+
+
+def _views(buf, n: int, dim: int):
+    embeddings = np.ndarray((n, dim), dtype=np.float32, buffer=buf)
+    ids = np.ndarray((n,), dtype=np.int64, buffer=buf, offset=n * dim * 4)
+    published = np.ndarray((n,), dtype=np.int64, buffer=buf, offset=n * dim * 4 + n * 8)
+    return embeddings, ids, published
+
+
+def _top_k(embeddings: np.ndarray, published: np.ndarray, query: np.ndarray, k: int,
+           since: Optional[int], until: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Row offsets and scores of the best `k` rows published in [since, until] (unordered)."""
+    scores = embeddings @ query
+    if since is not None:
+        scores[published < since] = -np.inf
+    if until is not None:
+        scores[published > until] = -np.inf
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.isfinite(scores[top])]
+    return top, scores[top]
+
+
+# Worker side: one attachment to the current block, replaced when the parent publishes a new one
+_attached: Dict[str, object] = {}
+
+
+def _search_slice(spec: Tuple[str, int, int], start: int, end: int, query: np.ndarray, k: int,
+                  since: Optional[int], until: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+    name, n, dim = spec
+    if _attached.get("name") != name:
+        old = _attached.get("shm")
+        _attached.clear()
+        if old is not None:
+            old.close()
+        # track=False: the parent owns the block's lifetime (Python 3.13+ only; older versions ignore it)
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+        _attached.update(name=name, shm=shm, views=_views(shm.buf, n, dim))
+    embeddings, ids, published = _attached["views"]
+    rows, scores = _top_k(embeddings[start:end], published[start:end], query, k, since, until)
+    return ids[start:end][rows], scores
+
+
+class ExactScorer:
+    """Cosine top-k over a fixed article matrix, split across worker processes."""
+
+    def __init__(self, processes: int = 0):
+        self.processes = processes
+        self._arrays: Optional[_SharedArrays] = None
+        self._pool = None
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+        self.epoch: Optional[int] = None
+        self.loaded_at: Optional[float] = None
+        self.window_days = settings.CANDIDATE_WINDOW_DAYS
+        self._pending: Set[int] = set()
+        self._resync = False
+
+    @classmethod
+    def from_arrays(cls, ids, embeddings, published=None, processes: int = 0) -> "ExactScorer":
+        """A scorer over in-memory arrays, e.g. a batch job's corpus. `published` is datetime64 or epoch seconds."""
+        scorer = cls(processes)
+        scorer.set_matrix(ids, embeddings, published)
+        return scorer
+
+    def __len__(self):
+        return self._arrays.n if self._arrays is not None else 0
+
+    def _acquire(self) -> Optional[_SharedArrays]:
+        """The current arrays, held until `_done`: a matrix swap won't release them meanwhile."""
+        with self._lock:
+            arrays = self._arrays
+            if arrays is not None:
+                arrays.users += 1
+            return arrays
+
+    def _done(self, arrays: _SharedArrays):
+        with self._lock:
+            arrays.users -= 1
+            release = arrays.retired and arrays.users == 0
+        if release:
+            arrays.release()
+
+    def _retire(self, arrays: _SharedArrays):
+        """Releases replaced arrays now, or when the last search still using them finishes."""
+        with self._lock:
+            arrays.retired = True
+            release = arrays.users == 0
+        if release:
+            arrays.release()
+
+    def set_matrix(self, ids, embeddings, published=None):
+        """Publishes a new matrix; searches already running finish on the previous one."""
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1 if len(ids) else EMBEDDING_DIM)
+        unit = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-9)
+        if published is None:
+            published = np.zeros(len(ids), dtype=np.int64)
+        published = np.asarray(published)
+        if np.issubdtype(published.dtype, np.datetime64):
+            published = published.astype("datetime64[s]").astype(np.int64)
+        arrays = _SharedArrays(unit, np.asarray(ids, dtype=np.int64), published.astype(np.int64))
+        with self._lock:
+            previous, self._arrays = self._arrays, arrays
+        if previous is not None:
+            self._retire(previous)
+
+    def _rows(self, db: Session, since: datetime.datetime, ids: Optional[List[int]] = None):
+        query = db.query(Article.id, vector_column(Article.embedding, db), Article.published_date).filter(
+            Article.published_date >= since, Article.embedding.isnot(None)
+        )
+        if ids is not None:
+            query = query.filter(Article.id.in_(ids))
+        rows = query.all()
+        published = np.array([row.published_date for row in rows], dtype="datetime64[s]")
+        return [row.id for row in rows], decode_vectors([row.embedding for row in rows]), published
+
+    def load(self, db: Session, window_days: Optional[float] = None):
+        """Loads the embeddings of articles published in the last `window_days` (default CANDIDATE_WINDOW_DAYS)."""
+        self.window_days = window_days if window_days is not None else settings.CANDIDATE_WINDOW_DAYS
+        self._resync = False
+        self._pending.clear()  # Changes announced from here on are applied on top of this load
+        epoch = corpus_epoch(db)
+        ids, embeddings, published = self._rows(db, self._window_start())
+        self.set_matrix(ids, embeddings, published)
+        self.epoch = epoch
+        self.loaded_at = time.monotonic()
+        logger.info(f"Loaded {len(ids)} articles for exact search ({self.processes} processes)")
+
+    def append(self, db: Session, article_ids: Iterable[int]):
+        """
+        Adds (or replaces) the given articles without reloading the window,
+        and drops rows that have aged out of it.
+        """
+        article_ids = sorted(set(article_ids))
+        since = self._window_start()
+        ids, embeddings, published = self._rows(db, since, article_ids)
+        arrays = self._acquire()
+        try:
+            keep = (arrays.published >= int(np.datetime64(since, "s").astype(np.int64))) & ~np.isin(arrays.ids, ids)
+            self.set_matrix(
+                np.concatenate([arrays.ids[keep], np.asarray(ids, dtype=np.int64)]),
+                np.concatenate([arrays.embeddings[keep], embeddings]),
+                np.concatenate([arrays.published[keep], published.astype(np.int64)]),
+            )
+        finally:
+            self._done(arrays)
+        self.epoch = max(self.epoch or 0, *article_ids)
+        logger.info(f"Added {len(ids)} articles to exact search ({len(self)} in the window)")
+
+    def on_change(self, event: Event):
+        """Change feed handler: new articles are appended on the next refresh; a resync reloads."""
+        if event.kind == ARTICLES:
+            self._pending.update(event.ids)
+        elif event.kind == RESYNC:
+            self._resync = True
+
+    def refresh(self, db: Session):
+        """
+        Applies announced changes, and without a live change feed also checks
+        the corpus epoch every REFRESH_SECONDS. One thread updates while the
+        others keep searching the current matrix.
+        """
+        due = not change_feed.listening and (
+            self.loaded_at is None or time.monotonic() - self.loaded_at >= REFRESH_SECONDS
+        )
+        if self._arrays is not None and not (self._resync or self._pending or due):
+            return
+        if not self._refreshing.acquire(blocking=self._arrays is None):
+            return
+        try:
+            if self._arrays is None or self._resync:
+                self.load(db)
+            elif self._pending:
+                article_ids, self._pending = self._pending, set()
+                self.append(db, article_ids)
+            elif due:
+                if corpus_epoch(db) != self.epoch:
+                    self.load(db, self.window_days)
+                else:
+                    self.loaded_at = time.monotonic()
+        finally:
+            self._refreshing.release()
+
+    def _window_start(self) -> datetime.datetime:
+        return datetime.datetime.utcnow() - datetime.timedelta(days=self.window_days)
+
+    def _get_pool(self):
+        if self._pool is None:
+            # spawn: forking a threaded API worker is unsafe
+            self._pool = multiprocessing.get_context("spawn").Pool(self.processes)
+        return self._pool
+
+    def search(self, query, k: int, excluded_ids: Iterable[int] = (),
+               since: Optional[datetime.datetime] = None,
+               until: Optional[datetime.datetime] = None) -> List[Tuple[int, float]]:
+        """
+        The `k` articles most similar to `query` as (article_id, cosine), best
+        first, skipping `excluded_ids` and articles published outside [since, until].
+        """
+        arrays = self._acquire()
+        if arrays is None:
+            return []
+        try:
+            return self._search(arrays, query, k, excluded_ids, since, until)
+        finally:
+            self._done(arrays)
+
+    def _search(self, arrays: _SharedArrays, query, k: int, excluded_ids, since, until):
+        if arrays.n == 0:
+            return []
+        # Local views: the arrays stay mapped until this search is done with them
+        embeddings, all_ids, published = arrays.embeddings, arrays.ids, arrays.published
+        query = np.asarray(query, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-9)
+        excluded = set(excluded_ids)
+        fetch = k + len(excluded)  # Exclusions are applied after the merge
+        since_s, until_s = (int(np.datetime64(t, "s").astype(np.int64)) if t is not None else None
+                            for t in (since, until))
+
+        if self.processes <= 1 or arrays.n < PARALLEL_MIN_ROWS:
+            rows, scores = _top_k(embeddings, published, query, fetch, since_s, until_s)
+            ids = all_ids[rows]
+        else:
+            bounds = np.linspace(0, arrays.n, self.processes + 1).astype(int)
+            parts = self._get_pool().starmap(_search_slice, [
+                (arrays.spec, int(start), int(end), query, fetch, since_s, until_s)
+                for start, end in zip(bounds[:-1], bounds[1:]) if end > start
+            ])
+            ids = np.concatenate([part[0] for part in parts])
+            scores = np.concatenate([part[1] for part in parts])
+
+        order = np.argsort(-scores, kind="stable")
+        results = []
+        for i in order:
+            article_id = int(ids[i])
+            if article_id in excluded:
+                continue
+            results.append((article_id, float(scores[i])))
+            if len(results) == k:
+                break
+        return results
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+        with self._lock:
+            arrays, self._arrays = self._arrays, None
+        if arrays is not None:
+            self._retire(arrays)
+
+
+exact_scorer = ExactScorer(settings.EXACT_SEARCH_PROCESSES)
+change_feed.subscribe(ARTICLES, exact_scorer.on_change)
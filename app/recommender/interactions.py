@@ -0,0 +1,214 @@
+"""
+Compacted interaction history.
+
+Raw interactions grow with every click, so profile building used to cost a
+user's lifetime history. `compact_interactions` folds raw events into one
+`interaction_aggregates` row per (user, article, type) with a count, the
+last-seen time and the events' summed time decay, and moves compacted events
+older than the decay cutoff to `interactions_archive`.
+
+Profiles then read the aggregates plus the raw events not compacted yet (the
+"tail", above the compaction watermark). An aggregate's weight today is its
+decay_sum decayed again from last_seen to now, which is the sum of the
+per-event weights the raw rows would give; aggregates whose events have all
+decayed past the cutoff are left out, as their weight no longer matters.
+Both parts, and the watermark that splits them, are read in one statement:
+a compaction committing in between could otherwise count an event twice.
+"""
+import math
+import datetime
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import func, insert, literal, select, delete, union_all
+from sqlalchemy.orm import Session
+from app.storage.models import Interaction, InteractionAggregate, InteractionArchive, JobCheckpoint
+from app.storage.checkpoints import get_checkpoint, set_checkpoint
+from app.utils.logger import setup_logger
+
+logger = setup_logger("interactions")
+
+COMPACTION_CHECKPOINT = "interaction_compaction"
+COMPACTION_BATCH_SIZE = 5000
+COMPACTION_LAG_MINUTES = 5      # Leave the newest events alone so in-flight inserts are not skipped
+DECAY_CUTOFF_WEIGHT = 1e-3      # Events decayed below this weight are archived and left out of profiles
+
+_SECONDS_PER_DAY = 86400.0
+
+
+def decay_cutoff_days(decay_rate: float) -> float:
+    """Age (days) at which an event's time decay drops below DECAY_CUTOFF_WEIGHT."""
+    return math.log(1 / DECAY_CUTOFF_WEIGHT) / decay_rate
+
+
+def _days(delta: datetime.timedelta) -> float:
+    return delta.total_seconds() / _SECONDS_PER_DAY
+
+
+def compaction_watermark(db: Session) -> int:
+    """Id of the last interaction folded into the aggregates (0 before the first run)."""
+    return get_checkpoint(db, COMPACTION_CHECKPOINT)
+
+
+def _fold_batch(db: Session, events, decay_rate: float):
+    """Merges a batch of raw events into their aggregate rows (added to the session, not committed)."""
+    grouped: Dict[Tuple[int, int, str], List[datetime.datetime]] = {}
+    for event in events:
+        grouped.setdefault((event.user_id, event.article_id, event.interaction_type), []).append(event.timestamp)
+
+    existing = {
+        (agg.user_id, agg.article_id, agg.interaction_type): agg
+        for agg in db.query(InteractionAggregate).filter(
+            InteractionAggregate.user_id.in_({key[0] for key in grouped}),
+            InteractionAggregate.article_id.in_({key[1] for key in grouped}),
+        ).all()
+    }
+
+    for key, timestamps in grouped.items():
+        stamps = [ts for ts in timestamps if ts is not None]
+        agg = existing.get(key)
+        if agg is None:
+            agg = InteractionAggregate(
+                user_id=key[0], article_id=key[1], interaction_type=key[2],
+                count=0, decay_sum=0.0, last_seen=max(stamps) if stamps else datetime.datetime.utcnow(),
+            )
+            db.add(agg)
+            existing[key] = agg
+
+        last_seen = max([agg.last_seen] + stamps)
+        # Re-anchor the stored sum at the new last_seen, then add the new events
+        decay_sum = agg.decay_sum * math.exp(-decay_rate * _days(last_seen - agg.last_seen))
+        decay_sum += sum(math.exp(-decay_rate * _days(last_seen - ts)) for ts in stamps)
+
+        agg.count += len(timestamps)
+        agg.last_seen = last_seen
+        agg.decay_sum = decay_sum
+
+
+def _archive_events(db: Session, watermark: int, cutoff: datetime.datetime, batch_size: int) -> int:
+    """Moves compacted events older than `cutoff` to interactions_archive. Returns how many moved."""
+    pending = db.query(Interaction.id).filter(
+        Interaction.id <= watermark, Interaction.timestamp < cutoff
+    ).order_by(Interaction.id)
+
+    moved = 0
+    while True:
+        ids = [event_id for (event_id,) in pending.limit(batch_size).all()]
+        if not ids:
+            return moved
+        try:
+            db.execute(
+                insert(InteractionArchive).from_select(
+                    ["id", "user_id", "article_id", "interaction_type", "timestamp"],
+                    select(
+                        Interaction.id, Interaction.user_id, Interaction.article_id,
+                        Interaction.interaction_type, Interaction.timestamp,
+                    ).where(Interaction.id.in_(ids)),
+                )
+            )
+            db.execute(delete(Interaction).where(Interaction.id.in_(ids)))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        moved += len(ids)
+
+
+def compact_interactions(db: Session, decay_rate: float, batch_size: int = COMPACTION_BATCH_SIZE,
+                         archive: bool = True, now: Optional[datetime.datetime] = None) -> Dict:
+    """
+    Folds raw interactions above the watermark into the aggregates, one
+    committed batch at a time (aggregates and watermark move together, so a
+    crash never counts an event twice), then archives compacted events past
+    the decay cutoff. Only one compaction should run at a time.
+    """
+    now = now or datetime.datetime.utcnow()
+    watermark = compaction_watermark(db)
+    settled = now - datetime.timedelta(minutes=COMPACTION_LAG_MINUTES)
+    upper = db.query(func.max(Interaction.id)).filter(Interaction.timestamp < settled).scalar() or 0
+
+    stats = {"watermark": watermark, "compacted": 0, "batches": 0, "archived": 0}
+    while watermark < upper:
+        events = db.query(
+            Interaction.id, Interaction.user_id, Interaction.article_id,
+            Interaction.interaction_type, Interaction.timestamp,
+        ).filter(
+            Interaction.id > watermark, Interaction.id <= upper
+        ).order_by(Interaction.id).limit(batch_size).all()
+        if not events:
+            break
+        try:
+            _fold_batch(db, events, decay_rate)
+            watermark = events[-1].id
+            set_checkpoint(db, COMPACTION_CHECKPOINT, watermark)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        stats["compacted"] += len(events)
+        stats["batches"] += 1
+        logger.info(f"Compacted {stats['compacted']} interactions so far (watermark {watermark})")
+    stats["watermark"] = watermark
+
+    if archive:
+        cutoff = now - datetime.timedelta(days=decay_cutoff_days(decay_rate))
+        stats["archived"] = _archive_events(db, watermark, cutoff, batch_size)
+    return stats
+
+
+def _history(db: Session, users, decay_rate: float,
+             now: datetime.datetime) -> List[Tuple[int, int, str, float]]:
+    """
+    (user_id, article_id, interaction_type, time_decay) for the users `users(column)`
+    selects: the raw tail above the watermark plus the still-relevant aggregates.
+    A raw event is read as an aggregate of one (decay_sum 1 at its timestamp),
+    so both decay by the same fractional days.
+    """
+    watermark = func.coalesce(
+        select(JobCheckpoint.position).where(JobCheckpoint.name == COMPACTION_CHECKPOINT).scalar_subquery(), 0
+    )
+    cutoff = now - datetime.timedelta(days=decay_cutoff_days(decay_rate))
+    tail = select(
+        Interaction.user_id, Interaction.article_id, Interaction.interaction_type,
+        literal(1.0).label("decay_sum"), Interaction.timestamp.label("last_seen"),
+    ).where(users(Interaction.user_id), Interaction.id > watermark)
+    aggregates = select(
+        InteractionAggregate.user_id, InteractionAggregate.article_id, InteractionAggregate.interaction_type,
+        InteractionAggregate.decay_sum, InteractionAggregate.last_seen,
+    ).where(users(InteractionAggregate.user_id), InteractionAggregate.last_seen >= cutoff)
+
+    return [
+        (row.user_id, row.article_id, row.interaction_type,
+         row.decay_sum * math.exp(-decay_rate * max(0.0, _days(now - row.last_seen))))
+        for row in db.execute(union_all(tail, aggregates)).all()
+    ]
+
+
+def profile_events(db: Session, user_id: int, decay_rate: float,
+                   now: Optional[datetime.datetime] = None) -> List[Tuple[int, str, float]]:
+    """
+    The user's interaction history as (article_id, interaction_type, time_decay),
+    read from the raw tail above the watermark and the still-relevant aggregates.
+    """
+    now = now or datetime.datetime.utcnow()
+    return [(article_id, interaction_type, decay)
+            for _, article_id, interaction_type, decay in _history(db, lambda column: column == user_id, decay_rate, now)]
+
+
+def seen_article_ids(db: Session, user_id: int) -> Set[int]:
+    """Every article the user has interacted with, compacted or not."""
+    seen = {row.article_id for row in db.query(Interaction.article_id).filter(Interaction.user_id == user_id).all()}
+    seen.update(
+        row.article_id for row in db.query(InteractionAggregate.article_id).filter(
+            InteractionAggregate.user_id == user_id
+        ).all()
+    )
+    return seen
+
+
+def chunk_profile_events(db: Session, first_user_id: int, last_user_id: int, decay_rate: float,
+                         now: Optional[datetime.datetime] = None) -> List[Tuple[int, int, str, float]]:
+    """
+    `profile_events` for every user with an id in [first_user_id, last_user_id],
+    as (user_id, article_id, interaction_type, time_decay), in one query.
+    """
+    now = now or datetime.datetime.utcnow()
+    return _history(db, lambda column: column.between(first_user_id, last_user_id), decay_rate, now)
@@ -0,0 +1,134 @@
+"""
+Reduced-dimension embeddings for first-pass retrieval.
+
+A projection maps the 384-d article and user embeddings to 64-128 dims:
+either truncated SVD fitted on the article corpus (the best rank-k
+approximation of the corpus' dot products) or a seeded random Gaussian
+projection. It is fitted offline by scripts/fit_projection.py, saved to
+settings.PROJECTION_PATH and identified by a version string; each article
+stores its projected vector in `embedding_proj` together with the
+`projection_version` that produced it, so rows from an older model are
+never compared with new ones.
+
+With PROJECTION_ENABLED the ranker retrieves candidates and runs MMR on the
+projected vectors, then rescores a short list at full precision.
+"""
+import os
+import hashlib
+import threading
+from typing import Dict, Optional
+import numpy as np
+from sqlalchemy import update, bindparam, or_
+from sqlalchemy.orm import Session
+from app.storage.models import Article
+from app.storage.vectors import EMBEDDING_DIM, vector_column, decode_vectors
+from app.utils.config import settings
+from app.utils.logger import setup_logger
+
+logger = setup_logger("projection")
+
+DEFAULT_DIMS = 96
+FIT_SAMPLE_SIZE = 50000    # Articles used to fit the SVD
+APPLY_BATCH_SIZE = 1000
+
+
+class Projection:
+    def __init__(self, components: np.ndarray, method: str):
+        self.components = np.ascontiguousarray(components, dtype=np.float32)  # (EMBEDDING_DIM, dims)
+        self.method = method
+        digest = hashlib.sha1(self.components.tobytes()).hexdigest()[:8]
+        self.version = f"{method}{self.dims}-{digest}"
+
+    @property
+    def dims(self) -> int:
+        return self.components.shape[1]
+
+    def project(self, vectors) -> np.ndarray:
+        """Projects an (n, 384) matrix, or a single vector, into the reduced space."""
+        return np.asarray(vectors, dtype=np.float32) @ self.components
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(f, components=self.components, method=self.method)
+
+    @classmethod
+    def load(cls, path: str) -> "Projection":
+        with np.load(path) as data:
+            return cls(data["components"], str(data["method"]))
+
+
+def fit_svd(embeddings: np.ndarray, dims: int = DEFAULT_DIMS) -> Projection:
+    """Truncated SVD of the (uncentered) embeddings, so projected dot products approximate the originals."""
+    embeddings = np.asarray(embeddings, dtype=np.float64)
+    _, singular_values, vt = np.linalg.svd(embeddings, full_matrices=False)
+    energy = (singular_values[:dims] ** 2).sum() / (singular_values ** 2).sum()
+    logger.info(f"SVD to {dims} dims keeps {energy:.1%} of the corpus energy")
+    return Projection(vt[:dims].T, "svd")
+
+
+def random_projection(dims: int = DEFAULT_DIMS, seed: int = 0) -> Projection:
+    """Gaussian random projection (Johnson-Lindenstrauss); needs no data."""
+    rng = np.random.default_rng(seed)
+    return Projection(rng.normal(scale=1 / np.sqrt(dims), size=(EMBEDDING_DIM, dims)), "random")
+
+
+_projection: Optional[Projection] = None
+_projection_path: Optional[str] = None
+_projection_lock = threading.Lock()
+
+
+def get_projection(path: Optional[str] = None) -> Optional[Projection]:
+    """The projection saved at `path` (default PROJECTION_PATH), loaded once; None if there is none."""
+    global _projection, _projection_path
+    path = path or settings.PROJECTION_PATH
+    with _projection_lock:
+        if _projection_path != path:
+            _projection_path = path
+            _projection = None
+            if os.path.exists(path):
+                try:
+                    _projection = Projection.load(path)
+                    logger.info(f"Loaded projection {_projection.version} from {path}")
+                except Exception as e:
+                    logger.error(f"Could not load projection from {path}: {e}")
+        return _projection
+
+
+def active_projection() -> Optional[Projection]:
+    """The projection the ranker should search with, if enabled and available."""
+    return get_projection() if settings.PROJECTION_ENABLED else None
+
+
+def apply_projection(db: Session, projection: Projection, batch_size: int = APPLY_BATCH_SIZE) -> Dict:
+    """
+    Writes `embedding_proj` for every article whose projected vector is
+    missing or from another projection version, one committed batch at a time.
+    """
+    statement = update(Article.__table__).where(Article.__table__.c.id == bindparam("article_id")).values(
+        embedding_proj=bindparam("projected"), projection_version=projection.version,
+    )
+    stats = {"version": projection.version, "projected": 0, "batches": 0}
+    last_id = 0
+    while True:
+        rows = db.query(Article.id, vector_column(Article.embedding, db)).filter(
+            Article.id > last_id,
+            Article.embedding.isnot(None),
+            or_(Article.projection_version.is_(None), Article.projection_version != projection.version),
+        ).order_by(Article.id).limit(batch_size).all()
+        if not rows:
+            break
+        projected = projection.project(decode_vectors([row.embedding for row in rows]))
+        try:
+            db.execute(statement, [
+                {"article_id": row.id, "projected": vec.tolist()} for row, vec in zip(rows, projected)
+            ])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        last_id = rows[-1].id
+        stats["projected"] += len(rows)
+        stats["batches"] += 1
+    logger.info(f"Projected {stats['projected']} articles with {projection.version}")
+    return stats
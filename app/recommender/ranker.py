@@ -1,10 +1,23 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.storage.models import User, Article, Interaction
+from sqlalchemy import func, text
+from app.storage.models import User, Article
 from app.storage.db import SessionLocal
+from app.recommender.cold_start import cold_start_feed, load_feed_items, FeedItem, FEED_ITEM_COLUMNS
 import numpy as np
 import datetime
+import threading
+from collections import OrderedDict
 from app.utils.logger import setup_logger
+from app.utils.metrics import metrics
+from app.utils.timing import Deadline
+from app.utils.config import settings
+from app.storage.vectors import vector_column, decode_vectors, EMBEDDING_DIM
+from app.storage.archive import archived_embeddings
+from app.recommender.interactions import profile_events, seen_article_ids
+from app.recommender.projection import active_projection, Projection
+from app.recommender.exact_search import exact_scorer
+from app.recommender.cooccurrence import cooccurrence_index
+from app.storage.changefeed import change_feed, publish, PROFILES, RESYNC
 
 logger = setup_logger("ranker")
 
@@ -18,52 +31,89 @@ INTERACTION_WEIGHTS = {
 # Time decay factor (half-life approx 14 days)
 DECAY_RATE = 0.05 
 
+# Remaining budget (ms) below which recommend_articles degrades a step
+SEARCH_MIN_MS = 50     # Skip the vector search; serve the cached list or cold-start feed
+FULL_SEARCH_MS = 150   # Search fewer candidates
+MMR_MIN_MS = 15        # Skip MMR; take candidates in score order
+
+# With a projection, MMR in the reduced space keeps this many times the open
+# slots, and only that shortlist is rescored at full precision
+PROJECTED_SHORTLIST_FACTOR = 1.5
+
+# Articles the co-occurrence index adds to the candidates ("readers also read")
+COOCCURRENCE_CANDIDATES = 20
+
+
+# Last personalized list per user, served when the budget runs out;
+# dropped when the change feed announces the user's rebuilt profile
+RESULT_CACHE_SIZE = 10000
+_result_cache = OrderedDict()
+_result_cache_lock = threading.Lock()
+
+class Recommendations(list):
+    """
+    A list of articles that also records which tier produced it:
+    full, reduced (fewer candidates), no_mmr, cached (last list served to the
+    user), cold_start (user has no profile), fallback (shared cold-start feed
+    after a failure or an exhausted budget) or shed (shared cold-start feed
+    for a request refused by admission control).
+    """
+
+    def __init__(self, articles=(), tier: str = "full"):
+        super().__init__(articles)
+        self.tier = tier
+
 def build_user_embedding(user_id: int):
     """
     Recalculates and updates the user embedding based on weighted interactions.
     Weights are determined by interaction type and time decay.
+    Compacted history is read from the aggregates (see app/recommender/interactions.py).
     """
     db = SessionLocal()
     try:
-        # Fetch user's interactions with articles
-        interactions = db.query(Interaction).filter(Interaction.user_id == user_id).all()
+        now = datetime.datetime.utcnow()
+
+        # Fetch user's interactions with articles as (article_id, type, time decay)
+        interactions = profile_events(db, user_id, DECAY_RATE, now)
         
         if not interactions:
             logger.info(f"No interactions found for user {user_id}. Cannot build profile.")
             return
         
         # Get embeddings of these articles
-        article_ids = [i.article_id for i in interactions]
-        articles = db.query(Article).filter(Article.id.in_(article_ids)).all()
-        article_map = {a.id: a for a in articles}
-        
-        weighted_vectors = []
-        total_weight = 0.0
+        article_ids = list({article_id for article_id, _, _ in interactions})
+        articles = db.query(Article.id, vector_column(Article.embedding, db)).filter(Article.id.in_(article_ids)).all()
+        embeddings = decode_vectors([a.embedding for a in articles])
+        article_rows = {a.id: i for i, a in enumerate(articles)}
+        missing = [a.id for i, a in enumerate(articles) if np.isnan(embeddings[i, 0])]
+        if missing:
+            # Old stories keep their embedding in the archive
+            for article_id, vec in archived_embeddings(db, missing).items():
+                embeddings[article_rows[article_id]] = vec
         
-        now = datetime.datetime.utcnow()
+        rows = []
+        weights = []
         
-        for interaction in interactions:
-            article = article_map.get(interaction.article_id)
-            if not article or article.embedding is None:
+        for article_id, interaction_type, time_decay in interactions:
+            row = article_rows.get(article_id)
+            if row is None or np.isnan(embeddings[row, 0]):
                 continue
                 
             # Base weight from interaction type
-            base_weight = INTERACTION_WEIGHTS.get(interaction.interaction_type, 1.0)
-            
-            # Time decay
-            days_diff = (now - interaction.timestamp).days
-            time_decay = np.exp(-DECAY_RATE * max(0, days_diff))
+            base_weight = INTERACTION_WEIGHTS.get(interaction_type, 1.0)
             
             final_weight = base_weight * time_decay
             
-            weighted_vectors.append(np.array(article.embedding) * final_weight)
-            total_weight += final_weight
+            rows.append(row)
+            weights.append(final_weight)
             
-        if not weighted_vectors:
+        if not rows:
             return
 
         # Calculate weighted mean embedding
-        mean_embedding = np.sum(weighted_vectors, axis=0) / total_weight
+        weights = np.asarray(weights)
+        total_weight = float(weights.sum())
+        mean_embedding = weights @ embeddings[rows] / total_weight
         
         # Update user
         user = db.query(User).filter(User.id == user_id).first()
@@ -72,6 +122,8 @@ def build_user_embedding(user_id: int):
             db.add(user)
         
         user.user_embedding = mean_embedding.tolist()
+        user.profile_version = (user.profile_version or 0) + 1  # New first-page ETag
+        publish(db, PROFILES, [user_id])
         db.commit()
         logger.info(f"Updated profile for user {user_id} with total weight {total_weight:.2f}")
         
@@ -81,24 +133,310 @@ def build_user_embedding(user_id: int):
     finally:
         db.close()
 
-def recommend_articles(user_id: int, limit: int = 10, candidates: int = 50):
+def _fold_clusters(articles, excluded_keys=()):
+    """
+    Keeps the first article of each story cluster, preserving order.
+    Rows ingested before clustering have no cluster_id and stand alone.
+    Clusters whose key is in `excluded_keys` are dropped entirely.
+    """
+    seen = set(excluded_keys)
+    folded = []
+    for article in articles:
+        key = article.cluster_id or article.id
+        if key in seen:
+            continue
+        seen.add(key)
+        folded.append(article)
+    return folded
+
+def _story_keys(db: Session, article_ids):
+    """
+    Cluster keys of the stories `article_ids` belong to. Folding and the
+    cold-start feed key stories by `cluster_id or id`, so reading any copy
+    has to exclude the key, not just the copy's own id.
+    """
+    if not article_ids:
+        return set()
+    return {
+        row.cluster_id for row in db.query(Article.cluster_id).filter(
+            Article.id.in_(article_ids), Article.cluster_id.isnot(None)
+        ).all()
+    }
+
+def _remember(user_id: int, items):
+    items = list(items)
+    with _result_cache_lock:
+        _result_cache[user_id] = items
+        _result_cache.move_to_end(user_id)
+        while len(_result_cache) > RESULT_CACHE_SIZE:
+            _result_cache.popitem(last=False)
+
+def _forget(event):
+    """Drops the cached lists of users whose profile was rebuilt (all of them on RESYNC)."""
+    with _result_cache_lock:
+        if event.kind == RESYNC:
+            _result_cache.clear()
+        for user_id in event.ids:
+            _result_cache.pop(user_id, None)
+
+change_feed.subscribe(PROFILES, _forget)
+
+def _scoring_columns(db: Session, projection: Projection = None):
+    """
+    Ranking reads only what it scores on; display fields are loaded for the
+    final top-k alone. Column queries return plain rows, skipping the ORM
+    identity map, and embeddings come back in binary form on PostgreSQL.
+    With a projection, the `embedding` field holds the reduced vector.
+    """
+    column = Article.embedding_proj if projection is not None else Article.embedding
+    return (Article.id, vector_column(column, db, name="embedding"), Article.published_date, Article.source, Article.cluster_id)
+
+def _rescore_full(db: Session, shortlist, user_vec: np.ndarray, trending_articles, trending_vecs: np.ndarray,
+                  slots: int, now: datetime.datetime, deadline: Deadline, affinity=None):
+    """Reruns scoring and MMR on a projected shortlist with the full-precision embeddings."""
+    rows = db.query(Article.id, vector_column(Article.embedding, db)).filter(
+        Article.id.in_([a.id for a in shortlist])
+    ).all()
+    full = dict(zip((row.id for row in rows), decode_vectors([row.embedding for row in rows])))
+    shortlist = [a for a in shortlist if a.id in full]
+    embeddings = np.array([full[a.id] for a in shortlist], dtype=np.float32).reshape(len(shortlist), EMBEDDING_DIM)
+    age_hours = np.array([(now - a.published_date).total_seconds() / 3600 for a in shortlist])
+    scores = _blend(score_candidates(embeddings, user_vec, age_hours), shortlist, affinity)
+    keep = ~np.isnan(scores)  # No full-precision embedding (e.g. archived since projection)
+    shortlist = [a for a, k in zip(shortlist, keep) if k]
+    embeddings, scores = embeddings[keep], scores[keep]
+    picks, finished = mmr_select(
+        embeddings, scores, [a.source for a in shortlist], slots,
+        seed_embeddings=trending_vecs, seed_sources=[a.source for a in trending_articles], deadline=deadline,
+    )
+    return [shortlist[i] for i in picks], finished
+
+def _exact_candidates(db: Session, user_vec: np.ndarray, excluded_ids, since: datetime.datetime, candidates: int):
+    """Candidates from the in-memory exact scorer (EXACT_SEARCH_PROCESSES), most similar first."""
+    exact_scorer.refresh(db)
+    hits = exact_scorer.search(user_vec, candidates, excluded_ids, since=since)
+    rank = {article_id: i for i, (article_id, _) in enumerate(hits)}
+    if not rank:
+        return []
+    rows = db.query(*_scoring_columns(db)).filter(Article.id.in_(rank)).all()
+    return sorted(rows, key=lambda row: rank[row.id])
+
+def _cooccurrence_affinity(user_id: int, excluded_ids):
+    """
+    Articles read alongside the user's recent reads, as id -> affinity (see
+    cooccurrence.py). Memory only: the index is kept current by its own
+    thread. Empty when COOCCURRENCE_WEIGHT is 0 or the lookup fails: it is an
+    extra signal, and ranking goes on without it.
+    """
+    if settings.COOCCURRENCE_WEIGHT <= 0:
+        return {}
+    try:
+        return cooccurrence_index.related(user_id, COOCCURRENCE_CANDIDATES, excluded_ids)
+    except Exception as e:
+        logger.error(f"Co-occurrence lookup failed: {e}")
+        return {}
+
+def _blend(scores: np.ndarray, articles, affinity) -> np.ndarray:
+    """Adds the weighted co-occurrence affinity to the content scores."""
+    if not affinity:
+        return scores
+    return scores + settings.COOCCURRENCE_WEIGHT * np.array([affinity.get(a.id, 0.0) for a in articles])
+
+def _hydrate(db: Session, rows):
+    """Loads display fields for the selected rows in one query, keeping their order."""
+    return load_feed_items(db, [row.id for row in rows])
+
+def _cached_results(user_id: int, excluded_ids, limit: int):
+    with _result_cache_lock:
+        items = _result_cache.get(user_id, [])
+    return [
+        item for item in items
+        if item.id not in excluded_ids and (item.cluster_id or item.id) not in excluded_ids
+    ][:limit]
+
+def _finish(articles, tier: str, deadline: Deadline, user_id: int, record: bool = True):
+    if not record:
+        return Recommendations(articles, tier)
+    metrics.incr("recommend_tier", tier)
+    metrics.observe("recommend", deadline.elapsed_ms())
+    if tier not in ("full", "cold_start"):
+        logger.warning(f"Served {tier} recommendations for user {user_id} after {deadline.elapsed_ms():.0f} ms")
+    return Recommendations(articles, tier)
+
+def _degrade(db: Session, user_id: int, interacted_ids, limit: int, deadline: Deadline, record: bool = True):
+    """Last tiers: the user's previous list, then the shared cold-start feed."""
+    cached = _cached_results(user_id, interacted_ids, limit)
+    if cached:
+        return _finish(cached, "cached", deadline, user_id, record)
+    try:
+        # Only rebuild the shared feed if there is none yet: the DB may be what is slow
+        fallback = cold_start_feed.get(db, interacted_ids, limit, refresh=not cold_start_feed.ready)
+    except Exception as e:
+        logger.error(f"Cold-start fallback failed: {e}")
+        fallback = []
+    return _finish(fallback, "fallback", deadline, user_id, record)
+
+def degraded_recommendations(user_id: int, limit: int = 10):
+    """
+    The last tiers of `recommend_articles` (the user's previous list, then the
+    shared cold-start feed) without ranking, for a request whose budget ran
+    out before it could rank, e.g. one that waited on a concurrent ranking.
+    """
+    deadline = Deadline(None)
+    db = SessionLocal()
+    interacted_ids = set()
+    try:
+        interacted_ids = seen_article_ids(db, user_id)
+        interacted_ids |= _story_keys(db, interacted_ids)
+    except Exception as e:
+        logger.error(f"Error reading seen articles for the fallback: {e}")
+        db.rollback()
+    try:
+        return _degrade(db, user_id, interacted_ids, limit, deadline)
+    finally:
+        db.close()
+
+def shed_recommendations(user_id: int, limit: int) -> Recommendations:
+    """
+    For requests turned away by admission control: the user's last list,
+    else the current cold-start feed, both from memory (no DB access, so
+    seen articles are not filtered). Empty if neither is available.
+    """
+    cached = _cached_results(user_id, (), limit)
+    if cached:
+        tier = "cached"
+    else:
+        cached = cold_start_feed.get(None, (), limit, refresh=False)
+        tier = "shed"
+    metrics.incr("recommend_tier", tier)
+    return Recommendations(cached, tier)
+
+def _limit_statement_time(db: Session, deadline: Deadline):
+    """Caps how long PostgreSQL may spend on the remaining queries of this transaction."""
+    if deadline.budget_ms is None or db.get_bind().dialect.name != "postgresql":
+        return
+    db.execute(text(f"SET LOCAL statement_timeout = {max(1, int(deadline.remaining_ms()))}"))
+
+def score_candidates(embeddings: np.ndarray, user_vec: np.ndarray, age_hours: np.ndarray) -> np.ndarray:
+    """Relevance (cosine similarity) boosted by recency; NaN for rows without an embedding."""
+    similarities = embeddings @ user_vec / (
+        np.linalg.norm(embeddings, axis=1) * np.linalg.norm(user_vec) + 1e-9
+    )
+    recency_decay = 1.0 / (1.0 + (age_hours / 24.0))
+    return similarities * (1 + (recency_decay * 0.5))
+
+def mmr_select(embeddings: np.ndarray, scores: np.ndarray, sources, limit: int,
+               seed_embeddings: np.ndarray = None, seed_sources=(), deadline: Deadline = None):
+    """
+    MMR-style diversity selection: picks up to `limit` candidates, balancing
+    relevance with novelty (distance from what was picked before) and
+    penalizing repeated sources. Seeds (e.g. trending articles) count as
+    already picked. Returns (candidate indexes in pick order, finished);
+    `finished` is False if the deadline cut MMR short and the rest were
+    filled in plain score order.
+    """
+    LAMBDA_DIVERSITY = 0.3  # 0 = pure relevance, 1 = pure diversity
+    SOURCE_PENALTY = 0.15  # Penalty for consecutive same-source articles
+    
+    # Sources as indexes so the per-source penalty is one array lookup
+    source_index = {}
+    for source in list(seed_sources) + list(sources):
+        source_index.setdefault((source or '').lower(), len(source_index))
+    candidate_sources = np.array([source_index[(s or '').lower()] for s in sources], dtype=np.intp)
+    source_counts = np.zeros(len(source_index))
+    norms = np.linalg.norm(embeddings, axis=1)
+    
+    # Each candidate's max similarity to anything selected so far, updated
+    # with one mat-vec product per pick instead of rescanning all picks
+    max_sim_to_selected = np.full(len(scores), -np.inf)
+    
+    def absorb(vec):
+        sims = embeddings @ vec / (norms * np.linalg.norm(vec) + 1e-9)
+        np.maximum(max_sim_to_selected, sims, out=max_sim_to_selected)
+    
+    if seed_embeddings is not None:
+        for vec in seed_embeddings:
+            if not np.isnan(vec[0]):
+                absorb(vec)
+    for source in seed_sources:
+        source_counts[source_index[(source or '').lower()]] += 1
+    
+    picks = []
+    available = np.ones(len(scores), dtype=bool)
+    while len(picks) < limit and available.any():
+        if deadline is not None and not deadline.has(MMR_MIN_MS):
+            order = np.argsort(-np.where(available, scores, -np.inf), kind="stable")
+            picks.extend(int(i) for i in order[:limit - len(picks)] if available[i])
+            return picks, False
+        
+        # Diversity term is 0 until something has been selected
+        diversity = max_sim_to_selected if np.isfinite(max_sim_to_selected).any() else 0.0
+        mmr_scores = (1 - LAMBDA_DIVERSITY) * scores - LAMBDA_DIVERSITY * diversity
+        mmr_scores = mmr_scores - SOURCE_PENALTY * source_counts[candidate_sources]
+        mmr_scores[~available] = -np.inf
+        
+        best = int(np.argmax(mmr_scores))
+        available[best] = False
+        picks.append(best)
+        absorb(embeddings[best])
+        source_counts[candidate_sources[best]] += 1
+    return picks, True
+
+def recommend_articles(user_id: int, limit: int = 10, candidates: int = 50, deadline_ms: float = None,
+                       record: bool = True):
     """
     Returns top-k recommended articles using semantic search + recency re-ranking.
     Filters out articles the user has already interacted with (deduplication).
     Applies MMR-style diversity to avoid filter bubbles.
     Applies source variety penalty to avoid publisher dominance.
     Injects trending/breaking news regardless of user profile.
+    Near-duplicate stories are folded to one article per cluster.
+    Articles that readers of the user's recent reads also read are added to
+    the candidates, and that affinity is blended into the score (see cooccurrence.py).
+    Users without a profile get the shared cold-start feed (see cold_start.py).
+
+    With `deadline_ms`, each stage checks the remaining budget and degrades
+    step by step (fewer candidates, no MMR, the user's cached list, the shared
+    cold-start feed). Errors degrade the same way instead of returning [].
+    The result is a `Recommendations` list whose `tier` says what served it.
+    With `record=False` (warmup) the user's cached list and the
+    recommend_tier/recommend metrics are left untouched.
     """
+    deadline = Deadline(deadline_ms)
     db = SessionLocal()
+    interacted_ids = set()
     try:
         user = db.query(User).filter(User.id == user_id).first()
         now = datetime.datetime.utcnow()
         
         # Get article IDs the user has already interacted with (for deduplication)
-        interacted_ids = set(
-            i.article_id for i in 
-            db.query(Interaction.article_id).filter(Interaction.user_id == user_id).all()
-        )
+        interacted_ids = seen_article_ids(db, user_id)
+        # Plus the stories they belong to, so a story read under another link is skipped too
+        interacted_ids |= _story_keys(db, interacted_ids)
+        
+        if not user or user.user_embedding is None:
+            # Cold start: shared fresh + popular feed, minus what this user has seen
+            logger.info(f"Cold start for user {user_id}")
+
+            def latest_unseen():
+                query = db.query(*FEED_ITEM_COLUMNS).order_by(Article.published_date.desc())
+                if interacted_ids:
+                    query = query.filter(~Article.id.in_(interacted_ids))
+                return [FeedItem(*r) for r in _fold_clusters(query.limit(limit * 2).all(), interacted_ids)[:limit]]
+
+            return _finish(
+                cold_start_feed.get(db, interacted_ids, limit, fallback=latest_unseen), "cold_start", deadline, user_id,
+                record,
+            )
+        
+        if not deadline.has(SEARCH_MIN_MS):
+            return _degrade(db, user_id, interacted_ids, limit, deadline, record)
+        affinity = _cooccurrence_affinity(user_id, interacted_ids)
+        tier = "full"
+        if not deadline.has(FULL_SEARCH_MS):
+            candidates = max(limit, candidates // 2)
+            tier = "reduced"
+        _limit_statement_time(db, deadline)
         
         # === TRENDING OVERRIDE ===
         # Reserve slots for breaking news (< 6 hours old) regardless of similarity
@@ -106,124 +444,112 @@ def recommend_articles(user_id: int, limit: int = 10, candidates: int = 50):
         TRENDING_HOURS = 6  # Articles less than this many hours old qualify
         
         trending_cutoff = now - datetime.timedelta(hours=TRENDING_HOURS)
-        trending_query = db.query(Article).filter(
+        trending_query = db.query(*_scoring_columns(db)).filter(
             Article.published_date >= trending_cutoff
         ).order_by(Article.published_date.desc())
         
         if interacted_ids:
             trending_query = trending_query.filter(~Article.id.in_(interacted_ids))
         
-        trending_articles = trending_query.limit(TRENDING_SLOTS).all()
+        # Over-fetch so folding copies of the same story still fills the slots
+        trending_articles = _fold_clusters(
+            trending_query.limit(TRENDING_SLOTS * 3).all(), interacted_ids
+        )[:TRENDING_SLOTS]
         trending_ids = {a.id for a in trending_articles}
+        trending_clusters = {a.cluster_id or a.id for a in trending_articles}
         
         if trending_articles:
             logger.info(f"Injecting {len(trending_articles)} trending articles for user {user_id}")
         
-        if not user or user.user_embedding is None:
-            # Cold start: return latest articles (excluding already seen)
-            logger.info(f"Cold start for user {user_id}")
-            query = db.query(Article).order_by(Article.published_date.desc())
-            if interacted_ids:
-                query = query.filter(~Article.id.in_(interacted_ids))
-            return query.limit(limit).all()
-        
         # 1. Candidate Generation: Get top N articles by semantic similarity
         # pgvector uses <=> for cosine distance (lower is better)
         # Exclude already interacted articles AND trending (we'll add those separately)
-        query = db.query(Article)
-        if interacted_ids:
-            query = query.filter(~Article.id.in_(interacted_ids))
-        if trending_ids:
-            query = query.filter(~Article.id.in_(trending_ids))
-        similar_articles = query.order_by(
-            Article.embedding.cosine_distance(user.user_embedding)
-        ).limit(candidates).all()
-        
-        # 2. Score each article (relevance + recency)
-        user_vec = np.array(user.user_embedding)
-        
-        scored_candidates = []
-        for article in similar_articles:
-            art_vec = np.array(article.embedding)
-            
-            # Cosine similarity
-            similarity = np.dot(user_vec, art_vec) / (np.linalg.norm(user_vec) * np.linalg.norm(art_vec) + 1e-9)
-            
-            # Recency boost
-            age_hours = (now - article.published_date).total_seconds() / 3600
-            recency_decay = 1.0 / (1.0 + (age_hours / 24.0))
-            
-            base_score = similarity * (1 + (recency_decay * 0.5))
-            
-            scored_candidates.append({
-                'article': article,
-                'embedding': art_vec,
-                'score': base_score,
-                'source': (article.source or '').lower()
-            })
-        
-        # 3. MMR-style Diversity Selection
-        # Balance relevance with novelty (distance from already-selected items)
-        LAMBDA_DIVERSITY = 0.3  # 0 = pure relevance, 1 = pure diversity
-        SOURCE_PENALTY = 0.15  # Penalty for consecutive same-source articles
-        
-        # Start with trending articles (they get priority slots)
-        selected = list(trending_articles)
-        selected_embeddings = [np.array(a.embedding) for a in trending_articles if a.embedding is not None]
-        source_counts = {}
-        for a in trending_articles:
-            src = (a.source or '').lower()
-            source_counts[src] = source_counts.get(src, 0) + 1
-        
-        # Fill remaining slots with personalized + diverse articles
-        remaining_slots = limit - len(selected)
-        
-        while len(selected) < limit and scored_candidates:
-            best_idx = -1
-            best_mmr_score = float('-inf')
-            
-            for i, candidate in enumerate(scored_candidates):
-                relevance = candidate['score']
-                
-                # Diversity: max similarity to any already-selected article
-                if selected_embeddings:
-                    max_sim_to_selected = max(
-                        np.dot(candidate['embedding'], sel_emb) / 
-                        (np.linalg.norm(candidate['embedding']) * np.linalg.norm(sel_emb) + 1e-9)
-                        for sel_emb in selected_embeddings
-                    )
-                else:
-                    max_sim_to_selected = 0
-                
-                # MMR score: balance relevance and diversity
-                mmr_score = (1 - LAMBDA_DIVERSITY) * relevance - LAMBDA_DIVERSITY * max_sim_to_selected
-                
-                # Source variety penalty
-                source = candidate['source']
-                if source in source_counts and source_counts[source] > 0:
-                    mmr_score -= SOURCE_PENALTY * source_counts[source]
-                
-                if mmr_score > best_mmr_score:
-                    best_mmr_score = mmr_score
-                    best_idx = i
-            
-            if best_idx == -1:
-                break
-                
-            # Add best candidate to selected
-            best = scored_candidates.pop(best_idx)
-            selected.append(best['article'])
-            selected_embeddings.append(best['embedding'])
-            
-            # Update source count
-            source = best['source']
-            source_counts[source] = source_counts.get(source, 0) + 1
+        user_vec = np.asarray(user.user_embedding, dtype=np.float32)
+        projection = active_projection()
+        # Only the hot window by default: the recency boost makes older articles
+        # nearly worthless, and the search should not pay for the whole history
+        window_start = now - datetime.timedelta(days=settings.CANDIDATE_WINDOW_DAYS)
+        while True:
+            search_vec = projection.project(user_vec) if projection is not None else user_vec
+            if projection is None and exact_scorer.processes > 0:
+                similar_articles = _exact_candidates(
+                    db, user_vec, interacted_ids | trending_ids, window_start, candidates
+                )
+                if len(similar_articles) >= limit:
+                    break
+            query = db.query(*_scoring_columns(db, projection))
+            if interacted_ids:
+                query = query.filter(~Article.id.in_(interacted_ids))
+            if trending_ids:
+                query = query.filter(~Article.id.in_(trending_ids))
+            if projection is not None:
+                query = query.filter(Article.projection_version == projection.version).order_by(
+                    Article.embedding_proj.cosine_distance(search_vec.tolist())
+                )
+            else:
+                query = query.order_by(Article.embedding.cosine_distance(user.user_embedding))
+            similar_articles = query.filter(Article.published_date >= window_start).limit(candidates).all()
+            if len(similar_articles) < limit:
+                # Quiet period (or a very active reader): widen to the full history
+                similar_articles = query.limit(candidates).all()
+            if projection is not None and len(similar_articles) < limit:
+                projection = None  # Projected vectors not written yet: search at full width
+                continue
+            break
+        # "Readers also read" candidates the similarity search did not return
+        found_ids = {a.id for a in similar_articles}
+        extra_ids = [i for i in affinity if i not in found_ids and i not in trending_ids]
+        if extra_ids:
+            query = db.query(*_scoring_columns(db, projection)).filter(Article.id.in_(extra_ids))
+            if projection is not None:
+                query = query.filter(Article.projection_version == projection.version)
+            similar_articles = list(similar_articles) + query.all()
+        # Copies of the same story would crowd the list; keep the closest one,
+        # and drop stories the user already read under another link
+        similar_articles = _fold_clusters(similar_articles, interacted_ids | trending_clusters)
+        
+        # 2. Score each article (relevance + recency), all candidates at once
+        dims = projection.dims if projection is not None else EMBEDDING_DIM
+        embeddings = decode_vectors([a.embedding for a in similar_articles], dim=dims)
+        age_hours = np.array([(now - a.published_date).total_seconds() / 3600 for a in similar_articles])
+        scores = _blend(score_candidates(embeddings, search_vec, age_hours), similar_articles, affinity)
+        
+        keep = ~np.isnan(scores)  # Articles without an embedding can't be scored
+        candidate_articles = [a for a, k in zip(similar_articles, keep) if k]
+        embeddings, scores = embeddings[keep], scores[keep]
+        
+        # 3. MMR-style Diversity Selection, after the trending articles (they get priority slots)
+        slots = limit - len(trending_articles)
+        trending_vecs = decode_vectors([a.embedding for a in trending_articles])
+        picks, finished = mmr_select(
+            embeddings, scores, [a.source for a in candidate_articles],
+            int(np.ceil(slots * PROJECTED_SHORTLIST_FACTOR)) if projection is not None else slots,
+            seed_embeddings=projection.project(trending_vecs) if projection is not None else trending_vecs,
+            seed_sources=[a.source for a in trending_articles],
+            deadline=deadline,
+        )
+        shortlist = [candidate_articles[i] for i in picks]
+        if projection is not None and finished and shortlist:
+            # Only the shortlist is compared at full precision
+            shortlist, finished = _rescore_full(
+                db, shortlist, user_vec, trending_articles, trending_vecs, slots, now, deadline, affinity
+            )
+        shortlist = shortlist[:slots]
+        if not finished:
+            tier = "no_mmr"  # Out of budget: the rest came in plain score order
+        selected = list(trending_articles) + shortlist
+        
+        # 4. Display fields for the final list only
+        selected = _hydrate(db, selected)
         
         logger.info(f"Recommended {len(selected)} articles for user {user_id} ({len(trending_articles)} trending)")
-        return selected
+        if record:
+            _remember(user_id, selected)
+        return _finish(selected, tier, deadline, user_id, record)
         
     except Exception as e:
         logger.error(f"Error getting recommendations: {e}")
-        return []
+        db.rollback()
+        return _degrade(db, user_id, interacted_ids, limit, deadline, record)
     finally:
         db.close()
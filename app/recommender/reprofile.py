@@ -0,0 +1,115 @@
+"""
+Bulk re-profiling.
+
+`build_user_embedding` only runs when a user interacts, so the time decay in
+an inactive user's profile stays frozen at its last rebuild. `reprofile_users`
+recomputes every profile with the same weights, a chunk of users at a time:
+one query for the chunk's events (compacted aggregates plus the raw tail),
+one for the embeddings of the distinct articles they touch, then a weighted
+mean per user from a single NumPy segment reduction (np.add.reduceat over the
+user-sorted events) and one executemany UPDATE for the whole chunk.
+"""
+import datetime
+from typing import Dict, Optional
+import numpy as np
+from sqlalchemy import update, bindparam
+from sqlalchemy.orm import Session
+from app.storage.models import User, Article
+from app.storage.vectors import vector_column, decode_vectors
+from app.storage.archive import archived_embeddings
+from app.storage.changefeed import publish, PROFILES
+from app.recommender.interactions import chunk_profile_events
+from app.recommender.ranker import INTERACTION_WEIGHTS, DECAY_RATE
+from app.utils.logger import setup_logger
+
+logger = setup_logger("reprofile")
+
+USERS_PER_CHUNK = 500  # Bounds the (events x 384) matrix held per chunk
+
+
+def _article_embeddings(db: Session, article_ids: np.ndarray) -> np.ndarray:
+    """Embeddings for `article_ids` (sorted, unique) in the same order; NaN rows where there are none."""
+    rows = db.query(Article.id, vector_column(Article.embedding, db)).filter(
+        Article.id.in_(article_ids.tolist())
+    ).all()
+    found = decode_vectors([row.embedding for row in rows])
+    embeddings = np.full((len(article_ids), found.shape[1]), np.nan, dtype=np.float32)
+    if rows:
+        embeddings[np.searchsorted(article_ids, [row.id for row in rows])] = found
+
+    missing = article_ids[np.isnan(embeddings[:, 0])]
+    if len(missing):
+        # Old stories keep their embedding in the archive
+        for article_id, vec in archived_embeddings(db, missing.tolist()).items():
+            embeddings[np.searchsorted(article_ids, article_id)] = vec
+    return embeddings
+
+
+def chunk_profiles(db: Session, first_user_id: int, last_user_id: int,
+                   now: datetime.datetime) -> Dict[int, np.ndarray]:
+    """Profiles of the users in [first_user_id, last_user_id] that have any weighted history."""
+    events = chunk_profile_events(db, first_user_id, last_user_id, DECAY_RATE, now)
+    if not events:
+        return {}
+
+    users = np.fromiter((e[0] for e in events), dtype=np.int64, count=len(events))
+    articles = np.fromiter((e[1] for e in events), dtype=np.int64, count=len(events))
+    weights = np.fromiter(
+        (INTERACTION_WEIGHTS.get(e[2], 1.0) * e[3] for e in events), dtype=np.float64, count=len(events)
+    )
+
+    article_ids, article_rows = np.unique(articles, return_inverse=True)
+    embeddings = _article_embeddings(db, article_ids)
+    keep = ~np.isnan(embeddings[article_rows, 0])
+    if not keep.any():
+        return {}
+    users, article_rows, weights = users[keep], article_rows[keep], weights[keep]
+
+    order = np.argsort(users, kind="stable")
+    users, article_rows, weights = users[order], article_rows[order], weights[order]
+    starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+
+    sums = np.add.reduceat(embeddings[article_rows] * weights[:, None], starts, axis=0)
+    totals = np.add.reduceat(weights, starts)
+    valid = totals != 0
+    means = sums[valid] / totals[valid, None]
+    return dict(zip(users[starts][valid].tolist(), means))
+
+
+def reprofile_users(db: Session, users_per_chunk: int = USERS_PER_CHUNK,
+                    now: Optional[datetime.datetime] = None) -> Dict:
+    """
+    Recomputes every user's profile at `now`, committing one chunk of users at
+    a time. Users without weighted history keep their current profile.
+    """
+    now = now or datetime.datetime.utcnow()
+    statement = update(User.__table__).where(User.__table__.c.id == bindparam("user_id")).values(
+        user_embedding=bindparam("embedding"),
+        profile_version=User.__table__.c.profile_version + 1,  # Invalidates ranked sessions
+    )
+
+    stats = {"users": 0, "updated": 0, "chunks": 0}
+    last_id = 0
+    while True:
+        ids = [user_id for (user_id,) in db.query(User.id).filter(User.id > last_id)
+               .order_by(User.id).limit(users_per_chunk).all()]
+        if not ids:
+            break
+        profiles = chunk_profiles(db, ids[0], ids[-1], now)
+        try:
+            if profiles:
+                db.execute(statement, [
+                    {"user_id": user_id, "embedding": mean.tolist()} for user_id, mean in profiles.items()
+                ])
+                publish(db, PROFILES, profiles)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        last_id = ids[-1]
+        stats["users"] += len(ids)
+        stats["updated"] += len(profiles)
+        stats["chunks"] += 1
+        if stats["chunks"] % 20 == 0:
+            logger.info(f"Re-profiled {stats['updated']} of {stats['users']} users so far")
+    return stats
@@ -0,0 +1,241 @@
+"""
+Server-side ranked sessions for cursor-paginated recommendations.
+
+The first page is ranked at the requested size, within the request's
+deadline. The session then is filled to SESSION_DEPTH articles by a ranking
+run after the response is sent, on its own budget (SESSION_FILL_DEADLINE_MS);
+a next page asked for before that finishes waits for it. Later pages slice
+the stored ids, skipping anything the user has interacted with since, and
+only load display fields for the page itself.
+
+Cursors are opaque, HMAC-signed tokens naming the session, the offset and
+the user. A cursor stops working when its session expires or is evicted, or
+when the corpus epoch has moved on or the user's profile was rebuilt for
+another reason than their own interactions: each logged interaction bumps the
+seen version and rebuilds the profile once, and the pages already skip what
+the user interacted with, so those rebuilds keep the session. The session is
+stamped with the versions read before ranking, so an interaction logged while
+the list was ranked counts as one of the session's own.
+Sessions live in process memory, bounded by MAX_SESSIONS and SESSION_TTL_SECONDS,
+so the API runs a single worker per instance (see DEPLOY.md).
+"""
+import hmac
+import time
+import base64
+import hashlib
+import secrets
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.recommender.cold_start import load_feed_items
+from app.recommender.versions import RecommendationVersion, recommendation_version
+from app.storage.models import Interaction
+from app.utils.config import settings
+
+SESSION_DEPTH = 100         # Articles ranked for paging after the first page
+SESSION_FILL_DEADLINE_MS = 1000  # Budget of that deeper ranking, off the request path
+SESSION_TTL_SECONDS = 1800
+MAX_SESSIONS = 10000        # ~0.5 KB each: ids are stored as a packed int array
+_SIGNATURE_BYTES = 16
+
+
+class InvalidCursor(Exception):
+    """The cursor is malformed, expired, or no longer matches the data it was ranked on."""
+
+
+class RankedSession(NamedTuple):
+    user_id: int
+    article_ids: array
+    corpus_epoch: int
+    profile_version: int
+    seen_version: int
+    tier: str
+    created_at: float
+    filled: bool = True
+
+
+class Page(NamedTuple):
+    items: List
+    next_cursor: Optional[str]
+    tier: str
+    session_id: Optional[str] = None  # Set when the session still has to be filled
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _unb64(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(settings.JWT_SECRET.encode(), payload, hashlib.sha256).digest()[:_SIGNATURE_BYTES]
+
+
+def encode_cursor(session_id: str, offset: int, user_id: int) -> str:
+    payload = f"{session_id}:{offset}:{user_id}".encode()
+    return f"{_b64(payload)}.{_b64(_sign(payload))}"
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int, int]:
+    """Returns (session_id, offset, user_id); raises InvalidCursor if tampered with."""
+    try:
+        payload_part, signature_part = cursor.split(".")
+        payload = _unb64(payload_part)
+        if not hmac.compare_digest(_unb64(signature_part), _sign(payload)):
+            raise InvalidCursor("Invalid cursor")
+        session_id, offset, user_id = payload.decode().split(":")
+        return session_id, int(offset), int(user_id)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor("Invalid cursor")
+
+
+class SessionStore:
+    """Bounded LRU of ranked sessions with a TTL."""
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, ttl_seconds: float = SESSION_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.ttl = ttl_seconds
+        self._sessions: "OrderedDict[str, RankedSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def put(self, session: RankedSession) -> str:
+        session_id = _b64(secrets.token_bytes(12))
+        with self._lock:
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session_id
+
+    def get(self, session_id: str) -> Optional[RankedSession]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if time.monotonic() - session.created_at > self.ttl:
+                del self._sessions[session_id]
+                return None
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def replace(self, session_id: str, session: RankedSession):
+        """Updates a stored session in place; a session that expired or was evicted stays gone."""
+        with self._lock:
+            if session_id in self._sessions:
+                self._sessions[session_id] = session
+
+
+class RecommendationSessions:
+    def __init__(self, store: Optional[SessionStore] = None):
+        self.store = store if store is not None else SessionStore()
+        self._filling: Dict[str, threading.Event] = {}
+        self._filling_lock = threading.Lock()
+
+    def first_page(self, db: Session, user_id: int, articles: Iterable, limit: int,
+                   version: Optional[RecommendationVersion] = None, fill_later: bool = False) -> Page:
+        """
+        Stores the ranked list and returns its first `limit` articles.
+        `version` should be read before ranking; without it the current one is used.
+        With `fill_later`, a full first page gets a session even if nothing
+        follows it yet: pass the page's session_id to `fill` with the deeper list.
+        """
+        tier = getattr(articles, "tier", None) or "full"
+        articles = list(articles)
+        page = articles[:limit]
+        pending = fill_later and len(articles) == limit
+        if len(articles) <= limit and not pending:
+            return Page(page, None, tier)
+
+        version = version or recommendation_version(db, user_id)
+        session = RankedSession(
+            user_id=user_id,
+            article_ids=array("q", (a.id for a in articles)),
+            corpus_epoch=version.corpus_epoch,
+            profile_version=version.profile_version,
+            seen_version=version.seen_version,
+            tier=tier,
+            created_at=time.monotonic(),
+            filled=not pending,
+        )
+        session_id = self.store.put(session)
+        if not pending:
+            return Page(page, encode_cursor(session_id, limit, user_id), tier)
+        with self._filling_lock:
+            self._filling[session_id] = threading.Event()
+        return Page(page, encode_cursor(session_id, limit, user_id), tier, session_id)
+
+    def fill(self, session_id: str, rank: Callable[[], Iterable]):
+        """
+        Appends the deeper ranking `rank()` returns to a session, after the
+        articles its first page showed; wakes any next page waiting for it.
+        """
+        try:
+            session = self.store.get(session_id)
+            if session is None:
+                return
+            articles = rank()
+            shown = set(session.article_ids)
+            ids = array("q", session.article_ids)
+            ids.extend(a.id for a in articles if a.id not in shown)
+            self.store.replace(session_id, session._replace(
+                article_ids=ids, tier=getattr(articles, "tier", None) or session.tier, filled=True,
+            ))
+        finally:
+            with self._filling_lock:
+                event = self._filling.pop(session_id, None)
+            if event:
+                event.set()
+
+    def _wait_for_fill(self, session_id: str, session: RankedSession) -> RankedSession:
+        if session.filled:
+            return session
+        with self._filling_lock:
+            event = self._filling.get(session_id)
+        if event:
+            event.wait(SESSION_FILL_DEADLINE_MS / 1000)
+        session = self.store.get(session_id)
+        if session is None or not session.filled:
+            raise InvalidCursor("Recommendations are not ready; start from the first page")
+        return session
+
+    def next_page(self, db: Session, cursor: str, user_id: int, limit: int) -> Page:
+        """Slices the next `limit` unseen articles from the session the cursor points at."""
+        session_id, offset, cursor_user = decode_cursor(cursor)
+        if cursor_user != user_id:
+            raise InvalidCursor("Cursor belongs to another user")
+        session = self.store.get(session_id)
+        if session is None:
+            raise InvalidCursor("Cursor expired")
+        session = self._wait_for_fill(session_id, session)
+        version = recommendation_version(db, user_id)
+        # At most one rebuild per interaction logged since: those are the session's own
+        own_rebuilds = version.seen_version - session.seen_version
+        if (version.corpus_epoch != session.corpus_epoch
+                or version.profile_version - session.profile_version > own_rebuilds):
+            raise InvalidCursor("Recommendations changed; start from the first page")
+
+        ids = session.article_ids
+        seen = {
+            article_id for (article_id,) in db.query(Interaction.article_id).filter(
+                Interaction.user_id == user_id, Interaction.article_id.in_(list(ids[offset:]))
+            ).all()
+        } if offset < len(ids) else set()
+
+        page_ids = []
+        position = offset
+        while position < len(ids) and len(page_ids) < limit:
+            if ids[position] not in seen:
+                page_ids.append(ids[position])
+            position += 1
+
+        next_cursor = encode_cursor(session_id, position, user_id) if position < len(ids) else None
+        return Page(load_feed_items(db, page_ids), next_cursor, session.tier)
+
+
+recommendation_sessions = RecommendationSessions()
@@ -0,0 +1,43 @@
+"""
+Version stamps that tell when a ranked list may be out of date.
+
+- corpus epoch: the newest article id; it moves whenever ingestion saves articles.
+- profile version: users.profile_version, bumped each time the user's
+  embedding is rebuilt.
+- seen version: users.seen_version, bumped with every logged interaction
+  (the set of articles to exclude changed).
+"""
+from typing import NamedTuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.storage.models import Article, User
+
+
+class RecommendationVersion(NamedTuple):
+    profile_version: int
+    seen_version: int
+    corpus_epoch: int
+
+    @property
+    def etag(self) -> str:
+        """Strong HTTP validator for a ranked list computed at this version."""
+        return f'"{self.profile_version}.{self.seen_version}.{self.corpus_epoch}"'
+
+
+def corpus_epoch(db: Session) -> int:
+    return db.query(func.max(Article.id)).scalar() or 0
+
+
+def profile_version(db: Session, user_id: int) -> int:
+    return db.query(User.profile_version).filter(User.id == user_id).scalar() or 0
+
+
+def recommendation_version(db: Session, user_id: int) -> RecommendationVersion:
+    """All three stamps in one query: the user's row by primary key and max(articles.id) off its index."""
+    epoch = select(func.max(Article.id)).scalar_subquery()
+    row = db.query(User.profile_version, User.seen_version, epoch.label("corpus_epoch")).filter(
+        User.id == user_id
+    ).first()
+    if row is None:
+        return RecommendationVersion(0, 0, corpus_epoch(db))  # No user row yet (anonymous feed)
+    return RecommendationVersion(row.profile_version or 0, row.seen_version or 0, row.corpus_epoch or 0)
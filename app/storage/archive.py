@@ -0,0 +1,83 @@
+"""
+Hot/cold split for articles.
+
+Article rows are never deleted (interactions reference them), but once an
+article is older than the retention window its bulky columns (content and
+the embedding) move to `articles_archive` and are cleared on the hot row,
+along with its projected and next-model vectors, so no search matches it.
+The hot table, its vector scans and its published_date sorts then stay
+roughly the size of the retention window however long the archive grows.
+"""
+import datetime
+from typing import Dict, List
+import numpy as np
+from sqlalchemy import insert, select, update, or_
+from sqlalchemy.orm import Session
+from app.storage.models import Article, ArticleArchive
+from app.storage.vectors import vector_column, decode_vectors
+from app.utils.logger import setup_logger
+
+logger = setup_logger("archive")
+
+ARCHIVE_BATCH_SIZE = 500
+
+
+def archive_articles(db: Session, older_than_days: int, batch_size: int = ARCHIVE_BATCH_SIZE,
+                     dry_run: bool = False) -> Dict:
+    """
+    Moves content and embeddings of articles published more than
+    `older_than_days` ago into articles_archive, one committed batch at a time.
+    Safe to re-run: archived rows no longer match.
+    """
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=older_than_days)
+    pending = db.query(Article.id).filter(
+        Article.published_date < cutoff,
+        or_(
+            Article.embedding.isnot(None), Article.content.isnot(None),
+            Article.embedding_proj.isnot(None), Article.embedding_next.isnot(None),
+        ),
+    ).order_by(Article.id)
+
+    stats = {"cutoff": cutoff.isoformat(), "archived": 0, "batches": 0}
+    if dry_run:
+        stats["would_archive"] = pending.count()
+        return stats
+
+    while True:
+        ids = [article_id for (article_id,) in pending.limit(batch_size).all()]
+        if not ids:
+            break
+        try:
+            db.execute(
+                insert(ArticleArchive).from_select(
+                    ["article_id", "content", "embedding"],
+                    select(Article.id, Article.content, Article.embedding).where(
+                        Article.id.in_(ids),
+                        # Rows archived before projected vectors were cleared too only need clearing
+                        Article.id.notin_(select(ArticleArchive.article_id)),
+                    ),
+                )
+            )
+            db.execute(update(Article).where(Article.id.in_(ids)).values(
+                content=None, embedding=None, embedding_proj=None, projection_version=None, embedding_next=None,
+            ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        stats["archived"] += len(ids)
+        stats["batches"] += 1
+        logger.info(f"Archived {stats['archived']} articles so far")
+
+    return stats
+
+
+def archived_embeddings(db: Session, article_ids: List[int]) -> Dict[int, np.ndarray]:
+    """Embeddings of archived articles, for the rare reader of old stories."""
+    if not article_ids:
+        return {}
+    rows = db.query(ArticleArchive.article_id, vector_column(ArticleArchive.embedding, db)).filter(
+        ArticleArchive.article_id.in_(article_ids)
+    ).all()
+    matrix = decode_vectors([row.embedding for row in rows])
+    return {row.article_id: vec for row, vec in zip(rows, matrix) if not np.isnan(vec[0])}
@@ -0,0 +1,177 @@
+"""
+Change notifications from writers (ingestion, backfill, profile rebuilds,
+logged interactions) to the in-process structures of the API workers
+(cold-start feed, exact search matrix, the ranker's cached per-user lists), so
+they update incrementally instead of polling.
+
+Writers call `publish(db, kind, ids)` before committing. On PostgreSQL that
+is a pg_notify in the writer's transaction: it is delivered on commit and
+dropped on rollback. Each API worker runs `change_feed.start()`, a thread
+that LISTENs on CHANNEL over its own connection and hands events to the
+handlers registered with `change_feed.subscribe`. On other databases (SQLite
+in tests and local runs) events are held on the session and go to this
+process's handlers after it commits (and are dropped on rollback), the same
+delivery NOTIFY gives: a handler never sees a change before it is readable.
+
+Notifications are not durable: whenever the listener (re)connects, handlers
+get a RESYNC event and should rebuild from the database.
+"""
+import select
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+from sqlalchemy import text, event as orm_event
+from sqlalchemy.orm import Session
+from app.storage.db import engine
+from app.utils.logger import setup_logger
+
+logger = setup_logger("changefeed")
+
+CHANNEL = "news_changes"
+MAX_PAYLOAD_BYTES = 7900       # PostgreSQL caps NOTIFY payloads just under 8000 bytes
+POLL_SECONDS = 5.0             # Listener wake-up interval (to notice stop())
+MAX_RECONNECT_SECONDS = 60.0
+
+ARTICLES = "articles"          # New or newly embedded articles; epoch = newest id
+PROFILES = "profiles"          # Users whose embedding was rebuilt (their cached lists are dropped)
+INTERACTIONS = "interactions"  # Articles that were just read (clicked or liked), one event per read
+RESYNC = "resync"              # Anything may have changed (missed events, embedding swap)
+
+_PENDING = "changefeed_pending"  # Session.info key of events waiting for the commit
+
+
+class Event(NamedTuple):
+    kind: str
+    ids: List[int]
+    epoch: int = 0
+
+
+def encode(event: Event) -> List[str]:
+    """Compact "kind:epoch:id,id,..." payloads, split so each fits in one NOTIFY."""
+    head = f"{event.kind}:{event.epoch}:"
+    payloads, ids, size = [], [], len(head)
+    for id in event.ids:
+        part = str(id)
+        if ids and size + len(part) + 1 > MAX_PAYLOAD_BYTES:
+            payloads.append(head + ",".join(ids))
+            ids, size = [], len(head)
+        ids.append(part)
+        size += len(part) + 1
+    payloads.append(head + ",".join(ids))
+    return payloads
+
+
+def decode(payload: str) -> Event:
+    kind, epoch, ids = payload.split(":", 2)
+    return Event(kind, [int(id) for id in ids.split(",") if id], int(epoch))
+
+
+class ChangeFeed:
+    def __init__(self, channel: str = CHANNEL):
+        self.channel = channel
+        self._handlers: Dict[str, List[Callable[[Event], None]]] = defaultdict(list)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.listening = False
+
+    def subscribe(self, kind: str, handler: Callable[[Event], None]):
+        """Calls `handler(event)` for every `kind` event (and for RESYNC)."""
+        self._handlers[kind].append(handler)
+
+    def dispatch(self, event: Event):
+        handlers = list(self._handlers.get(event.kind, ()))
+        if event.kind == RESYNC:
+            handlers = [h for kind, hs in self._handlers.items() for h in hs]
+        for handler in handlers:
+            try:
+                handler(event)
+            except Exception as e:
+                logger.error(f"Change handler {getattr(handler, '__qualname__', handler)} failed on {event.kind}: {e}")
+
+    def publish(self, db: Session, kind: str, ids: Iterable[int] = (), epoch: int = 0):
+        """Announces a change made in `db`'s current transaction; call before committing."""
+        event = Event(kind, sorted(set(ids)), epoch)
+        if event.kind != RESYNC and not event.ids:
+            return
+        if db.get_bind().dialect.name != "postgresql":
+            self._hold(db, event)
+            return
+        for payload in encode(event):
+            db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": payload})
+
+    def _hold(self, db: Session, event: Event):
+        """Queues `event` on the session until its transaction commits (see _after_commit)."""
+        db.info.setdefault(_PENDING, []).append((self, event))
+
+    def start(self, bind=None):
+        """Starts the LISTEN thread (PostgreSQL only; elsewhere delivery is already in-process)."""
+        bind = bind or engine
+        if bind.dialect.name != "postgresql":
+            logger.info("Change feed: in-process delivery only")
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, args=(bind,), name="changefeed", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=POLL_SECONDS + 1)
+            self._thread = None
+
+    def _listen(self, bind):
+        backoff = 1.0
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = bind.raw_connection()
+                conn.detach()  # Held for the process lifetime; don't take a pool slot
+                raw = conn.dbapi_connection
+                raw.autocommit = True
+                with raw.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.channel}")
+                self.listening = True
+                backoff = 1.0
+                logger.info(f"Listening for changes on {self.channel}")
+                self.dispatch(Event(RESYNC, []))  # Whatever happened while disconnected was missed
+                while not self._stop.is_set():
+                    if select.select([raw], [], [], POLL_SECONDS) == ([], [], []):
+                        continue
+                    raw.poll()
+                    while raw.notifies:
+                        notify = raw.notifies.pop(0)
+                        try:
+                            self.dispatch(decode(notify.payload))
+                        except ValueError:
+                            logger.warning(f"Ignoring malformed change payload: {notify.payload[:80]}")
+            except Exception as e:
+                logger.warning(f"Change feed connection lost: {e}; reconnecting in {backoff:.0f}s")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, MAX_RECONNECT_SECONDS)
+            finally:
+                self.listening = False
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+
+@orm_event.listens_for(Session, "after_commit")
+def _after_commit(db: Session):
+    for feed, event in db.info.pop(_PENDING, ()):
+        feed.dispatch(event)
+
+
+@orm_event.listens_for(Session, "after_soft_rollback")
+def _after_rollback(db: Session, previous_transaction):
+    db.info.pop(_PENDING, None)
+
+
+change_feed = ChangeFeed()
+
+
+def publish(db: Session, kind: str, ids: Iterable[int] = (), epoch: int = 0):
+    change_feed.publish(db, kind, ids, epoch)
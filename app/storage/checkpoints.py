@@ -0,0 +1,21 @@
+"""
+Progress markers for resumable maintenance jobs, stored in job_checkpoints.
+`set_checkpoint` only stages the change: commit it in the same transaction
+as the work it records, so a crash never leaves the two out of step.
+"""
+from sqlalchemy.orm import Session
+from app.storage.models import JobCheckpoint
+
+
+def get_checkpoint(db: Session, name: str) -> int:
+    """The saved position of job `name` (0 if it never ran)."""
+    checkpoint = db.get(JobCheckpoint, name)
+    return int(checkpoint.position) if checkpoint is not None else 0
+
+
+def set_checkpoint(db: Session, name: str, position: int):
+    checkpoint = db.get(JobCheckpoint, name)
+    if checkpoint is None:
+        checkpoint = JobCheckpoint(name=name)
+        db.add(checkpoint)
+    checkpoint.position = position
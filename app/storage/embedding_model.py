@@ -0,0 +1,51 @@
+"""
+Which embedding model the stored vectors come from.
+
+`articles.embedding` and `articles_archive.embedding` hold vectors of the
+active model. A re-embed fills the `embedding_next` columns under the model
+recorded as the next one, and `swap_embeddings` (app/ingestion/backfill.py)
+makes that model active in the transaction that swaps the vectors. Embedders
+look the active model up on every call (app/embeddings/backends.py), so
+ingestion follows a swap without a redeploy. Until the first swap the active
+model is settings.EMBEDDING_MODEL.
+"""
+from typing import Optional
+from sqlalchemy.orm import Session
+from app.storage.models import RuntimeSetting
+from app.utils.config import settings
+
+ACTIVE_MODEL = "embedding_model"
+NEXT_MODEL = "embedding_next_model"
+
+
+def _get(db: Session, name: str) -> Optional[str]:
+    setting = db.get(RuntimeSetting, name)
+    return setting.value if setting is not None else None
+
+
+def _set(db: Session, name: str, value: Optional[str]):
+    setting = db.get(RuntimeSetting, name)
+    if setting is None:
+        setting = RuntimeSetting(name=name)
+        db.add(setting)
+    setting.value = value
+
+
+def active_model(db: Session) -> str:
+    return _get(db, ACTIVE_MODEL) or settings.EMBEDDING_MODEL
+
+
+def next_model(db: Session) -> Optional[str]:
+    """The model the embedding_next columns are being filled with, if a re-embed started."""
+    return _get(db, NEXT_MODEL)
+
+
+def set_next_model(db: Session, model: str):
+    """Stages the re-embed's model; commit it with the first vectors it wrote."""
+    _set(db, NEXT_MODEL, model)
+
+
+def promote_next_model(db: Session):
+    """Stages the next model as the active one; commit it with the swapped vectors."""
+    _set(db, ACTIVE_MODEL, next_model(db))
+    _set(db, NEXT_MODEL, None)
@@ -0,0 +1,82 @@
+import hashlib
+import threading
+from contextlib import contextmanager
+from sqlalchemy import text
+from app.storage.db import engine
+from app.utils.logger import setup_logger
+
+logger = setup_logger("locks")
+
+# Fallback for databases without advisory locks (SQLite in tests/benchmarks):
+# only excludes other threads of this process
+_local_locks = {}
+_local_locks_guard = threading.Lock()
+
+
+class _LocalLock:
+    """Non-blocking shared/exclusive lock with advisory-lock semantics, for one process."""
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._shared = 0
+        self._exclusive = False
+
+    def acquire(self, shared: bool) -> bool:
+        with self._guard:
+            if self._exclusive or (not shared and self._shared):
+                return False
+            if shared:
+                self._shared += 1
+            else:
+                self._exclusive = True
+            return True
+
+    def release(self, shared: bool):
+        with self._guard:
+            if shared:
+                self._shared -= 1
+            else:
+                self._exclusive = False
+
+
+def lock_key(name: str) -> int:
+    """Stable signed 64-bit key for pg_advisory_lock derived from a lock name."""
+    return int.from_bytes(hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+@contextmanager
+def advisory_lock(name: str, bind=None, shared: bool = False):
+    """
+    Tries to take a cluster-wide PostgreSQL advisory lock without waiting.
+    Yields True if this process now holds it, False if someone else does.
+    A `shared` lock can be held by many at once, but not alongside the
+    exclusive one. The lock lives on a dedicated connection and is released
+    on exit (or by PostgreSQL if the process dies).
+    """
+    bind = bind or engine
+    if bind.dialect.name != "postgresql":
+        with _local_locks_guard:
+            lock = _local_locks.setdefault(name, _LocalLock())
+        acquired = lock.acquire(shared)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                lock.release(shared)
+        return
+
+    key = lock_key(name)
+    suffix = "_shared" if shared else ""
+    with bind.connect() as conn:
+        acquired = conn.execute(text(f"SELECT pg_try_advisory_lock{suffix}(:key)"), {"key": key}).scalar()
+        conn.commit()  # Session-level lock: survives the transaction
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                try:
+                    conn.execute(text(f"SELECT pg_advisory_unlock{suffix}(:key)"), {"key": key})
+                    conn.commit()
+                except Exception as e:
+                    # Closing the connection below releases it anyway
+                    logger.warning(f"Failed to release advisory lock {name}: {e}")
+                    conn.invalidate()
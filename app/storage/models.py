@@ -1,5 +1,5 @@
 import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, ForeignKey, Float, JSON
 from sqlalchemy.orm import relationship, mapped_column
 from pgvector.sqlalchemy import Vector
 from app.storage.db import Base
@@ -13,8 +13,23 @@ class Article(Base):
     link = Column(String, unique=True, nullable=False)
     image_url = Column(String, nullable=True) # Added image_url just in case
     source = Column(String, nullable=True)
-    published_date = Column(DateTime, default=datetime.datetime.utcnow)
-    embedding = mapped_column(Vector(384)) # MiniLM uses 384 dimensions
+    published_date = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+    embedding = mapped_column(Vector(384)) # MiniLM uses 384 dimensions; NULL once archived
+    embedding_next = mapped_column(Vector(384), nullable=True) # Filled while re-embedding under a new model, then swapped in
+    embedding_proj = mapped_column(Vector(), nullable=True) # Reduced-dimension copy (see app/recommender/projection.py)
+    projection_version = Column(String, nullable=True) # Projection model that produced embedding_proj
+    simhash = Column(BigInteger, nullable=True) # 64-bit SimHash of title + content
+    cluster_id = Column(Integer, nullable=True, index=True) # id of the first article of the same story
+
+class ArticleArchive(Base):
+    """Content and embeddings of cold articles, moved out of the hot `articles` rows."""
+    __tablename__ = "articles_archive"
+
+    article_id = Column(Integer, ForeignKey("articles.id"), primary_key=True)
+    content = Column(Text, nullable=True)
+    embedding = mapped_column(Vector(384), nullable=True)
+    embedding_next = mapped_column(Vector(384), nullable=True) # Re-embedded under the next model, swapped in with the hot rows
+    archived_at = Column(DateTime, default=datetime.datetime.utcnow)
 
 class User(Base):
     __tablename__ = "users"
@@ -24,15 +39,68 @@ class User(Base):
     full_name = Column(String, nullable=True)
     hashed_password = Column(String, nullable=False)
     user_embedding = mapped_column(Vector(384), nullable=True)
+    profile_version = Column(Integer, nullable=False, default=0, server_default="0") # Bumped on every profile rebuild
+    seen_version = Column(Integer, nullable=False, default=0, server_default="0") # Bumped on every logged interaction
 
 class Interaction(Base):
     __tablename__ = "interactions"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     article_id = Column(Integer, ForeignKey("articles.id"))
     interaction_type = Column(String) # 'click', 'like'
     timestamp = Column(DateTime, default=datetime.datetime.utcnow)
     
     user = relationship("User")
     article = relationship("Article")
+
+class InteractionAggregate(Base):
+    """Compacted interactions: one row per (user, article, type). See app/recommender/interactions.py."""
+    __tablename__ = "interaction_aggregates"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    article_id = Column(Integer, ForeignKey("articles.id"), primary_key=True)
+    interaction_type = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    last_seen = Column(DateTime, nullable=False, index=True)
+    decay_sum = Column(Float, nullable=False, default=0.0) # Sum of each event's time decay, measured at last_seen
+
+class InteractionArchive(Base):
+    """Raw interactions past the decay cutoff, after they were compacted."""
+    __tablename__ = "interactions_archive"
+
+    id = Column(Integer, primary_key=True) # Same id as in interactions
+    user_id = Column(Integer, nullable=True)
+    article_id = Column(Integer, nullable=True)
+    interaction_type = Column(String, nullable=True)
+    timestamp = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class JobCheckpoint(Base):
+    """Progress of resumable maintenance jobs (e.g. the last compacted interaction id)."""
+    __tablename__ = "job_checkpoints"
+
+    name = Column(String, primary_key=True)
+    position = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+class RuntimeSetting(Base):
+    """Values that maintenance jobs change at runtime and every process reads (e.g. the active embedding model)."""
+    __tablename__ = "runtime_settings"
+
+    name = Column(String, primary_key=True)
+    value = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(String(36), primary_key=True) # uuid4
+    status = Column(String, nullable=False, default="queued") # queued, running, succeeded, failed, skipped
+    stage = Column(String, nullable=True) # Current ingestion stage while running
+    feeds = Column(JSON, nullable=True)
+    stats = Column(JSON, nullable=True) # Counts and stage timings from ingest_feeds
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
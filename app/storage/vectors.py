@@ -0,0 +1,65 @@
+"""
+Fast reads of pgvector embeddings.
+
+By default an embedding arrives as text ("[0.1,0.2,...]") and pgvector's
+SQLAlchemy type parses it into a list of Python floats, which callers then
+copy again into NumPy. On PostgreSQL, `vector_column` selects the vector in
+pgvector's binary send format instead (uint16 dim, uint16 unused, then dim
+big-endian float32s), and `decode_vectors` writes each one straight into a
+preallocated float32 matrix: one byte-swapping copy per vector, no parsing.
+Other dialects (SQLite in tests and benchmarks) keep the regular column.
+"""
+from typing import Optional, Sequence
+import numpy as np
+from sqlalchemy import func, LargeBinary
+from sqlalchemy.orm import Session
+
+EMBEDDING_DIM = 384
+_HEADER_BYTES = 4
+
+
+def binary_vectors_supported(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def vector_column(column, db: Session, name: Optional[str] = None):
+    """
+    The embedding column to select: its binary form on PostgreSQL, else the column itself.
+    The result keeps the column's attribute name (or `name`).
+    """
+    label = name or column.key
+    if binary_vectors_supported(db):
+        return func.vector_send(column, type_=LargeBinary).label(label)
+    return column.label(label)
+
+
+def _check_binary(value, dim: int):
+    """Raises ValueError unless `value` is exactly one `dim`-dimensional binary vector."""
+    if len(value) != _HEADER_BYTES + 4 * dim:
+        raise ValueError(f"Expected a {dim}-dimensional binary vector ({_HEADER_BYTES + 4 * dim} bytes), "
+                         f"got {len(value)} bytes")
+    if int.from_bytes(value[:2], "big") != dim:
+        raise ValueError(f"Expected {dim}-dimensional vectors, got {int.from_bytes(value[:2], 'big')}")
+
+
+def decode_vectors(values: Sequence, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """
+    Stacks a result set's embeddings into an (n, dim) float32 matrix.
+    Accepts binary vectors from `vector_column` or already-decoded
+    lists/arrays, mixed freely. Missing embeddings (NULL) become rows of NaN.
+    Any vector that isn't `dim`-dimensional raises ValueError.
+    """
+    n = len(values)
+    matrix = np.empty((n, dim), dtype=np.float32)
+    for i, value in enumerate(values):
+        if value is None:
+            matrix[i] = np.nan
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            _check_binary(value, dim)
+            matrix[i] = np.frombuffer(value, dtype=">f4", count=dim, offset=_HEADER_BYTES)
+        else:
+            row = np.asarray(value, dtype=np.float32)
+            if row.shape != (dim,):
+                raise ValueError(f"Expected {dim}-dimensional vectors, got shape {row.shape}")
+            matrix[i] = row
+    return matrix
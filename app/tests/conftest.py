@@ -1,8 +1,11 @@
 
 import pytest
 from unittest.mock import MagicMock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from app.api.main import app
-from app.storage.db import get_db
+from app.storage.db import Base, get_db
 from fastapi.testclient import TestClient
 import numpy as np
 
@@ -12,6 +15,21 @@ def mock_db_session():
     session = MagicMock()
     return session
 
+# In-memory SQLite database with just the given models' tables:
+# sqlite_db(Article, Interaction) returns a sessionmaker bound to it.
+# One connection shared across threads; disposed after the test.
+@pytest.fixture
+def sqlite_db():
+    engines = []
+    def make(*models):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(engine, tables=[model.__table__ for model in models])
+        engines.append(engine)
+        return sessionmaker(bind=engine)
+    yield make
+    for engine in engines:
+        engine.dispose()
+
 # Override the get_db dependency
 @pytest.fixture
 def client(mock_db_session):
@@ -0,0 +1,77 @@
+import time
+import asyncio
+import datetime
+import pytest
+from app.api import admission
+from app.api.admission import AdmissionGate, Shed
+from app.recommender import ranker
+from app.recommender.cold_start import FeedItem
+from app.utils.config import settings
+
+def test_gate_hands_slots_to_waiters_in_order():
+    async def scenario():
+        gate = AdmissionGate("test", limit=1, max_queue=1, interval_ms=1000)
+        await gate.acquire()
+        waiter = asyncio.create_task(gate.acquire())
+        await asyncio.sleep(0)
+        assert gate.queued == 1
+
+        with pytest.raises(Shed) as shed:
+            await gate.acquire()  # Queue full: refused without waiting
+        assert shed.value.reason == "queue_full"
+
+        gate.release()
+        await waiter
+        assert (gate.active, gate.queued) == (1, 0)
+        gate.release()
+        assert gate.active == 0
+    asyncio.run(scenario())
+
+def test_gate_sheds_after_queue_timeout():
+    async def scenario():
+        gate = AdmissionGate("test", limit=1, max_queue=8, target_ms=5, interval_ms=50)
+        await gate.acquire()
+        start = time.monotonic()
+        with pytest.raises(Shed) as shed:
+            await gate.acquire()
+        assert shed.value.reason == "timeout"
+        assert 0.04 <= time.monotonic() - start < 1
+        assert gate.queued == 0
+
+        # A queue standing for longer than the interval: arrivals only wait `target`
+        assert gate.queue_timeout(time.monotonic()) == pytest.approx(0.05)
+        gate._last_empty -= 1
+        assert gate.queue_timeout(time.monotonic()) == pytest.approx(0.005)
+    asyncio.run(scenario())
+
+@pytest.fixture
+def saturated(monkeypatch):
+    for gate, _ in admission.admission_gates.values():
+        monkeypatch.setattr(gate, "limit", 0)
+        monkeypatch.setattr(gate, "max_queue", 0)
+
+def test_shed_recommend_serves_last_list_from_memory(client, saturated, mock_db_session):
+    item = FeedItem(9, "Kept", "http://test.com/9", "BBC", datetime.datetime(2026, 1, 1), 9)
+    ranker._remember(41, [item])
+    try:
+        response = client.get("/recommend?user_id=41")
+        assert response.status_code == 200
+        assert response.headers["X-Recommend-Tier"] == "cached"
+        assert response.json()[0]["title"] == "Kept"
+        assert not mock_db_session.query.called
+
+        response = client.get("/recommend?user_id=41&cursor=abc.def")
+        assert response.status_code == 503  # No substitute for a later page
+    finally:
+        with ranker._result_cache_lock:
+            ranker._result_cache.pop(41, None)
+
+def test_shed_auth_and_ingest_get_503(client, saturated, monkeypatch):
+    response = client.post("/auth/login", data={"username": "a@b.c", "password": "x"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert client.post("/ingest").status_code == 503
+
+    monkeypatch.setattr(settings, "CRON_SECRET", "s3cret")
+    counters = client.get("/metrics", headers={"X-Cron-Secret": "s3cret"}).json()["counters"]
+    assert counters["admission_auth"]["shed_queue_full"] >= 1
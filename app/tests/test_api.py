@@ -62,3 +62,174 @@ def test_log_interaction(client):
     )
     assert response.status_code == 200
     assert response.json()["status"] == "success"
+
+def test_trigger_ingestion_returns_job(client, monkeypatch):
+    import app.api.routes.ingest as ingest_module
+    from unittest.mock import MagicMock
+
+    monkeypatch.setattr(ingest_module.settings, "CRON_SECRET", "s3cret")
+    submit = MagicMock(return_value=({"job_id": "abc", "status": "queued"}, True))
+    monkeypatch.setattr(ingest_module, "submit_ingestion", submit)
+
+    response = client.post("/ingest", headers={"X-Cron-Secret": "wrong"})
+    assert response.status_code == 401
+    assert not submit.called
+
+    response = client.post("/ingest", headers={"X-Cron-Secret": "s3cret"})
+    assert response.status_code == 202
+    assert response.json()["job_id"] == "abc"
+    assert response.json()["status_url"] == "/ingest/abc"
+
+def test_get_ingestion_job(client, monkeypatch):
+    import app.api.routes.ingest as ingest_module
+
+    monkeypatch.setattr(ingest_module.settings, "CRON_SECRET", "s3cret")
+    jobs = {"abc": {"job_id": "abc", "status": "running", "stage": "embed", "stats": {"fetched": 12}}}
+    monkeypatch.setattr(ingest_module, "get_job", jobs.get)
+
+    response = client.get("/ingest/abc", headers={"X-Cron-Secret": "s3cret"})
+    assert response.status_code == 200
+    assert response.json()["stage"] == "embed"
+
+    response = client.get("/ingest/missing", headers={"X-Cron-Secret": "s3cret"})
+    assert response.status_code == 404
+
+def test_metrics_need_the_cron_secret(client, monkeypatch):
+    import app.api.routes.ingest as ingest_module
+
+    monkeypatch.setattr(ingest_module.settings, "CRON_SECRET", "s3cret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"X-Cron-Secret": "wrong"}).status_code == 401
+
+    response = client.get("/metrics", headers={"X-Cron-Secret": "s3cret"})
+    assert response.status_code == 200
+    assert "admission" in response.json()
+
+def test_recommendations_report_tier(client, monkeypatch):
+    import app.api.routes.recommend as route_module
+    from unittest.mock import MagicMock
+    from app.recommender.ranker import Recommendations
+
+    recs = Recommendations(
+        [MagicMock(id=1, title="Test 1", link="http://a.com", source="BBC", published_date=datetime.datetime.utcnow())],
+        tier="cached",
+    )
+    ranker = MagicMock(return_value=recs)
+    monkeypatch.setattr(route_module, "recommend_articles", ranker)
+
+    response = client.get("/recommend?user_id=1&deadline_ms=120")
+    assert response.status_code == 200
+    assert response.headers["X-Recommend-Tier"] == "cached"
+    assert ranker.call_args.kwargs["deadline_ms"] == 120
+
+def test_recommendations_are_serialized_from_feed_items(client, monkeypatch):
+    import app.api.routes.recommend as route_module
+    from unittest.mock import MagicMock
+    from app.recommender.cold_start import FeedItem
+    from app.recommender.ranker import Recommendations
+
+    published = datetime.datetime(2024, 5, 1, 8, 30, tzinfo=datetime.timezone.utc)
+    recs = Recommendations([FeedItem(1, "Test 1", "http://a.com", None, published, 7)], tier="cold_start")
+    monkeypatch.setattr(route_module, "recommend_articles", MagicMock(return_value=recs))
+
+    response = client.get("/recommend?user_id=1")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["X-Recommend-Tier"] == "cold_start"
+    assert response.json() == [{
+        "id": 1, "title": "Test 1", "link": "http://a.com", "source": None,
+        "published_date": "2024-05-01T08:30:00Z",
+    }]
+
+def test_recommendations_with_stale_cursor_return_410(client):
+    response = client.get("/recommend?user_id=1&cursor=bogus.cursor")
+    assert response.status_code == 410
+
+def test_recommendations_answer_if_none_match_with_304(client, mock_db_session, monkeypatch):
+    import app.api.routes.recommend as route_module
+    from unittest.mock import MagicMock
+    from app.recommender.ranker import Recommendations
+
+    mock_db_session.query.return_value.filter.return_value.first.return_value = MagicMock(
+        profile_version=3, seen_version=7, corpus_epoch=42
+    )
+    ranker = MagicMock(return_value=Recommendations(
+        [MagicMock(id=1, title="Test 1", link="http://a.com", source="BBC", published_date=datetime.datetime.utcnow())]
+    ))
+    monkeypatch.setattr(route_module, "recommend_articles", ranker)
+
+    response = client.get("/recommend?user_id=1")
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"3.7.42"'
+    assert "no-cache" in response.headers["Cache-Control"]
+
+    response = client.get("/recommend?user_id=1", headers={"If-None-Match": '"3.7.42"'})
+    assert response.status_code == 304
+    assert ranker.call_count == 1  # Not ranked again
+
+    response = client.get("/recommend?user_id=1", headers={"If-None-Match": '"3.6.42"'})
+    assert response.status_code == 200
+    assert ranker.call_count == 2
+
+def test_first_page_is_ranked_at_its_size_and_the_session_filled_afterwards(client, mock_db_session, monkeypatch):
+    import app.api.routes.recommend as route_module
+    from unittest.mock import MagicMock, call
+    from app.recommender.cold_start import FeedItem
+    from app.recommender.ranker import Recommendations
+    from app.recommender.sessions import SESSION_DEPTH, SESSION_FILL_DEADLINE_MS
+
+    mock_db_session.query.return_value.filter.return_value.first.return_value = MagicMock(
+        profile_version=3, seen_version=7, corpus_epoch=42
+    )
+    def ranked(user_id, limit, **kwargs):
+        return Recommendations([FeedItem(i, f"Test {i}", f"http://a.com/{i}", "BBC", datetime.datetime.utcnow(), None)
+                                for i in range(limit)])
+    ranker = MagicMock(side_effect=ranked)
+    monkeypatch.setattr(route_module, "recommend_articles", ranker)
+
+    response = client.get("/recommend?user_id=1&limit=5&deadline_ms=120")
+    assert response.status_code == 200
+    assert len(response.json()) == 5
+    assert response.headers["X-Next-Cursor"]
+    assert ranker.call_args_list == [
+        call(1, 5, deadline_ms=120),
+        call(1, SESSION_DEPTH, candidates=SESSION_DEPTH * 2, deadline_ms=SESSION_FILL_DEADLINE_MS, record=False),
+    ]
+
+def test_coalesced_recommendations_fall_back_within_the_deadline(client, mock_db_session, monkeypatch):
+    import threading
+    import time
+    import app.api.routes.recommend as route_module
+    from unittest.mock import MagicMock
+    from app.recommender.ranker import Recommendations
+
+    mock_db_session.query.return_value.filter.return_value.first.return_value = MagicMock(
+        profile_version=3, seen_version=7, corpus_epoch=42
+    )
+    ranker = MagicMock(side_effect=AssertionError("a waiter should not rank"))
+    monkeypatch.setattr(route_module, "recommend_articles", ranker)
+    fallback = MagicMock(return_value=Recommendations(
+        [MagicMock(id=1, title="Test 1", link="http://a.com", source="BBC", published_date=datetime.datetime.utcnow())],
+        tier="fallback",
+    ))
+    monkeypatch.setattr(route_module, "degraded_recommendations", fallback)
+
+    # Another request for the same user is already ranking, slowly
+    started, release = threading.Event(), threading.Event()
+    def slow_ranking():
+        started.set()
+        release.wait(5)
+        return Recommendations([])
+    leader = threading.Thread(target=route_module.recommend_flights.do, args=((1, 10, 3), slow_ranking))
+    leader.start()
+    started.wait(5)
+    try:
+        began = time.monotonic()
+        response = client.get("/recommend?user_id=1&deadline_ms=100")
+        assert time.monotonic() - began < 1.0  # Not the flight's 5 s wait
+        assert response.status_code == 200
+        assert response.headers["X-Recommend-Tier"] == "fallback"
+        fallback.assert_called_once_with(1, 10)
+    finally:
+        release.set()
+        leader.join(5)
@@ -0,0 +1,65 @@
+import datetime
+import numpy as np
+import pytest
+from app.storage.models import Article, ArticleArchive
+from app.storage.archive import archive_articles, archived_embeddings
+
+@pytest.fixture
+def db(sqlite_db):
+    session = sqlite_db(Article, ArticleArchive)()
+    yield session
+    session.close()
+
+def add_article(db, id, days_old):
+    db.add(Article(
+        id=id, title=f"A{id}", content=f"Body {id}", link=f"http://test.com/{id}",
+        published_date=datetime.datetime.utcnow() - datetime.timedelta(days=days_old),
+        embedding=[float(id)] * 384,
+    ))
+    db.commit()
+
+def test_archive_moves_cold_content_and_embeddings(db):
+    for id, days in [(1, 400), (2, 200), (3, 10)]:
+        add_article(db, id, days)
+
+    assert archive_articles(db, 180, dry_run=True)["would_archive"] == 2
+    stats = archive_articles(db, 180, batch_size=1)
+
+    assert stats["archived"] == 2
+    assert stats["batches"] == 2
+    hot = {a.id: a for a in db.query(Article).all()}
+    assert len(hot) == 3  # Rows stay for interactions
+    assert hot[1].content is None and hot[1].embedding is None
+    assert hot[3].content == "Body 3" and hot[3].embedding is not None
+    assert {r.article_id: r.content for r in db.query(ArticleArchive).all()} == {1: "Body 1", 2: "Body 2"}
+
+    # Re-running finds nothing left to move
+    assert archive_articles(db, 180)["archived"] == 0
+
+def test_archived_embeddings_round_trip(db):
+    add_article(db, 5, 365)
+    archive_articles(db, 180)
+
+    vectors = archived_embeddings(db, [5, 6])
+    assert list(vectors) == [5]
+    np.testing.assert_allclose(vectors[5], np.full(384, 5.0))
+
+def test_archive_clears_projected_and_next_model_vectors(db):
+    add_article(db, 7, 365)
+    db.get(Article, 7).embedding_proj = [1.0] * 96
+    db.get(Article, 7).projection_version = "v1"
+    db.get(Article, 7).embedding_next = [0.5] * 384
+    db.commit()
+
+    assert archive_articles(db, 180)["archived"] == 1
+    article = db.get(Article, 7)
+    db.refresh(article)
+    assert article.embedding_proj is None and article.projection_version is None and article.embedding_next is None
+
+    # Rows archived before this cleared them are picked up without a second archive copy
+    article.embedding_proj, article.projection_version = [1.0] * 96, "v1"
+    db.commit()
+    assert archive_articles(db, 180)["archived"] == 1
+    db.refresh(article)
+    assert article.projection_version is None
+    assert db.query(ArticleArchive).count() == 1
@@ -0,0 +1,93 @@
+import pytest
+from app.storage.models import Article, ArticleArchive, JobCheckpoint, RuntimeSetting
+from app.storage.embedding_model import active_model, next_model
+from app.ingestion.backfill import backfill_embeddings, swap_embeddings, count_pending, check_dimension, RateLimiter
+
+class FakeEmbedder:
+    def __init__(self, value=1.0, fail_on_call=None, dim=384):
+        self.value = value
+        self.fail_on_call = fail_on_call
+        self.dim = dim
+        self.calls = 0
+
+    def embed(self, texts):
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            return []
+        return [[self.value] * self.dim for _ in texts]
+
+@pytest.fixture
+def db(sqlite_db):
+    session = sqlite_db(Article, ArticleArchive, JobCheckpoint, RuntimeSetting)()
+    for id in range(1, 11):
+        session.add(Article(id=id, title=f"A{id}", content=f"Body {id}", link=f"http://test.com/{id}",
+                            embedding=[0.5] * 384 if id % 3 == 0 else None))
+    session.add(ArticleArchive(article_id=1, content="Body 1", embedding=[0.5] * 384))  # Archived: stays NULL
+    session.commit()
+    yield session
+    session.close()
+
+def no_wait():
+    return RateLimiter(0)
+
+def test_backfill_resumes_after_failure(db):
+    assert count_pending(db) == 6  # 2, 4, 5, 7, 8, 10
+
+    stats = backfill_embeddings(db, FakeEmbedder(fail_on_call=2), batch_size=2, limiter=no_wait())
+    assert stats["status"] == "error"
+    assert stats["embedded"] == 2 and stats["position"] == 4
+
+    stats = backfill_embeddings(db, FakeEmbedder(), batch_size=2, limiter=no_wait())
+    assert stats["resumed_from"] == 4
+    assert stats["embedded"] == 4 and stats["complete"]
+    assert count_pending(db) == 0
+    assert db.get(Article, 1).embedding is None
+    assert db.get(JobCheckpoint, "embedding_backfill").position == 0  # Next run starts over
+
+def test_reembed_then_swap(db):
+    backfill_embeddings(db, FakeEmbedder(), limiter=no_wait())
+    backfill_embeddings(db, FakeEmbedder(value=2.0), target="embedding_next", batch_size=4, max_batches=1,
+                        limiter=no_wait(), model="next-model")
+    with pytest.raises(RuntimeError):
+        swap_embeddings(db, "next-model")  # Half done; current vectors stay in place
+    assert list(db.get(Article, 2).embedding) == [1.0] * 384
+
+    backfill_embeddings(db, FakeEmbedder(value=2.0), target="embedding_next", limiter=no_wait(), model="next-model")
+    with pytest.raises(RuntimeError):
+        swap_embeddings(db, "next-model")  # The archived article still holds an old-model vector
+    backfill_embeddings(db, FakeEmbedder(value=2.0), target="archive_next", limiter=no_wait(), model="next-model")
+    with pytest.raises(RuntimeError):
+        swap_embeddings(db, "other-model")  # Not what embedding_next was filled with
+
+    assert active_model(db) == "all-MiniLM-L6-v2"
+    assert swap_embeddings(db, "next-model") == 9
+    db.expire_all()
+    assert all(list(a.embedding) == [2.0] * 384 for a in db.query(Article).filter(Article.id != 1).all())
+    assert db.query(Article).filter(Article.embedding_next.isnot(None)).count() == 0
+    archived = db.get(ArticleArchive, 1)
+    assert list(archived.embedding) == [2.0] * 384 and archived.embedding_next is None
+    assert active_model(db) == "next-model" and next_model(db) is None  # Ingestion switches with the swap
+
+def test_reembed_sticks_to_one_model(db):
+    with pytest.raises(ValueError):
+        backfill_embeddings(db, FakeEmbedder(), target="embedding_next", limiter=no_wait())  # No model named
+    backfill_embeddings(db, FakeEmbedder(), target="embedding_next", max_batches=1, limiter=no_wait(), model="a")
+    with pytest.raises(ValueError):
+        backfill_embeddings(db, FakeEmbedder(), target="archive_next", limiter=no_wait(), model="b")
+
+def test_dimension_is_checked_before_writing():
+    check_dimension(FakeEmbedder())
+    with pytest.raises(ValueError, match="768"):
+        check_dimension(FakeEmbedder(dim=768))
+    with pytest.raises(ValueError):
+        check_dimension(FakeEmbedder(fail_on_call=1))
+
+def test_rate_limiter_spaces_batches():
+    clock = [0.0]
+    slept = []
+    limiter = RateLimiter(60, clock=lambda: clock[0], sleep=slept.append)
+    limiter.wait(10)
+    limiter.wait(10)
+    clock[0] = 15.0
+    limiter.wait(5)
+    assert slept == [10.0, 5.0]
@@ -0,0 +1,87 @@
+import datetime
+import numpy as np
+from unittest.mock import MagicMock
+from app.storage.models import Article
+from app.storage.changefeed import ChangeFeed, Event, encode, decode, ARTICLES, PROFILES, RESYNC, MAX_PAYLOAD_BYTES
+from app.recommender.exact_search import ExactScorer
+
+def test_payloads_round_trip_within_notify_limit():
+    event = Event(ARTICLES, list(range(1_000_000, 1_003_000)), epoch=1_002_999)
+    payloads = encode(event)
+
+    assert len(payloads) > 1
+    assert all(len(p) <= MAX_PAYLOAD_BYTES for p in payloads)
+    decoded = [decode(p) for p in payloads]
+    assert [id for e in decoded for id in e.ids] == event.ids
+    assert {(e.kind, e.epoch) for e in decoded} == {(ARTICLES, 1_002_999)}
+    assert decode(encode(Event(RESYNC, []))[0]) == Event(RESYNC, [], 0)
+
+def test_postgres_publish_notifies_in_the_transaction():
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = "postgresql"
+    feed = ChangeFeed()
+    handler = MagicMock()
+    feed.subscribe(PROFILES, handler)
+
+    feed.publish(db, PROFILES, range(5000))
+    assert db.execute.call_count == len(encode(Event(PROFILES, list(range(5000)))))
+    assert "pg_notify" in str(db.execute.call_args[0][0])
+    handler.assert_not_called()  # Delivered by the listener after commit
+
+def test_local_publish_dispatches_in_process_after_commit(sqlite_db):
+    db = sqlite_db(Article)()
+    feed = ChangeFeed()
+    received = []
+    feed.subscribe(ARTICLES, lambda e: 1 / 0)  # A failing handler doesn't stop the others
+    feed.subscribe(ARTICLES, received.append)
+    feed.subscribe(PROFILES, received.append)
+
+    feed.publish(db, ARTICLES, [3, 1, 3], epoch=3)
+    feed.publish(db, PROFILES, [])  # Nothing changed: nothing sent
+    feed.publish(db, RESYNC)
+    assert received == []  # Delivered on commit, like NOTIFY
+    db.commit()
+    assert received == [Event(ARTICLES, [1, 3], 3), Event(RESYNC, []), Event(RESYNC, [])]
+
+    db.add(Article(id=9, title="A9", link="http://test.com/9"))
+    db.flush()
+    feed.publish(db, ARTICLES, [9], epoch=9)
+    db.rollback()
+    db.commit()
+    assert len(received) == 3  # Rolled back with the change
+    db.close()
+
+def test_exact_scorer_appends_announced_articles(sqlite_db):
+    db = sqlite_db(Article)()
+    now = datetime.datetime.utcnow()
+    vectors = np.eye(3, 384, dtype=np.float32)
+    db.add_all([Article(id=i, title=f"A{i}", link=f"http://test.com/{i}", embedding=vectors[i - 1].tolist(),
+                        published_date=now) for i in (1, 2)])
+    db.commit()
+
+    scorer = ExactScorer()
+    try:
+        scorer.refresh(db)
+        assert len(scorer) == 2
+        db.add(Article(id=3, title="A3", link="http://test.com/3", embedding=vectors[2].tolist(), published_date=now))
+        db.commit()
+
+        scorer.load = MagicMock(side_effect=AssertionError("should not reload the window"))
+        scorer.on_change(Event(ARTICLES, [3], 3))
+        scorer.refresh(db)
+        assert len(scorer) == 3 and scorer.epoch == 3
+        assert scorer.search(vectors[2], 1)[0][0] == 3
+    finally:
+        scorer.close()
+        db.close()
+
+def test_rebuilt_profile_drops_the_cached_list():
+    from app.storage.changefeed import change_feed
+    from app.recommender import ranker
+    ranker._remember(7, ["stale"])
+    ranker._remember(8, ["kept"])
+
+    change_feed.dispatch(Event(PROFILES, [7]))
+    assert 7 not in ranker._result_cache and ranker._result_cache[8] == ["kept"]
+    change_feed.dispatch(Event(RESYNC, []))
+    assert 8 not in ranker._result_cache
@@ -0,0 +1,106 @@
+import datetime
+from unittest.mock import MagicMock
+from app.recommender.cold_start import ColdStartFeed, FeedItem, rank_feed
+from app.storage.changefeed import Event, ARTICLES, INTERACTIONS, RESYNC
+
+NOW = datetime.datetime(2026, 1, 1, 12, 0)
+
+def item(id, hours_old, source="bbc", cluster_id=None):
+    return FeedItem(id, f"Story {id}", f"http://test.com/{id}", source,
+                    NOW - datetime.timedelta(hours=hours_old), cluster_id or id)
+
+def test_rank_feed_prefers_popular_and_folds_copies():
+    items = [item(1, 1), item(2, 2, cluster_id=1), item(3, 3), item(4, 4)]
+    ranked = rank_feed(items, {4: 50.0, 2: 1.0}, NOW)
+
+    ids = [i.id for i in ranked]
+    assert 2 not in ids  # Copy of story 1
+    assert ids[0] == 4   # Much more engagement outweighs a few hours of age
+    assert set(ids) == {1, 3, 4}
+
+def test_rank_feed_spreads_sources():
+    items = [item(i, i * 0.1, source="bbc") for i in range(1, 6)] + [item(10, 3, source="npr")]
+    ranked = rank_feed(items, {}, NOW)
+
+    # The lone NPR story is pulled up instead of trailing five BBC stories
+    assert [i.id for i in ranked].index(10) < 5
+
+def test_get_filters_seen_articles_and_clusters():
+    feed = ColdStartFeed(ttl_seconds=3600, pool_size=100)
+    feed._items = [item(1, 1), item(2, 2, cluster_id=7), item(3, 3), item(4, 4)]
+    feed._built_at = datetime.datetime.utcnow()
+    feed._stale = False
+    db = MagicMock()
+
+    results = feed.get(db, excluded_ids={1, 7}, limit=2)
+
+    assert [i.id for i in results] == [3, 4]
+    assert not db.query.called  # Served from memory
+
+def test_get_uses_fallback_when_feed_runs_dry():
+    feed = ColdStartFeed(ttl_seconds=3600, pool_size=2)
+    feed._items = [item(1, 1), item(2, 2)]
+    feed._built_at = datetime.datetime.utcnow()
+    feed._stale = False
+    feed._pool_full = True
+
+    results = feed.get(MagicMock(), excluded_ids={1, 2}, limit=2, fallback=lambda: ["older"])
+    assert results == ["older"]
+
+def test_invalidate_triggers_rebuild():
+    feed = ColdStartFeed(ttl_seconds=3600)
+    feed._items = []
+    feed._built_at = datetime.datetime.utcnow()
+    feed._stale = False
+    feed.invalidate()
+
+    db = MagicMock()
+    db.query.return_value.order_by.return_value.limit.return_value.all.return_value = [
+        (5, "Fresh", "http://test.com/5", "npr", datetime.datetime.utcnow(), 5)
+    ]
+    results = feed.get(db, limit=3)
+    assert [i.id for i in results] == [5]
+
+def built_feed(items, popularity=()):
+    feed = ColdStartFeed(ttl_seconds=3600)
+    db = MagicMock()
+    db.query.return_value.order_by.return_value.limit.return_value.all.return_value = items
+    db.query.return_value.filter.return_value.group_by.return_value.all.return_value = list(popularity)
+    feed.get(db)
+    return feed
+
+def test_announced_articles_are_merged_without_a_rebuild():
+    now = datetime.datetime.utcnow()
+    feed = built_feed([item(1, 1, source="npr")._replace(published_date=now - datetime.timedelta(hours=1))])
+
+    feed.on_articles(Event(ARTICLES, [9]))
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = [
+        (9, "Breaking", "http://test.com/9", "bbc", now, 9)
+    ]
+    results = feed.get(db, limit=3)
+
+    assert [i.id for i in results] == [9, 1]
+    assert not db.query.return_value.order_by.called  # Pool not re-read
+    assert feed.get(MagicMock(), limit=3) == results  # Nothing left to merge
+
+def test_reads_of_pooled_articles_move_popularity():
+    now = datetime.datetime.utcnow()
+    feed = built_feed([
+        item(1, 1, source="npr")._replace(published_date=now - datetime.timedelta(hours=1)),
+        item(2, 3)._replace(published_date=now - datetime.timedelta(hours=3)),
+    ])
+    assert [i.id for i in feed.get(MagicMock())] == [1, 2]
+
+    feed.on_interactions(Event(INTERACTIONS, [99]))  # Outside the pool: nothing to re-rank
+    assert not feed._has_changes()
+    for _ in range(20):
+        feed.on_interactions(Event(INTERACTIONS, [2]))
+    db = MagicMock()
+    assert [i.id for i in feed.get(db)] == [2, 1]
+    assert not db.query.called  # Re-ranked in memory
+
+def test_resync_rebuilds_from_the_database():
+    feed = built_feed([])
+    feed.on_articles(Event(RESYNC, []))
+    assert feed._needs_refresh(datetime.datetime.utcnow())
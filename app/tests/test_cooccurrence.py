@@ -0,0 +1,131 @@
+import datetime
+import numpy as np
+from app.storage.models import Interaction
+from app.recommender import cooccurrence
+from app.recommender.cooccurrence import CooccurrenceIndex
+
+T0 = datetime.datetime(2026, 1, 5)
+
+def reads(*visits):
+    """Events for (user_id, article_id, hours after T0) triples, in time order."""
+    visits = sorted(visits, key=lambda v: v[2])
+    return [(i, user, article, "click", T0 + datetime.timedelta(hours=hours))
+            for i, (user, article, hours) in enumerate(visits, start=1)]
+
+def decayed_weights(index):
+    """Pair weights as of the newest read, whatever the index's decay anchor."""
+    weights = (index._matrix + index._pending).toarray()
+    return weights * np.exp(-index.rate * (index._latest - index._anchor))
+
+def neighbour_ids(index, article_id):
+    return [neighbour for neighbour, _ in index.neighbours(article_id)]
+
+def test_pairs_reads_within_the_window_once():
+    index = CooccurrenceIndex()
+    pairs = index.add(reads(
+        (1, 10, 0), (1, 11, 1), (1, 11, 2),   # Re-read of 11 counts once
+        (1, 12, 30),                           # More than CO_READ_HOURS after 10 and 11
+        (2, 10, 0), (2, 11, 3),
+    ) + [(99, 3, 10, "dislike", T0), (100, 3, 12, "dislike", T0)])
+    assert pairs == 2
+    assert neighbour_ids(index, 10) == [11]
+    assert neighbour_ids(index, 11) == [10]
+    assert index.neighbours(12) == []
+    assert index.watermark == 100
+
+def test_recent_co_reads_outrank_old_ones():
+    index = CooccurrenceIndex()
+    index.add(reads(
+        *[(user, 1, 0) for user in range(5)], *[(user, 2, 1) for user in range(5)],       # Old pairing
+        *[(user, 1, 24 * 28) for user in range(5, 10)], *[(user, 3, 24 * 28 + 1) for user in range(5, 10)],
+    ))
+    [(first, first_score), (second, second_score)] = index.neighbours(1)
+    assert (first, second) == (3, 2)
+    assert 0 < second_score < first_score < 1
+
+def test_batches_and_merges_match_a_single_update(monkeypatch):
+    monkeypatch.setattr(cooccurrence, "MERGE_MIN_ENTRIES", 10)
+    rng = np.random.default_rng(0)
+    events = reads(*[(int(rng.integers(30)), int(rng.integers(40)), hours / 10) for hours in range(3000)])
+    whole, batched = CooccurrenceIndex(), CooccurrenceIndex()
+    whole.add(events)
+    for start in range(0, len(events), 97):
+        batched.add(events[start:start + 97])
+    assert batched.pairs <= whole.pairs  # Merges prune fully decayed pairs
+    assert np.allclose(decayed_weights(batched), decayed_weights(whole), atol=cooccurrence.PRUNE_WEIGHT)
+    assert all(neighbour_ids(batched, article_id) for article_id in range(40))
+
+def test_related_skips_seen_and_excluded_articles():
+    index = CooccurrenceIndex()
+    index.add(reads(
+        *[(user, 1, 0) for user in range(1, 6)], *[(user, 2, 1) for user in range(1, 6)],
+        *[(user, 3, 2) for user in range(1, 4)], (6, 4, 0), (6, 5, 1),
+        (7, 1, 10),
+    ))
+    related = index.related(7, 10, now=T0 + datetime.timedelta(hours=11))
+    assert list(related) == [2, 3]
+    assert all(0 < affinity < 1 for affinity in related.values())
+    assert list(index.related(7, 10, excluded_ids={2}, now=T0)) == [3]
+    assert index.related(42, 10) == {}
+
+def test_update_reads_new_interactions_from_the_database(sqlite_db):
+    db = sqlite_db(Interaction)()
+    now = datetime.datetime.utcnow()
+    db.add_all([
+        Interaction(user_id=1, article_id=10, interaction_type="click", timestamp=now - datetime.timedelta(days=60)),
+        Interaction(user_id=1, article_id=11, interaction_type="click", timestamp=now - datetime.timedelta(minutes=9)),
+        Interaction(user_id=1, article_id=12, interaction_type="like", timestamp=now - datetime.timedelta(minutes=8)),
+        Interaction(user_id=1, article_id=13, interaction_type="dislike", timestamp=now - datetime.timedelta(minutes=7)),
+    ])
+    db.commit()
+
+    index = CooccurrenceIndex()
+    assert index.update(db, batch_size=1) == 2  # Older than BOOTSTRAP_DAYS and dislikes are skipped
+    assert neighbour_ids(index, 11) == [12]
+
+    db.add(Interaction(user_id=1, article_id=14, interaction_type="click", timestamp=now))
+    db.commit()
+    assert index.update(db) == 1
+    assert sorted(neighbour_ids(index, 14)) == [11, 12]
+
+def test_ranker_blends_affinity_into_scores(monkeypatch):
+    from types import SimpleNamespace
+    from app.recommender import ranker
+
+    articles = [SimpleNamespace(id=1), SimpleNamespace(id=2)]
+    scores = np.array([0.5, 0.5])
+    monkeypatch.setattr(ranker.settings, "COOCCURRENCE_WEIGHT", 0.3)
+    assert np.allclose(ranker._blend(scores, articles, {2: 0.5}), [0.5, 0.65])
+    assert ranker._blend(scores, articles, {}) is scores
+
+    monkeypatch.setattr(ranker.settings, "COOCCURRENCE_WEIGHT", 0.0)
+    assert ranker._cooccurrence_affinity(1, set()) == {}
+
+def test_background_thread_follows_new_interactions(sqlite_db):
+    import time
+    sessions = sqlite_db(Interaction)
+    now = datetime.datetime.utcnow()
+    with sessions() as db:
+        db.add_all([Interaction(user_id=1, article_id=a, interaction_type="click", timestamp=now) for a in (1, 2)])
+        db.commit()
+
+    def wait_for(condition):
+        deadline = time.monotonic() + 5
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+    index = CooccurrenceIndex()
+    index.start(sessions, interval=0.05)
+    try:
+        assert wait_for(lambda: index.watermark == 2)  # Bootstrapped without warmup or a request
+        with sessions() as db:
+            db.add(Interaction(user_id=2, article_id=3, interaction_type="click", timestamp=now))
+            db.add(Interaction(user_id=2, article_id=1, interaction_type="click", timestamp=now))
+            db.commit()
+        assert wait_for(lambda: index.watermark == 4)
+        assert sorted(neighbour_ids(index, 1)) == [2, 3]
+        assert list(index.related(1, 10)) == [3]
+    finally:
+        index.stop()
+    assert index._thread is None
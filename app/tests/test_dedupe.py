@@ -0,0 +1,67 @@
+import numpy as np
+from app.ingestion.dedupe import (
+    simhash, hamming, to_signed64, from_signed64, SimHashIndex, EmbeddingIndex, SIMHASH_MAX_DISTANCE,
+)
+
+STORY = (
+    "The central bank raised interest rates by a quarter point on Wednesday, "
+    "citing persistent inflation in housing and services. Officials signalled "
+    "that further increases were possible if price growth does not slow, and "
+    "markets fell sharply after the announcement as investors weighed the outlook."
+)
+
+def test_simhash_near_copies_are_close():
+    article = " ".join(f"{STORY} Update {i}." for i in range(8))
+    edited = article.replace("Wednesday", "Thursday", 1)
+    retitled = "Breaking: " + article
+    unrelated = "A new museum exhibition opened downtown featuring sculptures by local artists and a film series."
+
+    assert hamming(simhash(article), simhash(article)) == 0
+    assert hamming(simhash(article), simhash(edited)) <= SIMHASH_MAX_DISTANCE
+    assert hamming(simhash(article), simhash(retitled)) <= SIMHASH_MAX_DISTANCE
+    assert hamming(simhash(article), simhash(unrelated)) > SIMHASH_MAX_DISTANCE
+
+def test_signed_roundtrip():
+    for value in (0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1):
+        signed = to_signed64(value)
+        assert -(1 << 63) <= signed < (1 << 63)
+        assert from_signed64(signed) == value
+
+def test_simhash_index_finds_within_distance():
+    index = SimHashIndex()
+    fingerprint = simhash(STORY)
+    index.add(fingerprint, 7)
+
+    assert index.query(fingerprint) == (7, 0)
+    # Flip bits in different bands: still found while within max distance
+    near = fingerprint ^ (1 << 3) ^ (1 << 40)
+    assert index.query(near) == (7, 2)
+    far = fingerprint ^ 0xFFFF0000FFFF
+    assert index.query(far) is None
+
+def test_embedding_index_threshold():
+    index = EmbeddingIndex(threshold=0.9)
+    base = np.random.default_rng(0).standard_normal(384)
+    index.add(base, "a")
+
+    cluster, similarity = index.query(base * 2.0)
+    assert cluster == "a" and similarity > 0.99
+    assert index.query(np.random.default_rng(1).standard_normal(384)) is None
+
+def test_text_without_words_has_no_fingerprint():
+    assert simhash("") is None
+    assert simhash(" -- ... ") is None
+    assert simhash("word") is not None
+
+def test_embedding_index_grows_in_place():
+    rng = np.random.default_rng(2)
+    vectors = rng.standard_normal((600, 384))
+    index = EmbeddingIndex(threshold=0.99)
+    for i, vec in enumerate(vectors):
+        assert index.query(vec) is None  # Interleaved with adds, like ingestion
+        matrix = index._matrix
+        index.add(vec, i)
+        if matrix is not None and i < len(matrix):
+            assert index._matrix is matrix  # Row written in place, no rebuild
+    assert len(index) == 600
+    assert index.query(vectors[0])[0] == 0 and index.query(vectors[599])[0] == 599
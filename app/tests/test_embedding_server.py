@@ -0,0 +1,74 @@
+import os
+import tempfile
+import threading
+import numpy as np
+import pytest
+from app.embeddings.server import EmbeddingServer
+from app.embeddings.embedder_client import EmbedderClient
+
+
+class CountingModel:
+    """Deterministic stand-in: vector i is [len(text), 1, 0, ...]."""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        vectors = np.zeros((len(texts), 8), dtype=np.float32)
+        for i, text in enumerate(texts):
+            vectors[i, 0] = len(text)
+            vectors[i, 1] = 1
+        return vectors
+
+
+@pytest.fixture
+def server():
+    model = CountingModel()
+    path = os.path.join(tempfile.mkdtemp(), "embedder.sock")
+    srv = EmbeddingServer(path, model=model, max_batch_size=64, max_wait_ms=200, warmup=False)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv, model
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_client_round_trip(server):
+    srv, model = server
+    client = EmbedderClient(srv.socket_path, timeout=5)
+
+    vectors = client.embed(["a", "abc"])
+    assert vectors == [[1, 1, 0, 0, 0, 0, 0, 0], [3, 1, 0, 0, 0, 0, 0, 0]]
+    assert client.embed([]) == []
+
+def test_concurrent_clients_share_a_batch(server):
+    srv, model = server
+    results = {}
+
+    def worker(name, texts):
+        results[name] = EmbedderClient(srv.socket_path, timeout=5).embed(texts)
+
+    threads = [threading.Thread(target=worker, args=(n, ["x" * n] * n)) for n in (1, 2, 3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Each client gets back exactly its own vectors...
+    for n in (1, 2, 3):
+        assert [v[0] for v in results[n]] == [n] * n
+    # ...but the model ran once for all of them
+    assert len(model.calls) == 1
+    assert len(model.calls[0]) == 6
+
+def test_client_returns_empty_when_server_is_down():
+    client = EmbedderClient(os.path.join(tempfile.mkdtemp(), "missing.sock"), timeout=1)
+    assert client.embed(["hello"]) == []
+
+def test_client_refuses_another_models_vectors(server):
+    srv, model = server
+    assert EmbedderClient(srv.socket_path, timeout=5, model_name=srv.model_name).embed(["a"]) == [[1, 1, 0, 0, 0, 0, 0, 0]]
+    # e.g. a sidecar still running the model a re-embed swapped out
+    client = EmbedderClient(srv.socket_path, timeout=5, model_name="all-MiniLM-L12-v2")
+    assert client.embed(["a"]) == []
@@ -0,0 +1,79 @@
+import datetime
+import numpy as np
+import pytest
+from app.storage.models import User, Article, ArticleArchive, Interaction, InteractionArchive
+from app.recommender.evaluation import Corpus, load_cutoffs, replay, ndcg, register_engine, ExactEngine, ENGINES
+
+@pytest.fixture
+def db(sqlite_db):
+    session = sqlite_db(User, Article, ArticleArchive, Interaction, InteractionArchive)()
+    rng = np.random.default_rng(5)
+    start = datetime.datetime(2026, 1, 1)
+    topics = rng.normal(size=(4, 384))
+    for id in range(1, 121):
+        topic = id % 4
+        session.add(Article(
+            id=id, title=f"A{id}", link=f"http://test.com/{id}", source=f"S{id % 5}",
+            published_date=start + datetime.timedelta(hours=6 * id),
+            embedding=(topics[topic] + 0.3 * rng.normal(size=384)).tolist(),
+        ))
+    event_id = 0
+    for user_id in range(1, 5):
+        session.add(User(id=user_id, email=f"u{user_id}@test.com", hashed_password="x"))
+        # Each user reads one topic, in publication order
+        for article_id in range(user_id % 4 + 4, 121, 8):
+            event_id += 1
+            session.add(Interaction(
+                id=event_id, user_id=user_id, article_id=article_id, interaction_type="click",
+                timestamp=start + datetime.timedelta(hours=6 * article_id + 1),
+            ))
+    session.commit()
+    yield session
+    session.close()
+
+def test_exact_engine_agrees_with_itself(db):
+    report = replay(db, "exact", k=5, candidates=20)
+
+    assert report["cutoffs"] > 0
+    assert report["recall_at_k"]["mean"] == 1.0
+    assert report["candidate_overlap"]["mean"] == 1.0
+    assert report["ndcg_engine"] == report["ndcg_exact"]
+    assert report["ndcg_exact"]["mean"] > 0.5  # Later clicks are on the user's topic
+
+def test_replay_compares_pluggable_engines(db):
+    @register_engine
+    class Newest(ExactEngine):
+        name = "newest_test"
+
+        def search(self, user_vec, eligible, now, n, limit):
+            rows = np.flatnonzero(eligible)
+            return rows[np.argsort(self.corpus.published[rows])[::-1]][:n]
+
+    try:
+        corpus = Corpus.load(db)
+        cutoffs = load_cutoffs(db, max_users=2, cutoffs_per_user=2)
+        assert len({c.user_id for c in cutoffs}) == 2
+        assert [c.at for c in cutoffs] == sorted(c.at for c in cutoffs)
+
+        int8 = replay(db, "int8", k=5, candidates=20, corpus=corpus, cutoffs=cutoffs)
+        newest = replay(db, "newest_test", k=5, candidates=20, corpus=corpus, cutoffs=cutoffs)
+        assert int8["candidate_overlap"]["mean"] > 0.8
+        assert newest["recall_at_k"]["mean"] < int8["recall_at_k"]["mean"]
+        assert newest["engine_ms"]["mean"] is not None
+    finally:
+        ENGINES.pop("newest_test")
+
+def test_projection_engine_tracks_exact_search(db):
+    report = replay(db, "projection", k=5, candidates=20, dims=32)
+    assert report["candidate_overlap"]["mean"] > 0.5
+    assert report["recall_at_k"]["mean"] > 0.5
+
+def test_parallel_engine_matches_exact_search(db):
+    report = replay(db, "parallel", k=5, candidates=20, processes=2)
+    assert report["candidate_overlap"]["mean"] == 1.0
+    assert report["recall_at_k"]["mean"] == 1.0
+
+def test_ndcg():
+    assert ndcg([1, 2, 3], {1}, 3) == 1.0
+    assert ndcg([2, 1, 3], {1}, 3) == pytest.approx(1 / np.log2(3))
+    assert ndcg([2, 3], set(), 3) == 0.0
@@ -0,0 +1,79 @@
+import pytest
+import datetime
+import numpy as np
+from app.storage.models import Article
+from app.recommender import exact_search
+from app.recommender.exact_search import ExactScorer
+
+def brute_force(vectors, query, k, excluded=()):
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    order = [int(i) for i in np.argsort(-(unit @ query)) if int(i) not in excluded]
+    return order[:k]
+
+def test_parallel_search_matches_brute_force(monkeypatch):
+    monkeypatch.setattr(exact_search, "PARALLEL_MIN_ROWS", 0)  # Use the pool even for a small matrix
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(3000, 384)).astype(np.float32)
+    scorer = ExactScorer.from_arrays(np.arange(3000), vectors, processes=2)
+    try:
+        for query in rng.normal(size=(3, 384)).astype(np.float32):
+            query /= np.linalg.norm(query)
+            excluded = set(brute_force(vectors, query, 5))  # The best five are already seen
+            hits = scorer.search(query, 20, excluded_ids=excluded)
+            assert [article_id for article_id, _ in hits] == brute_force(vectors, query, 20, excluded)
+            assert all(a[1] >= b[1] for a, b in zip(hits, hits[1:]))
+    finally:
+        scorer.close()
+
+def test_search_filters_by_publish_time():
+    now = datetime.datetime(2026, 1, 10)
+    vectors = np.eye(4, 384, dtype=np.float32) + 0.5
+    published = np.array([now - datetime.timedelta(days=d) for d in (1, 5, 40, -1)], dtype="datetime64[s]")
+    scorer = ExactScorer.from_arrays([10, 11, 12, 13], vectors, published)
+    try:
+        hits = scorer.search(vectors[2], 10, since=now - datetime.timedelta(days=30), until=now)
+        assert sorted(article_id for article_id, _ in hits) == [10, 11]
+    finally:
+        scorer.close()
+
+def test_load_reads_the_hot_window(sqlite_db):
+    db = sqlite_db(Article)()
+    now = datetime.datetime.utcnow()
+    vectors = np.eye(3, 384, dtype=np.float32)
+    for id, (vec, days) in enumerate(zip(vectors, (1, 2, 90)), start=1):
+        db.add(Article(id=id, title=f"A{id}", link=f"http://test.com/{id}", embedding=vec.tolist(),
+                       published_date=now - datetime.timedelta(days=days)))
+    db.add(Article(id=4, title="A4", link="http://test.com/4", published_date=now))  # No embedding yet
+    db.commit()
+
+    scorer = ExactScorer()
+    try:
+        scorer.load(db, window_days=30)
+        assert len(scorer) == 2
+        assert scorer.search(vectors[1], 1)[0][0] == 2
+    finally:
+        scorer.close()
+        db.close()
+
+def test_matrix_swap_waits_for_running_searches(monkeypatch):
+    from multiprocessing import shared_memory
+
+    vectors = np.eye(3, 384, dtype=np.float32)
+    scorer = ExactScorer.from_arrays([1, 2, 3], vectors)
+    old_name = scorer._arrays.spec[0]
+    top_k = exact_search._top_k
+
+    def swap_mid_search(*args):
+        scorer.set_matrix([7], vectors[:1])  # A refresh lands while this search is scoring
+        shared_memory.SharedMemory(name=old_name).close()  # Still attachable by pool workers
+        return top_k(*args)
+
+    monkeypatch.setattr(exact_search, "_top_k", swap_mid_search)
+    try:
+        assert scorer.search(vectors[1], 1)[0][0] == 2  # Finishes on the previous matrix
+        monkeypatch.setattr(exact_search, "_top_k", top_k)
+        assert scorer.search(vectors[1], 1)[0][0] == 7
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=old_name)  # Released once that search was done
+    finally:
+        scorer.close()
@@ -0,0 +1,80 @@
+import datetime
+import pytest
+from app.ingestion import fetch_feeds
+from app.ingestion.fast_parser import FastFeed, FeedFormatError, parse_date
+
+RSS = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/">
+<channel><title>BBC News</title><link>https://bbc.co.uk/</link>
+<image><title>Not the feed title</title></image>
+<item><title>Storm &amp; floods</title><link>https://bbc.co.uk/1</link>
+<pubDate>Mon, 05 Jan 2026 10:30:00 +0100</pubDate><description>Short</description>
+<content:encoded><![CDATA[<p>Full <b>story</b></p>]]></content:encoded></item>
+<item><title>Guid only</title><guid>https://bbc.co.uk/2</guid><description>&lt;p&gt;Summary&lt;/p&gt;</description></item>
+<item><title>No link</title><guid isPermaLink="false">tag:bbc,2</guid></item>
+</channel></rss>"""
+
+ATOM = b"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>The Guardian</title>
+<entry><title>Markets</title><link rel="enclosure" href="https://g.com/a.mp3"/><link href="https://g.com/1"/>
+<updated>2026-01-05T10:30:00.123456789Z</updated>
+<content type="xhtml"><div xmlns="http://www.w3.org/1999/xhtml"><p>Rates <em>rise</em></p></div></content></entry>
+</feed>"""
+
+def test_parse_date_formats():
+    assert parse_date("Mon, 05 Jan 2026 10:30:00 +0100") == datetime.datetime(2026, 1, 5, 9, 30)
+    assert parse_date("Mon, 05 Jan 2026 10:30:00 GMT") == datetime.datetime(2026, 1, 5, 10, 30)
+    assert parse_date("2026-01-05T10:30:00.5Z") == datetime.datetime(2026, 1, 5, 10, 30)
+    assert parse_date("2026-01-05T10:30:00-05:00") == datetime.datetime(2026, 1, 5, 15, 30)
+    assert parse_date("2026-01-05") == datetime.datetime(2026, 1, 5)
+    assert parse_date("") is None
+    with pytest.raises(FeedFormatError):
+        parse_date("last Tuesday")
+
+def test_rss_entries_stream_with_feed_title():
+    feed = FastFeed(RSS)
+    entries = list(feed.entries())
+    assert feed.title == "BBC News"
+    assert [e["link"] for e in entries] == ["https://bbc.co.uk/1", "https://bbc.co.uk/2", ""]
+    assert entries[0]["title"] == "Storm & floods"
+    assert entries[0]["content"] == "<p>Full <b>story</b></p>"
+    assert entries[0]["published"] == datetime.datetime(2026, 1, 5, 9, 30)
+    assert entries[1]["published"] is None
+
+def test_atom_entry_uses_alternate_link_and_updated_date():
+    feed = FastFeed(ATOM)
+    [entry] = list(feed.entries())
+    assert feed.title == "The Guardian"
+    assert entry["link"] == "https://g.com/1"
+    assert entry["published"] == datetime.datetime(2026, 1, 5, 10, 30)
+    assert " ".join(entry["content"].split()) == "Rates rise"
+
+@pytest.mark.parametrize("document", [RSS, ATOM])
+def test_fast_path_matches_feedparser(document):
+    fast = fetch_feeds._parse_fast(document, "u")
+    slow = fetch_feeds._parse_feedparser(document, "u")
+    # Undated entries get utcnow() at parse time, so only the first entry's date is comparable
+    assert [dict(a, published_date=None) for a in fast] == [dict(a, published_date=None) for a in slow]
+    assert fast[0]["published_date"] == slow[0]["published_date"] == datetime.datetime(2026, 1, 5, 9 if document is RSS else 10, 30)
+
+def test_parse_feed_falls_back_to_feedparser(monkeypatch):
+    rdf = b"""<?xml version="1.0"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns="http://purl.org/rss/1.0/">
+<channel rdf:about="https://x.org/"><title>RDF feed</title></channel>
+<item rdf:about="https://x.org/1"><title>Old format</title><link>https://x.org/1</link></item>
+</rdf:RDF>"""
+    malformed = RSS.replace(b"Storm &amp; floods", b"Storm&nbsp;floods")
+    for document, source in ((rdf, "RDF feed"), (malformed, "BBC News")):
+        with pytest.raises(FeedFormatError):
+            list(FastFeed(document).entries())
+        monkeypatch.setattr(fetch_feeds, "fetch_feed", lambda url: document)
+        articles = fetch_feeds.parse_feed("https://x.org/feed")
+        assert articles and articles[0]["source"] == source
+
+def test_parse_feed_records_fetch_errors(monkeypatch):
+    def fail(url):
+        raise Exception("HTTP 404")
+    monkeypatch.setattr(fetch_feeds, "fetch_feed", fail)
+    errors = {}
+    assert fetch_feeds.parse_feed("https://x.org/missing", errors) == []
+    assert errors == {"https://x.org/missing": "HTTP 404"}
@@ -0,0 +1,101 @@
+import datetime
+import numpy as np
+import pytest
+from app.storage.models import User, Article, Interaction, InteractionAggregate, InteractionArchive, JobCheckpoint
+from app.recommender.interactions import (
+    compact_interactions, compaction_watermark, profile_events, seen_article_ids,
+)
+
+DECAY_RATE = 0.05
+WEIGHTS = {"click": 1.0, "like": 2.0, "dislike": -1.0}
+
+@pytest.fixture
+def db(sqlite_db):
+    session = sqlite_db(User, Article, Interaction, InteractionAggregate, InteractionArchive, JobCheckpoint)()
+    yield session
+    session.close()
+
+def seed(db, now):
+    rng = np.random.default_rng(7)
+    db.add(User(id=1, email="u@test.com", hashed_password="x"))
+    for id in range(1, 21):
+        db.add(Article(id=id, title=f"A{id}", link=f"http://test.com/{id}", embedding=rng.normal(size=384).tolist()))
+    event_id = 0
+    for days in (400, 200, 90, 30, 10, 3, 1):
+        for article_id in rng.choice(20, size=4, replace=False) + 1:
+            event_id += 1
+            db.add(Interaction(
+                id=event_id, user_id=1, article_id=int(article_id),
+                interaction_type=str(rng.choice(list(WEIGHTS))),
+                timestamp=now - datetime.timedelta(days=days, hours=float(rng.uniform(0, 20))),
+            ))
+    db.commit()
+
+def profile(db, now):
+    embeddings = {a.id: np.asarray(a.embedding) for a in db.query(Article).all()}
+    events = profile_events(db, 1, DECAY_RATE, now)
+    weights = np.array([WEIGHTS[t] * decay for _, t, decay in events])
+    vectors = np.array([embeddings[a] for a, _, _ in events])
+    return weights @ vectors / weights.sum()
+
+def test_profile_survives_compaction(db):
+    now = datetime.datetime.utcnow()
+    seed(db, now)
+    before = profile(db, now)
+
+    stats = compact_interactions(db, DECAY_RATE, batch_size=5, now=now)
+    after = profile(db, now)
+
+    assert stats["compacted"] == 28
+    assert compaction_watermark(db) == 28
+    cosine = before @ after / (np.linalg.norm(before) * np.linalg.norm(after))
+    assert cosine > 0.999
+    # Only the aggregates are read now; events past the cutoff are archived
+    assert len(profile_events(db, 1, DECAY_RATE, now)) <= db.query(InteractionAggregate).count()
+    assert db.query(InteractionArchive).count() == 8
+    assert db.query(Interaction).count() == 20
+
+def test_compaction_merges_into_existing_aggregates(db):
+    now = datetime.datetime.utcnow()
+    db.add(User(id=1, email="u@test.com", hashed_password="x"))
+    db.add(Article(id=1, title="A1", link="http://test.com/1"))
+    db.add(Interaction(id=1, user_id=1, article_id=1, interaction_type="click", timestamp=now - datetime.timedelta(days=4)))
+    db.commit()
+    compact_interactions(db, DECAY_RATE, now=now)
+
+    db.add(Interaction(id=2, user_id=1, article_id=1, interaction_type="click", timestamp=now - datetime.timedelta(days=2)))
+    db.add(Interaction(id=3, user_id=1, article_id=1, interaction_type="click", timestamp=now))  # Too recent to compact
+    db.commit()
+    stats = compact_interactions(db, DECAY_RATE, now=now)
+
+    assert stats["compacted"] == 1
+    agg = db.query(InteractionAggregate).one()
+    assert agg.count == 2
+    assert agg.decay_sum == pytest.approx(1 + np.exp(-DECAY_RATE * 2))
+    decays = sorted(decay for _, _, decay in profile_events(db, 1, DECAY_RATE, now))
+    assert decays == pytest.approx(sorted([1.0, np.exp(-DECAY_RATE * 2) + np.exp(-DECAY_RATE * 4)]))
+    assert seen_article_ids(db, 1) == {1}
+
+def test_tail_and_aggregates_decay_alike_in_one_read(db):
+    from sqlalchemy import event
+    now = datetime.datetime.utcnow()
+    db.add(User(id=1, email="u@test.com", hashed_password="x"))
+    db.add(Article(id=1, title="A1", link="http://test.com/1"))
+    db.add(Interaction(id=1, user_id=1, article_id=1, interaction_type="click", timestamp=now - datetime.timedelta(days=3.5)))
+    db.commit()
+    compact_interactions(db, DECAY_RATE, now=now)
+    db.add(Interaction(id=2, user_id=1, article_id=1, interaction_type="click", timestamp=now - datetime.timedelta(days=1.5)))
+    db.commit()
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        decays = sorted(decay for _, _, decay in profile_events(db, 1, DECAY_RATE, now))
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+    # Fractional days for the raw tail too, not 1 whole day
+    assert decays == pytest.approx([np.exp(-DECAY_RATE * 3.5), np.exp(-DECAY_RATE * 1.5)])
+    # Watermark, tail and aggregates from one statement: one snapshot, no double counting
+    assert len(statements) == 1
@@ -0,0 +1,44 @@
+import pytest
+from app.ingestion import preprocess
+from app.ingestion.preprocess import clean_text, truncate_tokens
+
+def test_clean_text_strips_markup_and_blocks():
+    raw = (
+        '<div><style>.x { color: red; }</style><p>Hello&nbsp;<b>world</b></p>'
+        '<script>var a = "<p>nope</p>";</script><!-- hidden --><p>Second\n\n  line</p></div>'
+    )
+    assert clean_text(raw) == "Hello world Second line"
+
+def test_clean_text_removes_escaped_markup_but_keeps_literals():
+    assert clean_text("&lt;p&gt;Escaped &amp; stripped&lt;/p&gt;") == "Escaped & stripped"
+    assert clean_text("Rates: a < b and c > d") == "Rates: a < b and c > d"
+    assert clean_text("") == ""
+
+def test_ingestion_only_loads_the_tokenizer_from_the_local_cache(monkeypatch):
+    import huggingface_hub
+    calls = []
+    def hf_hub_download(repo_id, filename, **kwargs):
+        calls.append(kwargs)
+        raise FileNotFoundError("not cached")
+    monkeypatch.setattr(huggingface_hub, "hf_hub_download", hf_hub_download)
+    monkeypatch.setattr(preprocess, "_tokenizer", None)
+    monkeypatch.setattr(preprocess, "_tokenizer_loaded", False)
+
+    assert truncate_tokens("A short headline.") == "A short headline."  # Word-count fallback
+    assert calls == [{"local_files_only": True}]
+
+    preprocess.load_tokenizer(download=True)  # Startup may fetch it
+    assert calls[1:] == [{"local_files_only": True}, {}]
+
+@pytest.fixture
+def word_count_tokenizer(monkeypatch):
+    monkeypatch.setattr(preprocess, "_get_tokenizer", lambda: None)
+
+def test_truncate_tokens_keeps_short_text(word_count_tokenizer):
+    assert truncate_tokens("A short headline.") == "A short headline."
+
+def test_truncate_tokens_cuts_to_budget(word_count_tokenizer):
+    text = " ".join(f"word{i}" for i in range(1000))
+    truncated = truncate_tokens(text, max_tokens=52)
+    assert text.startswith(truncated)
+    assert truncated.split() == [f"word{i}" for i in range(50)]
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from app.storage.models import Article
+from app.recommender.projection import Projection, fit_svd, random_projection, apply_projection, get_projection
+
+def corpus(n=400, topics=12, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(topics, 384))
+    vectors = centers[rng.integers(0, topics, size=n)] + 0.2 * rng.normal(size=(n, 384))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+def test_svd_projection_keeps_nearest_neighbours():
+    vectors = corpus()
+    projection = fit_svd(vectors, 64)
+    projected = projection.project(vectors)
+    projected /= np.linalg.norm(projected, axis=1, keepdims=True)
+
+    # Retrieval quality: the exact top 10 should mostly be among the projected top 30 candidates
+    queries = vectors[:20]
+    exact = np.argsort(-(vectors @ queries.T), axis=0)[:10]
+    shortlist = np.argsort(-(projected @ projection.project(queries).T), axis=0)[:30]
+    recall = np.mean([len(set(exact[:, i]) & set(shortlist[:, i])) / 10 for i in range(20)])
+    assert projection.dims == 64
+    assert recall > 0.8
+
+def test_projection_round_trip_keeps_version(tmp_path):
+    projection = random_projection(96, seed=1)
+    path = str(tmp_path / "models" / "projection.npz")
+    projection.save(path)
+
+    loaded = Projection.load(path)
+    assert loaded.version == projection.version and loaded.version.startswith("random96-")
+    assert get_projection(path).version == projection.version
+    assert get_projection(str(tmp_path / "missing.npz")) is None
+
+def test_apply_projection_writes_versioned_vectors(sqlite_db):
+    db = sqlite_db(Article)()
+    vectors = corpus(n=5)
+    for id, vec in enumerate(vectors, start=1):
+        db.add(Article(id=id, title=f"A{id}", link=f"http://test.com/{id}", embedding=vec.tolist()))
+    db.add(Article(id=6, title="A6", link="http://test.com/6"))  # No embedding yet
+    db.commit()
+
+    projection = fit_svd(vectors, 4)
+    assert apply_projection(db, projection, batch_size=2)["projected"] == 5
+    assert apply_projection(db, projection)["projected"] == 0  # Already current
+
+    article = db.get(Article, 2)
+    assert article.projection_version == projection.version
+    np.testing.assert_allclose(article.embedding_proj, projection.project(vectors[1]), rtol=1e-5, atol=1e-6)
+    assert db.get(Article, 6).embedding_proj is None
+    db.close()
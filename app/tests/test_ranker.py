@@ -77,17 +77,21 @@ def test_build_user_embedding(mock_db_data):
     # User interacted with Article 1 (click) and Article 2 (like)
     user_id = 1
     
+    # Raw events read as aggregates of one (see app/recommender/interactions.py)
     interactions = [
-        Interaction(user_id=user_id, article_id=1, interaction_type="click", timestamp=datetime.datetime.utcnow()),
-        Interaction(user_id=user_id, article_id=2, interaction_type="like", timestamp=datetime.datetime.utcnow())
+        MagicMock(user_id=user_id, article_id=1, interaction_type="click", decay_sum=1.0,
+                  last_seen=datetime.datetime.utcnow()),
+        MagicMock(user_id=user_id, article_id=2, interaction_type="like", decay_sum=1.0,
+                  last_seen=datetime.datetime.utcnow()),
     ]
     
     art1 = create_mock_article(1, "A1", 0.1) # Vector [0.1, 0.1, ...]
     art2 = create_mock_article(2, "A2", 0.2) # Vector [0.2, 0.2, ...]
     
     # Mock DB Returns
+    # 1. Interaction history (raw tail and aggregates in one statement)
+    mock_db_data.execute.return_value.all.return_value = interactions
     mock_db_data.query.return_value.filter.return_value.all.side_effect = [
-        interactions, # 1. Get interactions
         [art1, art2]  # 2. Get articles
     ]
     
@@ -97,3 +101,131 @@ def test_build_user_embedding(mock_db_data):
     
     # Verify commit was called
     assert mock_db_data.commit.called
+
+def _profile_user_session(mock_db_data, interacted=()):
+    user = User(id=42, email="u@test.com", hashed_password="x", user_embedding=[0.1] * 384)
+    mock_db_data.query.return_value.filter.return_value.first.return_value = user
+    mock_db_data.query.return_value.filter.return_value.all.return_value = [
+        MagicMock(article_id=a) for a in interacted
+    ]
+    return user
+
+def test_recommend_serves_cached_list_when_budget_is_spent(mock_db_data):
+    from app.recommender.ranker import _remember
+
+    _profile_user_session(mock_db_data, interacted=[2])
+    _remember(42, [create_mock_article(i, f"News {i}") for i in (1, 2, 3)])
+
+    recs = recommend_articles(user_id=42, limit=5, deadline_ms=0)
+
+    assert recs.tier == "cached"
+    assert [a.id for a in recs] == [1, 3]  # Article 2 was read since it was cached
+
+def test_unrecorded_ranking_leaves_metrics_alone(mock_db_data):
+    from app.recommender import ranker
+    from app.utils.metrics import metrics
+
+    _profile_user_session(mock_db_data)
+    ranker._remember(42, [create_mock_article(1, "News 1")])
+    metrics.reset()
+
+    recs = recommend_articles(user_id=42, limit=5, deadline_ms=0, record=False)
+    assert recs.tier == "cached"
+    assert "recommend_tier" not in metrics.snapshot()["counters"]
+    recommend_articles(user_id=42, limit=5, deadline_ms=0)
+    assert metrics.snapshot()["counters"]["recommend_tier"] == {"cached": 1}
+
+def test_recommend_degrades_to_cold_start_feed_on_error(mock_db_data, monkeypatch):
+    import app.recommender.ranker as ranker
+
+    _profile_user_session(mock_db_data)
+    mock_db_data.query.return_value.filter.return_value.filter.side_effect = Exception("statement timeout")
+    mock_db_data.query.return_value.filter.return_value.order_by.side_effect = Exception("statement timeout")
+    fallback = [create_mock_article(9, "Fresh")]
+    monkeypatch.setattr(ranker.cold_start_feed, "get", MagicMock(return_value=fallback))
+
+    recs = recommend_articles(user_id=4242, limit=5, deadline_ms=5000)
+
+    assert recs.tier == "fallback"
+    assert [a.id for a in recs] == [9]
+    assert mock_db_data.rollback.called
+
+def test_recommend_projects_columns_and_hydrates_top_k(mock_db_data):
+    from collections import namedtuple
+
+    Row = namedtuple("Row", "id embedding published_date source cluster_id")
+    now = datetime.datetime.utcnow()
+    user = User(id=7, email="u@test.com", hashed_password="x", user_embedding=[1.0] + [0.0] * 383)
+    rows = [
+        Row(1, np.array([1.0] + [0.0] * 383), now, "bbc", 1),
+        Row(2, np.array([0.9, 0.1] + [0.0] * 382), now, "npr", 2),
+        Row(3, np.array([0.0, 1.0] + [0.0] * 382), now, "nyt", 3),
+    ]
+    display = [(i, f"News {i}", f"http://test.com/{i}", "src", now, i) for i in (3, 2, 1)]
+
+    scoring_queries = []
+
+    def query_side_effect(*columns):
+        q = MagicMock()
+        if columns[0] is User:
+            q.filter.return_value.first.return_value = user
+        elif len(columns) == 1:  # Interaction.article_id
+            q.filter.return_value.all.return_value = []
+        elif len(columns) == 5:  # Scoring columns: trending, then candidates (within the hot window)
+            scoring_queries.append(q)
+            if len(scoring_queries) == 1:
+                q.filter.return_value.order_by.return_value.limit.return_value.all.return_value = []
+            else:
+                q.order_by.return_value.filter.return_value.limit.return_value.all.return_value = rows
+        else:  # Display columns for the final list
+            q.filter.return_value.all.return_value = display
+        return q
+
+    mock_db_data.query.side_effect = query_side_effect
+
+    recs = recommend_articles(user_id=7, limit=2)
+
+    assert recs.tier == "full"
+    assert [a.id for a in recs] == [1, 2]
+    assert recs[0].title == "News 1"
+    requested = [col for call in mock_db_data.query.call_args_list for col in call.args]
+    assert not any(col is Article.content for col in requested)
+    assert not any(col is Article for col in requested)
+
+def test_rescore_full_drops_rows_without_full_embedding():
+    from collections import namedtuple
+    from app.recommender.ranker import _rescore_full
+    from app.utils.timing import Deadline
+
+    Row = namedtuple("Row", "id embedding published_date source cluster_id")
+    now = datetime.datetime.utcnow()
+    shortlist = [Row(i, None, now, f"s{i}", i) for i in (1, 2, 3)]
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = "sqlite"
+    db.query.return_value.filter.return_value.all.return_value = [
+        MagicMock(id=1, embedding=[1.0] + [0.0] * 383),
+        MagicMock(id=2, embedding=None),  # Archived after it was projected
+        MagicMock(id=3, embedding=[0.9, 0.1] + [0.0] * 382),
+    ]
+    user_vec = np.array([1.0] + [0.0] * 383, dtype=np.float32)
+
+    picks, finished = _rescore_full(db, shortlist, user_vec, [], np.zeros((0, 384), dtype=np.float32),
+                                    3, now, Deadline(None))
+
+    assert finished
+    assert [a.id for a in picks] == [1, 3]
+
+def test_story_read_under_another_link_is_folded_away(sqlite_db):
+    from app.recommender.ranker import _story_keys, _fold_clusters
+
+    db = sqlite_db(Article)()
+    for id, cluster in [(10, 10), (12, 10), (20, None)]:
+        article = create_mock_article(id, f"News {id}")
+        article.cluster_id = cluster
+        db.add(article)
+    db.commit()
+
+    seen = {12, 20}
+    seen |= _story_keys(db, seen)
+    assert seen == {10, 12, 20}
+    assert [a.id for a in _fold_clusters(db.query(Article).order_by(Article.id).all(), seen)] == []
@@ -0,0 +1,54 @@
+import datetime
+from unittest.mock import patch
+import numpy as np
+import pytest
+from app.storage.models import (
+    User, Article, ArticleArchive, Interaction, InteractionAggregate, InteractionArchive, JobCheckpoint,
+)
+from app.recommender.ranker import build_user_embedding, DECAY_RATE
+from app.recommender.interactions import compact_interactions
+from app.recommender.reprofile import reprofile_users
+
+@pytest.fixture
+def factory(sqlite_db):
+    return sqlite_db(User, Article, ArticleArchive, Interaction, InteractionAggregate, InteractionArchive, JobCheckpoint)
+
+def seed(db, now):
+    rng = np.random.default_rng(3)
+    for id in range(1, 31):
+        db.add(Article(id=id, title=f"A{id}", link=f"http://test.com/{id}", embedding=rng.normal(size=384).tolist()))
+    for user_id in range(1, 8):
+        db.add(User(id=user_id, email=f"u{user_id}@test.com", hashed_password="x"))
+    event_id = 0
+    for user_id in range(1, 7):  # User 7 has no history
+        for _ in range(int(rng.integers(1, 12))):
+            event_id += 1
+            db.add(Interaction(
+                id=event_id, user_id=user_id, article_id=int(rng.integers(1, 31)),
+                interaction_type=str(rng.choice(["click", "like", "dislike", "click"])),
+                timestamp=now - datetime.timedelta(days=float(rng.uniform(0, 60))),
+            ))
+    db.commit()
+
+def test_bulk_reprofile_matches_per_user_build(factory):
+    now = datetime.datetime.utcnow()
+    db = factory()
+    seed(db, now)
+    compact_interactions(db, DECAY_RATE, now=now - datetime.timedelta(days=20))  # Mix aggregates and raw tail
+
+    stats = reprofile_users(db, users_per_chunk=3, now=now)
+    bulk = {u.id: (u.user_embedding, u.profile_version) for u in db.query(User).all()}
+    db.close()
+
+    assert stats["users"] == 7 and stats["chunks"] == 3
+    assert bulk[7] == (None, 0)
+
+    with patch("app.recommender.ranker.SessionLocal", factory):
+        for user_id in range(1, 7):
+            build_user_embedding(user_id)
+    db = factory()
+    for user in db.query(User).filter(User.id < 7).all():
+        embedding, version = bulk[user.id]
+        assert version == 1
+        np.testing.assert_allclose(embedding, user.user_embedding, rtol=1e-4, atol=1e-5)
+    db.close()
@@ -0,0 +1,83 @@
+import datetime
+from sqlalchemy import create_engine
+from app.ingestion.jobs import INGESTION_LOCK, feed_lock
+from app.ingestion.scheduler import AdaptivePoller
+from app.storage.locks import advisory_lock, lock_key
+
+START = datetime.datetime(2024, 1, 1, 12, 0)
+
+def make_poller(**kwargs):
+    return AdaptivePoller(["a", "b"], min_interval_minutes=15, max_interval_minutes=360,
+                          target_new_items=5, **kwargs)
+
+def test_fast_feed_converges_to_short_interval():
+    poller = make_poller()
+    now = START
+    poller.record_success("a", 40, now=now)  # Baseline fetch
+    for _ in range(10):
+        now += datetime.timedelta(minutes=poller.feeds["a"].interval_minutes)
+        poller.record_success("a", 20, now=now)  # Far more than the target each time
+    assert poller.feeds["a"].interval_minutes == 15
+
+def test_quiet_feed_backs_off_to_max_interval():
+    poller = make_poller()
+    now = START
+    poller.record_success("b", 3, now=now)
+    for _ in range(15):
+        now += datetime.timedelta(minutes=poller.feeds["b"].interval_minutes)
+        poller.record_success("b", 0, now=now)
+    assert poller.feeds["b"].interval_minutes == 360
+
+def test_rate_sets_interval_between_bounds():
+    poller = make_poller()
+    poller.record_success("a", 10, now=START)
+    next_fetch = poller.record_success("a", 10, now=START + datetime.timedelta(hours=2))
+    # 5 items/hour observed: 5 target items take an hour
+    assert poller.feeds["a"].rate_per_hour == 5
+    assert next_fetch == START + datetime.timedelta(hours=3)
+
+def test_errors_back_off_per_feed():
+    poller = make_poller()
+    first = poller.record_failure("a", "HTTP 503", now=START)
+    for _ in range(10):
+        last = poller.record_failure("a", "HTTP 503", now=START)
+    assert datetime.timedelta(minutes=13) <= first - START <= datetime.timedelta(minutes=17)
+    assert last - START == datetime.timedelta(minutes=360)
+    assert poller.feeds["b"].consecutive_errors == 0
+
+    poller.record_success("a", 1, now=START)
+    assert poller.feeds["a"].consecutive_errors == 0
+
+def test_status_and_state_file(tmp_path):
+    path = str(tmp_path / "state.json")
+    poller = make_poller(state_file=path)
+    poller.record_success("a", 4, now=START)
+
+    status = {row["url"]: row for row in poller.status(now=START + datetime.timedelta(minutes=30))}
+    assert status["a"]["freshness_lag_minutes"] == 30
+    assert status["b"]["freshness_lag_minutes"] is None
+
+    restored = make_poller(state_file=path)
+    assert restored.feeds["a"].next_fetch == poller.feeds["a"].next_fetch
+
+def test_feed_jobs_run_side_by_side_but_not_during_a_full_run():
+    engine = create_engine("sqlite://")  # Process-local locks, same semantics as PostgreSQL's
+    def lock(name, shared=False):
+        return advisory_lock(name, bind=engine, shared=shared)
+
+    with lock(INGESTION_LOCK, shared=True) as a, lock(feed_lock("a")) as feed_a:
+        with lock(INGESTION_LOCK, shared=True) as b, lock(feed_lock("b")) as feed_b:
+            assert a and feed_a and b and feed_b
+        with lock(feed_lock("a")) as again:
+            assert not again  # One run per feed
+        with lock(INGESTION_LOCK) as full:
+            assert not full  # Full runs and swaps wait for the feeds
+
+    with lock(INGESTION_LOCK) as full:
+        assert full
+        with lock(INGESTION_LOCK, shared=True) as feed_job:
+            assert not feed_job
+
+def test_feeds_get_distinct_lock_keys():
+    assert lock_key(feed_lock("a")) != lock_key(feed_lock("b"))
+    assert lock_key(feed_lock("a")) != lock_key(INGESTION_LOCK)
@@ -0,0 +1,135 @@
+import datetime
+import threading
+import pytest
+from unittest.mock import MagicMock
+import app.recommender.sessions as sessions
+from app.recommender.cold_start import FeedItem
+from app.recommender.versions import RecommendationVersion
+from app.recommender.ranker import Recommendations
+from app.recommender.sessions import (
+    RecommendationSessions, SessionStore, InvalidCursor, encode_cursor, decode_cursor,
+)
+
+def feed_item(i):
+    return FeedItem(i, f"News {i}", f"http://test.com/{i}", "bbc", datetime.datetime.utcnow(), i)
+
+@pytest.fixture
+def versions(monkeypatch):
+    state = {"epoch": 100, "profile": 3, "seen": 5}
+    monkeypatch.setattr(sessions, "recommendation_version", lambda db, user_id: RecommendationVersion(
+        state["profile"], state["seen"], state["epoch"]
+    ))
+    monkeypatch.setattr(sessions, "load_feed_items", lambda db, ids: [feed_item(i) for i in ids])
+    return state
+
+def seen_db(seen=()):
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = [(i,) for i in seen]
+    return db
+
+def test_cursor_round_trip_and_tampering():
+    cursor = encode_cursor("abc", 12, 7)
+    assert decode_cursor(cursor) == ("abc", 12, 7)
+
+    payload, signature = cursor.split(".")
+    forged = encode_cursor("abc", 24, 7).split(".")[0] + "." + signature
+    with pytest.raises(InvalidCursor):
+        decode_cursor(forged)
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor")
+
+def test_pages_slice_the_ranked_list_and_skip_new_interactions(versions):
+    paging = RecommendationSessions(SessionStore())
+    ranked = [feed_item(i) for i in range(1, 11)]
+
+    first = paging.first_page(seen_db(), 7, ranked, limit=4)
+    assert [a.id for a in first.items] == [1, 2, 3, 4]
+    assert first.next_cursor
+
+    # User liked article 6 since the first page
+    second = paging.next_page(seen_db(seen=[6]), first.next_cursor, 7, limit=4)
+    assert [a.id for a in second.items] == [5, 7, 8, 9]
+
+    third = paging.next_page(seen_db(), second.next_cursor, 7, limit=4)
+    assert [a.id for a in third.items] == [10]
+    assert third.next_cursor is None
+
+def test_cursor_invalidated_by_new_articles_or_profile(versions):
+    paging = RecommendationSessions(SessionStore())
+    cursor = paging.first_page(seen_db(), 7, [feed_item(i) for i in range(20)], limit=5).next_cursor
+
+    with pytest.raises(InvalidCursor):
+        paging.next_page(seen_db(), cursor, 8, limit=5)  # Another user's cursor
+
+    versions["profile"] += 1  # Rebuilt without a new interaction (e.g. the nightly reprofile)
+    with pytest.raises(InvalidCursor):
+        paging.next_page(seen_db(), cursor, 7, limit=5)
+
+def test_own_interactions_keep_the_cursor(versions):
+    paging = RecommendationSessions(SessionStore())
+    cursor = paging.first_page(seen_db(), 7, [feed_item(i) for i in range(1, 21)], limit=5).next_cursor
+
+    # Two clicks, each rebuilding the profile
+    versions["seen"] += 2
+    versions["profile"] += 2
+    page = paging.next_page(seen_db(seen=[6, 8]), cursor, 7, limit=5)
+    assert [a.id for a in page.items] == [7, 9, 10, 11, 12]
+
+    versions["profile"] += 1  # A rebuild the clicks don't account for
+    with pytest.raises(InvalidCursor):
+        paging.next_page(seen_db(), page.next_cursor, 7, limit=5)
+
+def test_session_is_stamped_with_the_version_read_before_ranking(versions):
+    paging = RecommendationSessions(SessionStore())
+    before = RecommendationVersion(3, 5, 100)
+    # A click was logged and the profile rebuilt while the list was ranked
+    versions["seen"] += 1
+    versions["profile"] += 1
+    cursor = paging.first_page(seen_db(), 7, [feed_item(i) for i in range(20)], limit=5, version=before).next_cursor
+
+    assert paging.next_page(seen_db(), cursor, 7, limit=5).items
+
+def test_deeper_list_is_filled_after_the_first_page(versions):
+    paging = RecommendationSessions(SessionStore())
+    first = paging.first_page(seen_db(), 7, [feed_item(i) for i in (3, 1, 2)], limit=3, fill_later=True)
+    assert [a.id for a in first.items] == [3, 1, 2]
+    assert first.next_cursor and first.session_id
+
+    # The deeper ranking orders things differently: shown articles are not repeated
+    paging.fill(first.session_id, lambda: Recommendations([feed_item(i) for i in range(1, 8)], tier="no_mmr"))
+    second = paging.next_page(seen_db(), first.next_cursor, 7, limit=3)
+    assert [a.id for a in second.items] == [4, 5, 6]
+    assert second.tier == "no_mmr"
+
+    short = paging.first_page(seen_db(), 7, [feed_item(1)], limit=3, fill_later=True)
+    assert short.next_cursor is None and short.session_id is None  # Nothing deeper to rank
+
+def test_next_page_waits_for_the_fill(versions, monkeypatch):
+    paging = RecommendationSessions(SessionStore())
+    first = paging.first_page(seen_db(), 7, [feed_item(i) for i in range(3)], limit=3, fill_later=True)
+    filler = threading.Timer(0.05, paging.fill, args=(first.session_id, lambda: [feed_item(i) for i in range(6)]))
+    filler.start()
+    try:
+        assert [a.id for a in paging.next_page(seen_db(), first.next_cursor, 7, limit=3).items] == [3, 4, 5]
+    finally:
+        filler.join()
+
+    monkeypatch.setattr(sessions, "SESSION_FILL_DEADLINE_MS", 10)
+    never_filled = paging.first_page(seen_db(), 7, [feed_item(i) for i in range(3)], limit=3, fill_later=True)
+    with pytest.raises(InvalidCursor):
+        paging.next_page(seen_db(), never_filled.next_cursor, 7, limit=3)
+
+def test_store_is_bounded_and_expires(versions):
+    store = SessionStore(max_sessions=2, ttl_seconds=60)
+    paging = RecommendationSessions(store)
+    cursors = [paging.first_page(seen_db(), 7, [feed_item(i) for i in range(20)], limit=5).next_cursor
+               for _ in range(3)]
+    assert len(store) == 2
+
+    with pytest.raises(InvalidCursor):
+        paging.next_page(seen_db(), cursors[0], 7, limit=5)  # Evicted
+    assert paging.next_page(seen_db(), cursors[2], 7, limit=5).items
+
+    store.ttl = -1
+    with pytest.raises(InvalidCursor):
+        paging.next_page(seen_db(), cursors[2], 7, limit=5)  # Expired
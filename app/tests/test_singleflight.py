@@ -0,0 +1,95 @@
+import threading
+import pytest
+from app.utils.metrics import metrics
+from app.utils.singleflight import SingleFlight, TooManyWaiters
+
+def start_waiters(flights, key, fn, count):
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(flights.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(count)]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+def wait_for_waiters(flights, key, count):
+    for _ in range(500):
+        with flights._lock:
+            if flights._flights[key].waiters >= count:
+                return
+        threading.Event().wait(0.01)
+    raise AssertionError("waiters never arrived")
+
+def test_concurrent_calls_share_one_execution():
+    metrics.reset()
+    flights = SingleFlight("test")
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return ["result"]
+
+    leader, results, _ = start_waiters(flights, "k", compute, 1)
+    for _ in range(500):
+        if calls:
+            break
+        threading.Event().wait(0.01)
+    waiters, waiter_results, _ = start_waiters(flights, "k", compute, 5)
+    wait_for_waiters(flights, "k", 5)
+    release.set()
+    for t in leader + waiters:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert results + waiter_results == [["result"]] * 6
+    assert metrics.snapshot()["counters"]["singleflight_test"] == {"leader": 1, "coalesced": 5}
+    assert flights.in_flight() == 0
+
+def test_waiters_are_bounded_and_errors_are_shared():
+    flights = SingleFlight("bounded", max_waiters=2)
+    started, release = threading.Event(), threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("boom")
+
+    leader, _, leader_errors = start_waiters(flights, "k", compute, 1)
+    started.wait(5)
+    waiters, _, waiter_errors = start_waiters(flights, "k", compute, 2)
+    wait_for_waiters(flights, "k", 2)
+    with pytest.raises(TooManyWaiters):
+        flights.do("k", compute)
+    assert flights.do("other", lambda: 42) == 42  # Other keys are unaffected
+
+    release.set()
+    for t in leader + waiters:
+        t.join(5)
+    assert [type(e) for e in leader_errors + waiter_errors] == [RuntimeError] * 3
+
+def test_waiter_stops_at_its_own_timeout():
+    flights = SingleFlight("timeout", wait_timeout=5.0)
+    started, release = threading.Event(), threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(5)
+        return "ranked"
+
+    leader, results, _ = start_waiters(flights, "k", compute, 1)
+    started.wait(5)
+    waited = threading.Event()
+    assert flights.do("k", compute, timeout=0.05, on_timeout=lambda: waited.set() or "fallback") == "fallback"
+    assert waited.is_set() and not release.is_set()  # Gave up long before the leader's 5 s
+
+    release.set()
+    for t in leader:
+        t.join(5)
+    assert results == ["ranked"]
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+from pgvector import Vector
+from app.storage.models import Article
+from app.storage.vectors import decode_vectors, vector_column
+
+def test_decode_binary_result_set():
+    vectors = np.random.default_rng(0).standard_normal((5, 384)).astype(np.float32)
+    blobs = [memoryview(Vector(v).to_binary()) for v in vectors]  # psycopg2 returns bytea as memoryview
+
+    matrix = decode_vectors(blobs)
+
+    assert matrix.dtype == np.float32
+    assert matrix.flags["C_CONTIGUOUS"]
+    np.testing.assert_array_equal(matrix, vectors)
+
+def test_decode_marks_missing_embeddings():
+    v = np.arange(384, dtype=np.float32)
+    matrix = decode_vectors([Vector(v).to_binary(), None, list(v)])
+
+    np.testing.assert_array_equal(matrix[0], v)
+    assert np.isnan(matrix[1]).all()
+    np.testing.assert_array_equal(matrix[2], v)
+
+def test_decode_rejects_wrong_dimension():
+    with pytest.raises(ValueError):
+        decode_vectors([Vector(np.ones(3, dtype=np.float32)).to_binary()] * 2, dim=3 + 1)
+
+@pytest.mark.parametrize("values", [
+    [Vector(np.ones(4, dtype=np.float32)).to_binary(), Vector(np.ones(4, dtype=np.float32)).to_binary()[:-4]],
+    [Vector(np.ones(4, dtype=np.float32)).to_binary() + b"\0\0\0\0", None],
+    [Vector(np.ones(4, dtype=np.float32)).to_binary(), [1.0, 2.0, 3.0]],  # Mixed binary and text
+    [None, Vector(np.ones(3, dtype=np.float32)).to_binary() + b"\0\0\0\0"],  # Right length, wrong header
+])
+def test_decode_checks_every_vector_length(values):
+    with pytest.raises(ValueError):
+        decode_vectors(values, dim=4)
+
+def test_vector_column_depends_on_dialect():
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = "postgresql"
+    assert "vector_send" in str(vector_column(Article.embedding, db))
+
+    db.get_bind.return_value.dialect.name = "sqlite"
+    assert "vector_send" not in str(vector_column(Article.embedding, db))
@@ -0,0 +1,65 @@
+import os
+import sys
+import subprocess
+import pytest
+from app.api import warmup as warmup_module
+from app.api.warmup import Warmup
+
+def test_warmup_retries_the_database_then_tolerates_later_failures(monkeypatch):
+    monkeypatch.setattr(warmup_module, "RETRY_SECONDS", 0.01)
+    attempts = []
+
+    def flaky_db():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("database is starting up")
+
+    def broken_cache():
+        raise RuntimeError("no articles yet\nSQL: ...")
+
+    warmup = Warmup([("db_pool", flaky_db), ("cache", broken_cache), ("ranker", lambda: None)])
+    assert not warmup.status()["ready"]
+    warmup.run()
+
+    status = warmup.status()
+    assert status["ready"] and len(attempts) == 3
+    assert "ms" in status["steps"]["db_pool"]
+    assert status["steps"]["cache"] == {"error": "no articles yet"}
+    assert "ms" in status["steps"]["ranker"]
+
+@pytest.fixture
+def idle_warmup(monkeypatch):
+    """Keeps the app's startup from running the real warmup (it would mark the worker ready)."""
+    monkeypatch.setattr(warmup_module.warmup, "start", lambda: None)
+    monkeypatch.setattr(warmup_module.warmup, "ready", False)
+
+def test_ready_only_passes_after_warmup(idle_warmup, client, monkeypatch):
+    assert client.get("/health").status_code == 200
+    assert client.get("/ready").status_code == 503
+
+    monkeypatch.setattr(warmup_module.warmup, "ready", True)
+    assert client.get("/ready").status_code == 200
+
+def test_api_startup_skips_ingestion_only_imports():
+    probe = "import sys, app.api.main; print(sorted(m for m in ('feedparser', 'huggingface_hub', 'app.ingestion.service') if m in sys.modules))"
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, cwd=root, env=env)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+
+def test_rank_once_warms_the_personalized_path(sqlite_db, monkeypatch):
+    from app.storage.models import User
+
+    Session = sqlite_db(User)
+    db = Session()
+    db.add_all([User(id=1, email="a@test.com", hashed_password="x"),
+                User(id=2, email="b@test.com", hashed_password="x", user_embedding=[0.1] * 384)])
+    db.commit()
+    ranked = []
+    monkeypatch.setattr(warmup_module, "SessionLocal", Session)
+    monkeypatch.setattr(warmup_module, "recommend_articles",
+                        lambda user_id, limit, record: ranked.append((user_id, record)))
+
+    warmup_module.rank_once()
+    assert ranked == [(2, False)]  # Leaves the user's cached list and the tier metrics alone
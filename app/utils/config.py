@@ -9,9 +9,44 @@ class Settings(BaseSettings):
     # HuggingFace API token (for embeddings - get from huggingface.co/settings/tokens)
     HF_API_TOKEN: str | None = None
 
+    # Embedding backend: "api" (HuggingFace), "local" (model in each process)
+    # or "sidecar" (one shared model process, see app/embeddings/server.py)
+    EMBEDDER_BACKEND: str = "api"
+    EMBEDDER_SOCKET: str = "/tmp/news-recommender-embedder.sock"
+    EMBEDDER_MAX_BATCH: int = 64        # Texts per encode call in the sidecar
+    EMBEDDER_MAX_WAIT_MS: float = 10.0  # How long the sidecar waits to fill a batch
+    EMBEDDER_TIMEOUT_SECONDS: float = 60.0
+    # Model of the stored vectors until a re-embed swaps in another (the swap
+    # records it in the database, see app/storage/embedding_model.py)
+    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+
     # Cron ingestion secret (for external cron services)
     CRON_SECRET: str | None = None
 
+    # Default time budget for /recommend; slower stages degrade (see ranker.recommend_articles)
+    RECOMMEND_DEADLINE_MS: int = 300
+
+    # Candidate search only covers articles published in the last N days
+    # (widened automatically when the window holds too few)
+    CANDIDATE_WINDOW_DAYS: int = 30
+
+    # Articles older than this have their content and embedding moved to
+    # articles_archive by scripts/archive_articles.py
+    ARCHIVE_AFTER_DAYS: int = 180
+
+    # Reduced-dimension retrieval (see app/recommender/projection.py): the model
+    # fitted by scripts/fit_projection.py, and whether the ranker searches with it
+    PROJECTION_PATH: str = "models/projection.npz"
+    PROJECTION_ENABLED: bool = False
+
+    # Worker processes for the in-memory exact candidate search (see
+    # app/recommender/exact_search.py); 0 keeps the search in the database
+    EXACT_SEARCH_PROCESSES: int = 0
+
+    # Weight of the "readers also read" signal (see app/recommender/cooccurrence.py)
+    # added to the ranker's scores; 0 turns the co-occurrence candidates off
+    COOCCURRENCE_WEIGHT: float = 0.3
+
     # JWT Config
     JWT_SECRET: str
     ALGORITHM: str = "HS256"
@@ -0,0 +1,50 @@
+"""
+In-process counters and latency summaries, exposed at GET /metrics.
+Each worker process reports its own numbers.
+"""
+import threading
+from collections import defaultdict
+from typing import Dict
+
+
+class Metrics:
+    def __init__(self):
+        self._counters: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._timings: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, label: str = "total", amount: int = 1):
+        """Adds `amount` to counter `name`, broken down by `label`."""
+        with self._lock:
+            self._counters[name][label] += amount
+
+    def observe(self, name: str, value_ms: float):
+        """Records one latency sample for `name` (count, total and max)."""
+        with self._lock:
+            stats = self._timings.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            stats["count"] += 1
+            stats["total_ms"] += value_ms
+            stats["max_ms"] = max(stats["max_ms"], value_ms)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            timings = {
+                name: {
+                    "count": s["count"],
+                    "avg_ms": round(s["total_ms"] / s["count"], 3) if s["count"] else 0.0,
+                    "max_ms": round(s["max_ms"], 3),
+                }
+                for name, s in self._timings.items()
+            }
+            return {
+                "counters": {name: dict(labels) for name, labels in self._counters.items()},
+                "timings": timings,
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._timings.clear()
+
+
+metrics = Metrics()
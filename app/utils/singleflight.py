@@ -0,0 +1,78 @@
+"""
+Single-flight call coalescing.
+
+Concurrent calls with the same key share one execution: the first caller
+(the leader) runs the function, later callers wait for its result (or
+exception) instead of repeating the work. At most `max_waiters` callers wait
+on one flight; further ones get `TooManyWaiters`. A waiter whose leader takes
+longer than its timeout (`wait_timeout` seconds unless the call passes one)
+stops waiting and calls its `on_timeout` (by default, the function itself).
+Outcomes are counted in app.utils.metrics under `singleflight_<name>`.
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+from app.utils.metrics import metrics
+
+
+class TooManyWaiters(Exception):
+    """Raised when a flight already has its maximum number of waiters."""
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    def __init__(self, name: str, max_waiters: int = 32, wait_timeout: float = 5.0):
+        self.metric = f"singleflight_{name}"
+        self.max_waiters = max_waiters
+        self.wait_timeout = wait_timeout
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None,
+           on_timeout: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        Returns fn(), shared with any concurrent call for the same key.
+        A waiter gives up after `timeout` seconds and returns `on_timeout()` (or fn()).
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                leader = True
+            elif flight.waiters >= self.max_waiters:
+                metrics.incr(self.metric, "rejected")
+                raise TooManyWaiters(f"{self.max_waiters} requests are already waiting for this result")
+            else:
+                flight.waiters += 1
+                leader = False
+
+        if leader:
+            metrics.incr(self.metric, "leader")
+            try:
+                flight.result = fn()
+                return flight.result
+            except BaseException as e:
+                flight.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._flights[key]
+                flight.done.set()
+
+        if not flight.done.wait(self.wait_timeout if timeout is None else max(0.0, timeout)):
+            metrics.incr(self.metric, "timeout")
+            return (on_timeout or fn)()
+        metrics.incr(self.metric, "coalesced")
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
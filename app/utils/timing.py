@@ -0,0 +1,64 @@
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict
+
+
+class StageTimer:
+    """
+    Accumulates wall-clock time per named stage.
+    Stages can be entered repeatedly; durations are summed.
+    """
+
+    def __init__(self):
+        self._totals: Dict[str, float] = {}
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            self._totals[name] = self._totals.get(name, 0.0) + seconds
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    def summary(self) -> Dict[str, float]:
+        """Returns total seconds per stage, in first-seen order."""
+        with self._lock:
+            return {name: round(total, 6) for name, total in self._totals.items()}
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+class Deadline:
+    """
+    A time budget started at construction.
+    `budget_ms=None` means no deadline: every check passes.
+    """
+
+    def __init__(self, budget_ms: float = None):
+        self.budget_ms = budget_ms
+        self._start = time.perf_counter()
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def remaining_ms(self) -> float:
+        if self.budget_ms is None:
+            return float("inf")
+        return self.budget_ms - self.elapsed_ms()
+
+    def has(self, ms: float) -> bool:
+        """True if at least `ms` milliseconds of the budget are left."""
+        return self.remaining_ms() >= ms
+
+    def expired(self) -> bool:
+        return self.remaining_ms() <= 0
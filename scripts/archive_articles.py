@@ -0,0 +1,53 @@
+"""
+Moves the content and embeddings of old articles into articles_archive.
+
+Article rows stay (interactions reference them) but lose their bulky
+columns, so candidate search and recency sorts only pay for recent history.
+
+Usage:
+    python scripts/archive_articles.py                 # Archive articles older than ARCHIVE_AFTER_DAYS
+    python scripts/archive_articles.py --days 90
+    python scripts/archive_articles.py --dry-run       # Only count what would be archived
+"""
+
+import sys
+import os
+import argparse
+
+# Ensure app is in path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.storage.db import SessionLocal
+from app.storage.archive import archive_articles, ARCHIVE_BATCH_SIZE
+from app.utils.config import settings
+from app.utils.logger import setup_logger
+
+logger = setup_logger("archive_articles")
+
+
+def run_archival(days: int = None, batch_size: int = ARCHIVE_BATCH_SIZE, dry_run: bool = False) -> dict:
+    days = days or settings.ARCHIVE_AFTER_DAYS
+    db = SessionLocal()
+    try:
+        stats = archive_articles(db, days, batch_size=batch_size, dry_run=dry_run)
+    finally:
+        db.close()
+    if dry_run:
+        logger.info(f"{stats['would_archive']} articles published before {stats['cutoff']} would be archived")
+    else:
+        logger.info(f"Archived {stats['archived']} articles published before {stats['cutoff']}")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old article content and embeddings")
+    parser.add_argument("--days", type=int, default=None,
+                        help=f"Archive articles older than this (default: ARCHIVE_AFTER_DAYS={settings.ARCHIVE_AFTER_DAYS})")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="Articles per transaction")
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be archived")
+    args = parser.parse_args()
+    run_archival(args.days, args.batch_size, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
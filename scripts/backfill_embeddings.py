@@ -0,0 +1,123 @@
+"""
+Embeds articles that were saved without a vector, or re-embeds the whole
+corpus under a new model. Progress is checkpointed; re-running resumes.
+
+Usage:
+    python scripts/backfill_embeddings.py                          # Fill missing embeddings
+    python scripts/backfill_embeddings.py --max-per-minute 120     # Gentler on the embedding API
+    python scripts/backfill_embeddings.py --reembed --backend local --model all-MiniLM-L12-v2
+    python scripts/backfill_embeddings.py --swap --backend local --model all-MiniLM-L12-v2
+
+The vector columns are 384-d, so the new model must produce 384-d vectors;
+that is checked before anything is written.
+
+A re-embed writes to the embedding_next columns of articles and the archive
+while search keeps using the current vectors. --swap embeds whatever arrived
+since (with ingestion locked out), switches every article to its new vector
+and records the new model as the active one in one transaction, then rebuilds
+all user profiles in the new vector space. Ingestion picks the new model up
+on its next batch; restart an embedding sidecar with the new model.
+"""
+
+import sys
+import os
+import argparse
+
+# Ensure app is in path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.storage.db import SessionLocal
+from app.storage.locks import advisory_lock
+from app.ingestion.jobs import INGESTION_LOCK
+from app.ingestion.backfill import (
+    backfill_embeddings, swap_embeddings, count_pending, check_dimension,
+    TARGETS, REEMBED_TARGETS, BACKFILL_BATCH_SIZE, BACKFILL_MAX_PER_MINUTE,
+)
+from app.embeddings.backends import get_embedder
+from app.recommender.reprofile import reprofile_users
+from app.utils.logger import setup_logger
+
+logger = setup_logger("backfill_embeddings")
+
+
+def run_backfill(embedder=None, target: str = "embedding", batch_size: int = BACKFILL_BATCH_SIZE,
+                 max_per_minute: float = BACKFILL_MAX_PER_MINUTE, max_batches: int = None, model: str = None) -> dict:
+    embedder = embedder or get_embedder()
+    check_dimension(embedder)
+    with advisory_lock(TARGETS[target]) as acquired:
+        if not acquired:
+            logger.warning(f"Another {target} backfill is running; skipping")
+            return {"status": "skipped"}
+        db = SessionLocal()
+        try:
+            logger.info(f"{count_pending(db, target)} articles need a {target} vector")
+            stats = backfill_embeddings(db, embedder, target, batch_size=batch_size,
+                                        max_per_minute=max_per_minute, max_batches=max_batches, model=model)
+        finally:
+            db.close()
+    progress = "pass complete" if stats["complete"] else f"stopped at article {stats['position']}"
+    logger.info(f"Embedded {stats['embedded']} articles ({stats['status']}, {progress})")
+    return stats
+
+
+def run_reembed(embedder, model: str, batch_size: int = BACKFILL_BATCH_SIZE,
+                max_per_minute: float = BACKFILL_MAX_PER_MINUTE, max_batches: int = None) -> dict:
+    """Re-embeds the hot articles, then the archived ones; stops at the first pass that doesn't finish."""
+    for target in REEMBED_TARGETS:
+        stats = run_backfill(embedder, target, batch_size, max_per_minute, max_batches, model)
+        if stats.get("status") != "ok" or not stats.get("complete"):
+            break
+    return stats
+
+
+def run_swap(embedder, model: str, batch_size: int = BACKFILL_BATCH_SIZE,
+             max_per_minute: float = BACKFILL_MAX_PER_MINUTE) -> dict:
+    with advisory_lock(INGESTION_LOCK) as acquired:
+        if not acquired:
+            logger.warning("Ingestion is running; try the swap again shortly")
+            return {"status": "skipped"}
+        stats = run_reembed(embedder, model, batch_size, max_per_minute)
+        if stats.get("status") != "ok" or not stats.get("complete"):
+            logger.error("Re-embed did not finish; not swapping")
+            return stats
+        db = SessionLocal()
+        try:
+            stats["swapped"] = swap_embeddings(db, model)
+            # Profiles are means of old-model vectors; rebuild them in the new space
+            stats["profiles"] = reprofile_users(db)["updated"]
+        finally:
+            db.close()
+    logger.info(f"Swapped {stats['swapped']} embeddings and rebuilt {stats['profiles']} profiles")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill or re-embed article embeddings")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--reembed", action="store_true", help="Embed every article into embedding_next")
+    mode.add_argument("--swap", action="store_true", help="Finish the re-embed and switch to the new vectors")
+    parser.add_argument("--backend", default=None, help="Embedder backend: api, local or sidecar")
+    parser.add_argument("--model", default=None,
+                        help="New embedding model for --reembed/--swap (gaps are filled with the active model)")
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE, help="Articles per embed call")
+    parser.add_argument("--max-per-minute", type=float, default=BACKFILL_MAX_PER_MINUTE,
+                        help="Rate limit in articles per minute (0 for none)")
+    parser.add_argument("--max-batches", type=int, default=None, help="Stop after this many batches")
+    args = parser.parse_args()
+    if (args.reembed or args.swap) != bool(args.model):
+        parser.error("--model is required with --reembed and --swap, and only allowed with them")
+
+    embedder = get_embedder(args.backend, args.model)
+    try:
+        if args.swap:
+            run_swap(embedder, args.model, args.batch_size, args.max_per_minute)
+        elif args.reembed:
+            run_reembed(embedder, args.model, args.batch_size, args.max_per_minute, args.max_batches)
+        else:
+            run_backfill(embedder, "embedding", args.batch_size, args.max_per_minute, args.max_batches)
+    except ValueError as e:
+        parser.exit(1, f"error: {e}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark for the item co-occurrence index (app/recommender/cooccurrence.py).
+
+Generates a synthetic interaction stream (users reading a few articles per
+visit, Zipf-distributed article popularity, time moving forward). It then
+feeds the stream to a CooccurrenceIndex in batches and reports:
+- the cost of each batch early and late in the stream (it should stay flat as the index grows);
+- the latency of a neighbour lookup and of a per-user `related()` call;
+- for comparison, one "readers of X also read" query done as a SQL self-join
+  over the same interactions in SQLite.
+
+Usage:
+    python scripts/bench_cooccurrence.py
+    python scripts/bench_cooccurrence.py --interactions 500000 --articles 20000 --users 50000 --batch 2000
+"""
+
+import sys
+import os
+import time
+import sqlite3
+import datetime
+import argparse
+
+# Ensure app is in path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+for _key, _value in {
+    "DATABASE_URL": "sqlite://",
+    "SUPABASE_URL": "http://localhost",
+    "SUPABASE_KEY": "bench",
+    "JWT_SECRET": "bench",
+}.items():
+    os.environ.setdefault(_key, _value)
+
+import numpy as np
+from app.recommender.cooccurrence import CooccurrenceIndex
+
+
+def generate(interactions: int, articles: int, users: int, days: float, seed: int = 0):
+    """(id, user_id, article_id, type, timestamp) tuples in id (and time) order."""
+    rng = np.random.default_rng(seed)
+    start = datetime.datetime(2026, 1, 1)
+    step = days * 86400 / interactions
+    user_ids = rng.integers(1, users + 1, size=interactions)
+    # Articles published over time; readers favour recent, popular ones
+    age = np.minimum(rng.zipf(1.6, size=interactions), articles) - 1
+    newest = (np.arange(interactions) * articles // interactions).astype(np.int64)
+    article_ids = np.maximum(newest - age, 0) + 1
+    return [
+        (i + 1, int(u), int(a), "click", start + datetime.timedelta(seconds=i * step))
+        for i, (u, a) in enumerate(zip(user_ids, article_ids))
+    ]
+
+
+def self_join_ms(events, article_id: int, repeat: int) -> float:
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE interactions (id INTEGER PRIMARY KEY, user_id INTEGER, article_id INTEGER)")
+    db.executemany("INSERT INTO interactions VALUES (?, ?, ?)", [(e[0], e[1], e[2]) for e in events])
+    db.execute("CREATE INDEX ix_user ON interactions (user_id)")
+    db.execute("CREATE INDEX ix_article ON interactions (article_id)")
+    query = (
+        "SELECT b.article_id, COUNT(*) AS n FROM interactions a JOIN interactions b "
+        "ON a.user_id = b.user_id AND b.article_id != a.article_id "
+        "WHERE a.article_id = ? GROUP BY b.article_id ORDER BY n DESC LIMIT 20"
+    )
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        db.execute(query, (article_id,)).fetchall()
+        best = min(best, time.perf_counter() - start)
+    db.close()
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Item co-occurrence benchmark")
+    parser.add_argument("--interactions", type=int, default=200000)
+    parser.add_argument("--articles", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--days", type=float, default=30.0, help="Time span of the stream")
+    parser.add_argument("--batch", type=int, default=1000, help="Interactions per update")
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--skip-sql", action="store_true", help="Skip the SQL self-join comparison")
+    args = parser.parse_args()
+
+    events = generate(args.interactions, args.articles, args.users, args.days)
+    index = CooccurrenceIndex()
+    batch_ms = []
+    start = time.perf_counter()
+    for offset in range(0, len(events), args.batch):
+        batch_start = time.perf_counter()
+        index.add(events[offset:offset + args.batch])
+        batch_ms.append((time.perf_counter() - batch_start) * 1000)
+    total = time.perf_counter() - start
+
+    tenth = max(1, len(batch_ms) // 10)
+    print(f"Stream: {len(events)} interactions, {len(index)} articles, {index.pairs} stored pairs")
+    print(f"Updates: {len(events) / total:,.0f} interactions/s; batch of {args.batch}: "
+          f"first 10% {np.median(batch_ms[:tenth]):.1f} ms, last 10% {np.median(batch_ms[-tenth:]):.1f} ms (median)")
+
+    rng = np.random.default_rng(1)
+    recent = [e[2] for e in events[-args.lookups:]]
+    start = time.perf_counter()
+    for article_id in recent:
+        index.neighbours(article_id)
+    print(f"neighbours(): {(time.perf_counter() - start) / len(recent) * 1e6:.1f} us per lookup")
+
+    users = rng.choice([e[1] for e in events[-args.lookups * 5:]], size=args.lookups)
+    now = events[-1][4]
+    start = time.perf_counter()
+    found = sum(bool(index.related(int(u), 20, now=now)) for u in users)
+    print(f"related(): {(time.perf_counter() - start) / len(users) * 1e6:.1f} us per user "
+          f"({found} of {len(users)} users got candidates)")
+
+    if not args.skip_sql:
+        article_id = max(set(recent), key=recent.count)
+        print(f"SQL self-join for one article (SQLite, indexed): {self_join_ms(events, article_id, 3):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
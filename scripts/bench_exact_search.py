@@ -0,0 +1,74 @@
+"""
+Benchmark for the shared-memory exact scorer (app/recommender/exact_search.py).
+
+Builds a synthetic unit-vector corpus, runs the same queries with 1 (in
+process) and then N worker processes, checks that every process count
+returns the same top-k, and prints queries per second and the speedup over
+a single process. Scaling is bounded by the cores actually available
+(os.cpu_count() is printed) and by memory bandwidth.
+
+Usage:
+    python scripts/bench_exact_search.py
+    python scripts/bench_exact_search.py --rows 1000000 --processes 1 2 4 8 --queries 200
+"""
+
+import sys
+import os
+import time
+import argparse
+
+# Ensure app is in path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+for _key, _value in {
+    "DATABASE_URL": "sqlite://",
+    "SUPABASE_URL": "http://localhost",
+    "SUPABASE_KEY": "bench",
+    "JWT_SECRET": "bench",
+}.items():
+    os.environ.setdefault(_key, _value)
+
+import numpy as np
+from app.recommender import exact_search
+from app.recommender.exact_search import ExactScorer
+from app.storage.vectors import EMBEDDING_DIM
+
+
+def run(embeddings: np.ndarray, queries: np.ndarray, processes: int, k: int):
+    scorer = ExactScorer.from_arrays(np.arange(len(embeddings)), embeddings, processes=processes)
+    try:
+        scorer.search(queries[0], k)  # Starts the pool and attaches the workers
+        start = time.perf_counter()
+        results = [[article_id for article_id, _ in scorer.search(q, k)] for q in queries]
+        return len(queries) / (time.perf_counter() - start), results
+    finally:
+        scorer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared-memory exact search benchmark")
+    parser.add_argument("--rows", type=int, default=300000, help="Articles in the matrix")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4], help="Pool sizes to compare")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    embeddings = rng.standard_normal((args.rows, EMBEDDING_DIM)).astype(np.float32)
+    queries = rng.standard_normal((args.queries, EMBEDDING_DIM)).astype(np.float32)
+    exact_search.PARALLEL_MIN_ROWS = 0  # Measure the pool at every size
+
+    print(f"Matrix: {args.rows} x {EMBEDDING_DIM} float32 ({embeddings.nbytes / 2**20:.0f} MiB), "
+          f"k={args.k}, {os.cpu_count()} CPUs")
+    baseline = reference = None
+    for processes in args.processes:
+        qps, results = run(embeddings, queries, processes, args.k)
+        if reference is None:
+            baseline, reference = qps, results
+        elif results != reference:
+            raise SystemExit(f"{processes} processes returned different results")
+        print(f"{processes:>3} processes: {qps:8.1f} queries/s  ({qps / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Shared fixtures for the benchmark scripts.
+
+Generates a reproducible corpus of RSS 2.0 and Atom feeds (varying sizes,
+HTML-heavy bodies, duplicate links across and within feeds), serves it over a
+local HTTP server, and provides a fake embedder with configurable latency.
+"""
+
+import os
+import random
+import threading
+import time
+import hashlib
+import datetime
+from email.utils import format_datetime
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Tuple
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+WORDS = (
+    "government election market climate energy policy court health school "
+    "technology startup funding city transport water storm border trade "
+    "minister report study science space launch museum football league season "
+    "police investigation budget inflation bank housing workers strike festival"
+).split()
+
+SOURCES = ["BBC News", "NYT > Top Stories", "TechCrunch", "World news | The Guardian", "NPR Topics: News"]
+
+
+def _sentence(rng: random.Random, n_words: int) -> str:
+    words = [rng.choice(WORDS) for _ in range(n_words)]
+    return " ".join(words).capitalize() + "."
+
+
+def html_body(rng: random.Random, paragraphs: int) -> str:
+    """Builds an HTML-heavy article body: markup, inline script/style, entities."""
+    parts = ['<div class="article-body"><style>.ad { display: none; }</style>']
+    for i in range(paragraphs):
+        text = _sentence(rng, rng.randint(15, 40))
+        parts.append(
+            f'<p class="para-{i}">{text} <a href="https://example.com/{rng.randint(1, 10**6)}">'
+            f'<strong>Read&nbsp;more</strong></a> &amp; more &#8212; &quot;quoted&quot;</p>'
+        )
+        if i % 4 == 0:
+            parts.append('<script type="text/javascript">window.dataLayer = window.dataLayer || []; '
+                         'dataLayer.push({"event": "view"});</script>')
+        if i % 5 == 0:
+            parts.append(f'<figure><img src="https://img.example.com/{i}.jpg" alt="image"/>'
+                         f'<figcaption>{_sentence(rng, 8)}</figcaption></figure>')
+    parts.append("</div>")
+    return "".join(parts)
+
+
+def _rss(title: str, items: List[dict]) -> str:
+    out = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/">',
+        f"<channel><title>{escape(title)}</title><link>https://example.com/</link>",
+        "<description>Benchmark feed</description>",
+    ]
+    for item in items:
+        out.append(
+            "<item>"
+            f"<title>{escape(item['title'])}</title>"
+            f"<link>{escape(item['link'])}</link>"
+            f"<guid>{escape(item['link'])}</guid>"
+            f"<pubDate>{format_datetime(item['published'])}</pubDate>"
+            f"<description>{escape(item['summary'])}</description>"
+            f"<content:encoded><![CDATA[{item['body']}]]></content:encoded>"
+            "</item>"
+        )
+    out.append("</channel></rss>")
+    return "\n".join(out)
+
+
+def _atom(title: str, items: List[dict]) -> str:
+    out = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<feed xmlns="http://www.w3.org/2005/Atom">',
+        f"<title>{escape(title)}</title><id>urn:bench:{escape(title)}</id>",
+        f"<updated>{datetime.datetime.utcnow().isoformat()}Z</updated>",
+    ]
+    for item in items:
+        out.append(
+            "<entry>"
+            f"<title>{escape(item['title'])}</title>"
+            f'<link rel="alternate" href="{escape(item["link"])}"/>'
+            f"<id>{escape(item['link'])}</id>"
+            f"<updated>{item['published'].isoformat()}</updated>"
+            f"<summary type=\"html\">{escape(item['summary'])}</summary>"
+            f"<content type=\"html\">{escape(item['body'])}</content>"
+            "</entry>"
+        )
+    out.append("</feed>")
+    return "\n".join(out)
+
+
+def generate_corpus(directory: str, total_articles: int = 1000, feeds: int = 5,
+                    paragraphs: Tuple[int, int] = (3, 30), duplicate_ratio: float = 0.1,
+                    syndicated_ratio: float = 0.1, seed: int = 42) -> List[str]:
+    """
+    Writes `feeds` fixture files (alternating RSS 2.0 and Atom) into `directory`.
+    Feed sizes vary; roughly `duplicate_ratio` of items reuse a link already
+    emitted by this or another feed, and `syndicated_ratio` republish an earlier
+    story under a new link with a lightly edited title.
+    Returns the generated file names.
+    """
+    rng = random.Random(seed)
+    now = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+
+    # Uneven split so feeds have different sizes
+    shares = [rng.uniform(0.5, 1.5) for _ in range(feeds)]
+    sizes = [max(1, int(total_articles * s / sum(shares))) for s in shares]
+
+    emitted_links: List[str] = []
+    stories: List[dict] = []
+    names = []
+    for f, size in enumerate(sizes):
+        items = []
+        for n in range(size):
+            if emitted_links and rng.random() < duplicate_ratio:
+                link = rng.choice(emitted_links)
+            else:
+                link = f"https://news.example.com/{f}/{n}/{rng.getrandbits(32):08x}"
+                emitted_links.append(link)
+            if stories and rng.random() < syndicated_ratio:
+                story = rng.choice(stories)
+                item = dict(story, link=link, title=story["title"].rstrip(".") + " - update")
+            else:
+                item = {
+                    "title": _sentence(rng, rng.randint(6, 12)),
+                    "link": link,
+                    "published": now - datetime.timedelta(minutes=rng.randint(0, 60 * 72)),
+                    "summary": f"<p>{_sentence(rng, 25)}</p>",
+                    "body": html_body(rng, rng.randint(*paragraphs)),
+                }
+                stories.append(item)
+            items.append(item)
+        source = SOURCES[f % len(SOURCES)]
+        if f % 2 == 0:
+            name, xml = f"feed_{f:02d}.rss", _rss(source, items)
+        else:
+            name, xml = f"feed_{f:02d}.atom", _atom(source, items)
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as fh:
+            fh.write(xml)
+        names.append(name)
+    return names
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_directory(directory: str) -> Tuple[ThreadingHTTPServer, str]:
+    """Serves `directory` on an ephemeral localhost port. Returns (server, base_url)."""
+    handler = partial(_QuietHandler, directory=directory)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+class FakeEmbedder:
+    """
+    Drop-in stand-in for the embedder singletons.
+    Sleeps `latency_ms` per batch of `batch_size` texts (mirroring the API
+    embedder's batching) and returns deterministic unit vectors.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, batch_size: int = 10, dim: int = 384):
+        self.latency_ms = latency_ms
+        self.batch_size = batch_size
+        self.dim = dim
+        self.calls = 0
+        self.texts = 0
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            batch = texts[i:i + self.batch_size]
+            self.calls += 1
+            self.texts += len(batch)
+            if self.latency_ms:
+                time.sleep(self.latency_ms / 1000.0)
+            for text in batch:
+                seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+                vec = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+                vec /= np.linalg.norm(vec)
+                vectors.append(vec.tolist())
+        return vectors
@@ -0,0 +1,202 @@
+"""
+Ingestion throughput benchmark.
+
+Generates a fixture corpus of RSS/Atom feeds, serves it locally, and runs the
+real `ingest_feeds` pipeline against a throwaway database with a fake embedder
+of configurable latency. Reports articles/sec, seconds per stage and peak memory.
+
+Usage:
+    python scripts/bench_ingestion.py                                # SQLite temp DB
+    python scripts/bench_ingestion.py --articles 5000 --embed-latency-ms 50
+    python scripts/bench_ingestion.py --database-url postgresql://... --json
+
+With a PostgreSQL URL the benchmark creates its tables in a temporary schema
+and drops it afterwards, so it is safe to point at a shared CI database.
+"""
+
+import sys
+import os
+import json
+import time
+import uuid
+import argparse
+import shutil
+import tempfile
+import tracemalloc
+import resource
+
+# Ensure app is in path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# The app validates settings at import; the benchmark never touches the real services
+for _key, _value in {
+    "DATABASE_URL": "sqlite://",
+    "SUPABASE_URL": "http://localhost",
+    "SUPABASE_KEY": "bench",
+    "JWT_SECRET": "bench",
+}.items():
+    os.environ.setdefault(_key, _value)
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from bench_fixtures import generate_corpus, serve_directory, FakeEmbedder
+from app.storage.db import Base
+from app.storage import models  # Register models on Base
+from app.ingestion import fetch_feeds, service
+from app.utils.timing import StageTimer
+
+
+def make_throwaway_engine(database_url: str | None, workdir: str):
+    """Returns (engine, cleanup) for an isolated benchmark database."""
+    if not database_url:
+        engine = create_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        return engine, engine.dispose
+
+    if not database_url.startswith("postgresql"):
+        engine = create_engine(database_url)
+        Base.metadata.create_all(bind=engine)
+        return engine, engine.dispose
+
+    schema = f"bench_{uuid.uuid4().hex[:12]}"
+    admin = create_engine(database_url)
+    with admin.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        conn.execute(text(f'CREATE SCHEMA "{schema}"'))
+    engine = create_engine(database_url, connect_args={"options": f"-csearch_path={schema},public"})
+    Base.metadata.create_all(bind=engine)
+
+    def cleanup():
+        engine.dispose()
+        with admin.begin() as conn:
+            conn.execute(text(f'DROP SCHEMA "{schema}" CASCADE'))
+        admin.dispose()
+
+    return engine, cleanup
+
+
+def run_benchmark(args) -> dict:
+    workdir = tempfile.mkdtemp(prefix="bench_ingest_")
+    names = generate_corpus(
+        workdir,
+        total_articles=args.articles,
+        feeds=args.feeds,
+        duplicate_ratio=args.duplicate_ratio,
+        syndicated_ratio=args.syndicated_ratio,
+        seed=args.seed,
+    )
+    corpus_bytes = sum(os.path.getsize(os.path.join(workdir, n)) for n in names)
+    server, base_url = serve_directory(workdir)
+    urls = [f"{base_url}/{name}" for name in names]
+
+    engine, cleanup = make_throwaway_engine(args.database_url, workdir)
+    fake_embedder = FakeEmbedder(latency_ms=args.embed_latency_ms, batch_size=args.embed_batch_size)
+
+    # Point the real pipeline at the throwaway DB and the fake embedder,
+    # and time clean_text separately from the rest of parse_feed
+    clean_timer = StageTimer()
+    original_clean_text = fetch_feeds.clean_text
+
+    def timed_clean_text(value):
+        with clean_timer.stage("clean_text"):
+            return original_clean_text(value)
+
+    service.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    service.embedder = fake_embedder
+    fetch_feeds.clean_text = timed_clean_text
+
+    try:
+        # tracemalloc slows allocation-heavy code several-fold, so it is opt-in
+        if args.trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        stats = service.ingest_feeds(urls)
+        elapsed = time.perf_counter() - start
+        peak_traced = None
+        if args.trace_memory:
+            _, peak_traced = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    finally:
+        fetch_feeds.clean_text = original_clean_text
+        server.shutdown()
+        cleanup()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    timings = stats.get("timings", {})
+    clean_seconds = clean_timer.summary().get("clean_text", 0.0)
+    stages = {
+        "parse_feed": max(0.0, timings.get("fetch", 0.0) - clean_seconds),
+        "clean_text": clean_seconds,
+        "dedupe_query": timings.get("dedupe", 0.0),
+        "near_dupes": timings.get("near_dupes", 0.0),
+        "embed": timings.get("embed", 0.0),
+        "db_write": timings.get("db_write", 0.0),
+    }
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    maxrss_mb = maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+
+    return {
+        "status": stats.get("status"),
+        "feeds": len(urls),
+        "corpus_mb": round(corpus_bytes / (1024 * 1024), 2),
+        "fetched": stats.get("fetched", 0),
+        "new_articles": stats.get("new_articles", 0),
+        "near_duplicates": stats.get("near_duplicates", 0),
+        "saved": stats.get("saved", 0),
+        "elapsed_s": round(elapsed, 4),
+        "articles_per_s": round(stats.get("fetched", 0) / elapsed, 1) if elapsed else 0.0,
+        "saved_per_s": round(stats.get("saved", 0) / elapsed, 1) if elapsed else 0.0,
+        "seconds_per_1000": round(1000 * elapsed / stats["fetched"], 3) if stats.get("fetched") else None,
+        "stages_s": {k: round(v, 4) for k, v in stages.items()},
+        "embed_calls": fake_embedder.calls,
+        "peak_traced_mb": round(peak_traced / (1024 * 1024), 2) if peak_traced is not None else None,
+        "max_rss_mb": round(maxrss_mb, 1),
+    }
+
+
+def print_report(result: dict):
+    print(f"Status:           {result['status']}")
+    print(f"Feeds:            {result['feeds']} ({result['corpus_mb']} MB)")
+    print(f"Articles:         {result['fetched']} fetched, {result['new_articles']} new, "
+          f"{result['near_duplicates']} near-duplicates, {result['saved']} saved")
+    print(f"Elapsed:          {result['elapsed_s']:.3f}s ({result['seconds_per_1000']}s per 1,000 articles)")
+    print(f"Throughput:       {result['articles_per_s']} articles/s fetched, {result['saved_per_s']} saved/s")
+    print("Stages:")
+    total = sum(result["stages_s"].values()) or 1.0
+    for name, seconds in result["stages_s"].items():
+        print(f"  {name:<14} {seconds:8.3f}s  {100 * seconds / total:5.1f}%")
+    print(f"Embed calls:      {result['embed_calls']}")
+    traced = f"{result['peak_traced_mb']} MB traced, " if result["peak_traced_mb"] is not None else ""
+    print(f"Peak memory:      {traced}{result['max_rss_mb']} MB max RSS")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion throughput benchmark")
+    parser.add_argument("--articles", type=int, default=1000, help="Total fixture items across feeds")
+    parser.add_argument("--feeds", type=int, default=5, help="Number of fixture feeds")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1, help="Share of items reusing an existing link")
+    parser.add_argument("--syndicated-ratio", type=float, default=0.1,
+                        help="Share of items republishing an earlier story under a new link")
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0, help="Fake embedder latency per batch")
+    parser.add_argument("--embed-batch-size", type=int, default=10, help="Fake embedder batch size")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"),
+                        help="Throwaway database (default: temporary SQLite file)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Also report tracemalloc peak (slows the run; timings become pessimistic)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args()
+
+    result = run_benchmark(args)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+    if result["status"] != "ok":
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark for feed parsing.
+
+Generates large RSS 2.0 and Atom fixture feeds (see bench_fixtures.py) and
+parses each document with both paths of parse_feed: the streaming fast path
+(app/ingestion/fast_parser.py) and feedparser. Both include building the
+article dicts and clean_text, so the numbers are what ingestion sees. Also
+checks that the two paths produce the same articles.
+
+Usage:
+    python scripts/bench_parser.py
+    python scripts/bench_parser.py --articles 5000 --feeds 4 --repeat 3
+"""
+
+import sys
+import os
+import time
+import tempfile
+import argparse
+
+# Ensure app is in path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+for _key, _value in {
+    "DATABASE_URL": "sqlite://",
+    "SUPABASE_URL": "http://localhost",
+    "SUPABASE_KEY": "bench",
+    "JWT_SECRET": "bench",
+}.items():
+    os.environ.setdefault(_key, _value)
+
+from bench_fixtures import generate_corpus
+from app.ingestion.fetch_feeds import _parse_fast, _parse_feedparser
+
+
+def best_of(fn, documents, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = [fn(data, name) for name, data in documents]
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Feed parser benchmark")
+    parser.add_argument("--articles", type=int, default=3000, help="Items across all feeds")
+    parser.add_argument("--feeds", type=int, default=4, help="Feeds (alternating RSS and Atom)")
+    parser.add_argument("--paragraphs", type=int, nargs=2, default=[3, 30], help="Body size range")
+    parser.add_argument("--repeat", type=int, default=3, help="Best-of repetitions")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        names = generate_corpus(directory, args.articles, args.feeds, paragraphs=tuple(args.paragraphs),
+                                duplicate_ratio=0.0, syndicated_ratio=0.0)
+        documents = []
+        for name in names:
+            with open(os.path.join(directory, name), "rb") as fh:
+                documents.append((name, fh.read()))
+
+    total_mb = sum(len(data) for _, data in documents) / 2**20
+    print(f"Corpus: {len(documents)} feeds, {total_mb:.1f} MiB")
+    for label, subset in (("RSS 2.0", [d for d in documents if d[0].endswith(".rss")]),
+                          ("Atom", [d for d in documents if d[0].endswith(".atom")]),
+                          ("All", documents)):
+        if not subset:
+            continue
+        fast_s, fast = best_of(_parse_fast, subset, args.repeat)
+        slow_s, slow = best_of(_parse_feedparser, subset, args.repeat)
+        articles = sum(len(a) for a in fast)
+        same = sum(x == y for f, s in zip(fast, slow) for x, y in zip(f, s))
+        mismatched = articles - same + abs(articles - sum(len(s) for s in slow))
+        print(f"{label:8} {articles:6d} articles  feedparser {slow_s * 1000:8.1f} ms  "
+              f"fast path {fast_s * 1000:8.1f} ms  speedup {slow_s / fast_s:5.1f}x  "
+              f"mismatched {mismatched}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark for article text preprocessing.
+
+Compares the previous clean_text (unescape + two uncompiled regex passes) with
+the single-pass cleaner on large HTML bodies, and measures how much
+token-aware truncation shrinks the payload sent to the embedder.
+
+Usage:
+    python scripts/bench_preprocess.py
+    python scripts/bench_preprocess.py --bodies 200 --paragraphs 150
+"""
+
+import sys
+import os
+import re
+import html
+import time
+import random
+import argparse
+
+# Ensure app is in path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+for _key, _value in {
+    "DATABASE_URL": "sqlite://",
+    "SUPABASE_URL": "http://localhost",
+    "SUPABASE_KEY": "bench",
+    "JWT_SECRET": "bench",
+}.items():
+    os.environ.setdefault(_key, _value)
+
+from bench_fixtures import html_body
+from app.ingestion.preprocess import clean_text, truncate_tokens, _get_tokenizer
+
+
+def legacy_clean_text(text: str) -> str:
+    """clean_text as it was before the single-pass cleaner, for comparison."""
+    if not text:
+        return ""
+    text = html.unescape(text)
+    text = re.sub(r'<[^>]+>', '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def time_it(fn, items, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="clean_text / truncation benchmark")
+    parser.add_argument("--bodies", type=int, default=100, help="Number of HTML bodies")
+    parser.add_argument("--paragraphs", type=int, default=100, help="Paragraphs per body")
+    parser.add_argument("--repeat", type=int, default=5, help="Best-of repetitions")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    bodies = [html_body(rng, args.paragraphs) for _ in range(args.bodies)]
+    raw_mb = sum(len(b) for b in bodies) / (1024 * 1024)
+
+    legacy_s = time_it(legacy_clean_text, bodies, args.repeat)
+    new_s = time_it(clean_text, bodies, args.repeat)
+
+    cleaned = [clean_text(b) for b in bodies]
+    legacy_cleaned = [legacy_clean_text(b) for b in bodies]
+    tokenizer = "model tokenizer" if _get_tokenizer() is not None else "word-count fallback"
+    truncate_s = time_it(truncate_tokens, cleaned, args.repeat)
+    truncated = [truncate_tokens(c) for c in cleaned]
+
+    cleaned_kb = sum(len(c.encode("utf-8")) for c in cleaned) / 1024
+    legacy_kb = sum(len(c.encode("utf-8")) for c in legacy_cleaned) / 1024
+    payload_kb = sum(len(t.encode("utf-8")) for t in truncated) / 1024
+
+    print(f"Input:            {args.bodies} bodies, {raw_mb:.2f} MB of HTML")
+    print(f"Legacy clean:     {legacy_s:.3f}s ({raw_mb / legacy_s:.1f} MB/s), output {legacy_kb:.0f} KB")
+    print(f"Single-pass:      {new_s:.3f}s ({raw_mb / new_s:.1f} MB/s), output {cleaned_kb:.0f} KB")
+    print(f"Speedup:          {legacy_s / new_s:.2f}x")
+    print(f"Truncation:       {truncate_s:.3f}s using {tokenizer}")
+    print(f"Embed payload:    {cleaned_kb:.0f} KB -> {payload_kb:.0f} KB "
+          f"({100 * (1 - payload_kb / cleaned_kb):.1f}% smaller)")
+
+
+if __name__ == "__main__":
+    main()
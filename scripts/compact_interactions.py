@@ -0,0 +1,51 @@
+"""
+Folds raw interactions into per-(user, article, type) aggregates and archives
+events past the decay cutoff, so profile building reads active history only.
+
+Usage:
+    python scripts/compact_interactions.py
+    python scripts/compact_interactions.py --batch-size 1000
+    python scripts/compact_interactions.py --no-archive    # Compact only, keep old raw events
+"""
+
+import sys
+import os
+import argparse
+
+# Ensure app is in path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.storage.db import SessionLocal
+from app.storage.locks import advisory_lock
+from app.recommender.interactions import compact_interactions, COMPACTION_BATCH_SIZE, COMPACTION_CHECKPOINT
+from app.recommender.ranker import DECAY_RATE
+from app.utils.logger import setup_logger
+
+logger = setup_logger("compact_interactions")
+
+
+def run_compaction(batch_size: int = COMPACTION_BATCH_SIZE, archive: bool = True) -> dict:
+    with advisory_lock(COMPACTION_CHECKPOINT) as acquired:
+        if not acquired:
+            logger.warning("Another compaction is running; skipping")
+            return {"status": "skipped"}
+        db = SessionLocal()
+        try:
+            stats = compact_interactions(db, DECAY_RATE, batch_size=batch_size, archive=archive)
+        finally:
+            db.close()
+    logger.info(f"Compacted {stats['compacted']} interactions (watermark {stats['watermark']}), "
+                f"archived {stats['archived']}")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact the interaction log")
+    parser.add_argument("--batch-size", type=int, default=COMPACTION_BATCH_SIZE, help="Interactions per transaction")
+    parser.add_argument("--no-archive", action="store_true", help="Keep raw events past the decay cutoff")
+    args = parser.parse_args()
+    run_compaction(args.batch_size, archive=not args.no_archive)
+
+
+if __name__ == "__main__":
+    main()
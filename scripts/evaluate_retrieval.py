@@ -0,0 +1,80 @@
+"""
+Offline replay of historical interactions: exact search vs. a candidate
+retrieval engine (see app/recommender/evaluation.py).
+
+Reports candidate overlap, recall@k and Jaccard overlap of the final lists
+against exact search, nDCG@k of both against later clicks, and search latency.
+
+Usage:
+    python scripts/evaluate_retrieval.py --engine window
+    python scripts/evaluate_retrieval.py --engine window --option days=14 -k 10 --candidates 100
+    python scripts/evaluate_retrieval.py --engine pgvector --option hnsw.ef_search=40 --users 500
+    python scripts/evaluate_retrieval.py --engine int8 --json
+"""
+
+import sys
+import os
+import json
+import argparse
+
+# Ensure app is in path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.storage.db import SessionLocal
+from app.recommender.evaluation import (
+    ENGINES, Corpus, replay, load_cutoffs, CUTOFFS_PER_USER, MIN_HISTORY, HORIZON_DAYS,
+)
+
+
+def parse_options(pairs):
+    options = {}
+    for pair in pairs:
+        key, _, value = pair.partition("=")
+        if not value:
+            raise SystemExit(f"--option expects key=value, got '{pair}'")
+        options[key] = value
+    return options
+
+
+def print_report(report):
+    print(f"Engine {report['engine']} {report['options'] or ''} vs exact: "
+          f"{report['cutoffs']} cutoffs ({report['skipped']} skipped), {report['articles']} articles, "
+          f"k={report['k']}, {report['candidates']} candidates")
+    for name in ("candidate_overlap", "recall_at_k", "jaccard", "ndcg_exact", "ndcg_engine", "exact_ms", "engine_ms"):
+        stats = report[name]
+        if stats["mean"] is None:
+            print(f"  {name:<18} -")
+        else:
+            print(f"  {name:<18} mean {stats['mean']:<10} p50 {stats['p50']:<10} p95 {stats['p95']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare a retrieval engine with exact search on past interactions")
+    parser.add_argument("--engine", default="window", choices=sorted(ENGINES), help="Candidate engine to evaluate")
+    parser.add_argument("--option", action="append", default=[], help="Engine option as key=value (repeatable)")
+    parser.add_argument("-k", type=int, default=10, help="Length of the final list")
+    parser.add_argument("--candidates", type=int, default=50, help="Candidates retrieved before scoring and MMR")
+    parser.add_argument("--users", type=int, default=None, help="Sample this many users (default: all)")
+    parser.add_argument("--cutoffs", type=int, default=CUTOFFS_PER_USER, help="Evaluation points per user")
+    parser.add_argument("--min-history", type=int, default=MIN_HISTORY, help="Interactions before the first cutoff")
+    parser.add_argument("--horizon-days", type=float, default=HORIZON_DAYS, help="Later clicks counted as relevant")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        corpus = Corpus.load(db)
+        cutoffs = load_cutoffs(db, args.users, args.cutoffs, args.min_history, args.horizon_days)
+        report = replay(db, args.engine, k=args.k, candidates=args.candidates, corpus=corpus, cutoffs=cutoffs,
+                        **parse_options(args.option))
+    finally:
+        db.close()
+
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
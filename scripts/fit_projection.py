@@ -0,0 +1,76 @@
+"""
+Fits the reduced-dimension projection used for first-pass retrieval
+(see app/recommender/projection.py) and writes the projected vectors.
+
+Usage:
+    python scripts/fit_projection.py --dims 96              # Fit truncated SVD on a corpus sample, save it
+    python scripts/fit_projection.py --dims 64 --method random
+    python scripts/fit_projection.py --apply                # Also write embedding_proj for every article
+    python scripts/fit_projection.py --apply-only           # Re-apply the saved projection (new or stale rows)
+
+Check the trade-off before enabling it:
+    python scripts/evaluate_retrieval.py --engine projection --option path=models/projection.npz
+Then set PROJECTION_ENABLED=true.
+"""
+
+import sys
+import os
+import argparse
+
+# Ensure app is in path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import func
+from app.storage.db import SessionLocal
+from app.storage.models import Article
+from app.storage.vectors import vector_column, decode_vectors
+from app.recommender.projection import (
+    Projection, fit_svd, random_projection, apply_projection, DEFAULT_DIMS, FIT_SAMPLE_SIZE, APPLY_BATCH_SIZE,
+)
+from app.utils.config import settings
+from app.utils.logger import setup_logger
+
+logger = setup_logger("fit_projection")
+
+
+def sample_embeddings(db, sample_size: int):
+    rows = db.query(vector_column(Article.embedding, db)).filter(
+        Article.embedding.isnot(None)
+    ).order_by(func.random()).limit(sample_size).all()
+    return decode_vectors([row.embedding for row in rows])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit and apply the retrieval projection")
+    parser.add_argument("--dims", type=int, default=DEFAULT_DIMS, help="Projected dimensions (64-128)")
+    parser.add_argument("--method", choices=["svd", "random"], default="svd")
+    parser.add_argument("--sample", type=int, default=FIT_SAMPLE_SIZE, help="Articles to fit the SVD on")
+    parser.add_argument("--output", default=settings.PROJECTION_PATH, help="Where to save the model")
+    parser.add_argument("--apply", action="store_true", help="Write projected vectors after fitting")
+    parser.add_argument("--apply-only", action="store_true", help="Skip fitting; apply the saved model")
+    parser.add_argument("--batch-size", type=int, default=APPLY_BATCH_SIZE, help="Articles per transaction")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.apply_only:
+            projection = Projection.load(args.output)
+        else:
+            if args.method == "random":
+                projection = random_projection(args.dims)
+            else:
+                embeddings = sample_embeddings(db, args.sample)
+                if not len(embeddings):
+                    raise SystemExit("No article embeddings to fit on")
+                projection = fit_svd(embeddings, args.dims)
+            projection.save(args.output)
+            logger.info(f"Saved projection {projection.version} to {args.output}")
+
+        if args.apply or args.apply_only:
+            apply_projection(db, projection, batch_size=args.batch_size)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,22 @@ from app.utils.logger import setup_logger
 
 logger = setup_logger("init_db")
 
+# create_all only creates missing tables; columns and indexes added to existing
+# tables after the first deploy are applied here (all statements are idempotent)
+MIGRATIONS = [
+    "ALTER TABLE articles ADD COLUMN IF NOT EXISTS simhash BIGINT",
+    "ALTER TABLE articles ADD COLUMN IF NOT EXISTS cluster_id INTEGER",
+    "CREATE INDEX IF NOT EXISTS ix_articles_cluster_id ON articles (cluster_id)",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS profile_version INTEGER NOT NULL DEFAULT 0",
+    "CREATE INDEX IF NOT EXISTS ix_articles_published_date ON articles (published_date)",
+    "CREATE INDEX IF NOT EXISTS ix_interactions_user_id ON interactions (user_id)",
+    "ALTER TABLE articles ADD COLUMN IF NOT EXISTS embedding_next vector(384)",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS seen_version INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE articles ADD COLUMN IF NOT EXISTS embedding_proj vector",
+    "ALTER TABLE articles ADD COLUMN IF NOT EXISTS projection_version VARCHAR",
+    "ALTER TABLE articles_archive ADD COLUMN IF NOT EXISTS embedding_next vector(384)",
+]
+
 def init_db():
     try:
         logger.info("Creating pgvector extension if not exists...")
@@ -20,6 +36,12 @@ def init_db():
         
         logger.info("Creating tables...")
         Base.metadata.create_all(bind=engine)
+
+        logger.info("Applying migrations...")
+        with engine.connect() as connection:
+            for statement in MIGRATIONS:
+                connection.execute(text(statement))
+            connection.commit()
         logger.info("Database initialized successfully.")
     except Exception as e:
         logger.error(f"Error initializing database: {e}")
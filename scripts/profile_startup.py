@@ -0,0 +1,93 @@
+"""
+Import-time profile of worker startup.
+
+Imports a module (default: the API app) in a fresh interpreter with
+`python -X importtime`. It then prints the slowest imports by cumulative
+and by self time, and which ingestion-only packages got pulled in. API
+workers should not load feedparser or the embedding clients; those are
+imported by the ingestion job itself.
+
+With --warmup it also runs the API warmup (app/api/warmup.py) against the
+configured database and prints how long each step took.
+
+Usage:
+    python scripts/profile_startup.py
+    python scripts/profile_startup.py --module app.ingestion.service --top 15 --sort self
+    python scripts/profile_startup.py --warmup
+"""
+
+import sys
+import os
+import argparse
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+for _key, _value in {
+    "DATABASE_URL": "sqlite://",
+    "SUPABASE_URL": "http://localhost",
+    "SUPABASE_KEY": "bench",
+    "JWT_SECRET": "bench",
+}.items():
+    os.environ.setdefault(_key, _value)
+
+INGESTION_ONLY = ("feedparser", "huggingface_hub", "tokenizers", "app.ingestion.service", "app.embeddings.backends")
+
+
+def import_times(module: str):
+    """(name, self_us, cumulative_us) for every module the import loads, plus the loaded ingestion-only ones."""
+    probe = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {INGESTION_ONLY!r} if m in sys.modules))"
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], capture_output=True, text=True,
+                            cwd=ROOT, env=env)
+    if result.returncode != 0:
+        raise SystemExit(result.stderr.strip().splitlines()[-1] if result.stderr else f"import {module} failed")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    loaded = [m for m in result.stdout.strip().split(",") if m]
+    return rows, loaded
+
+
+def run_warmup():
+    from app.api.warmup import Warmup
+
+    warmup = Warmup()
+    warmup.run()
+    for name, result in warmup.results.items():
+        value = f"{result['ms']:.1f} ms" if "ms" in result else f"failed: {result['error']}"
+        print(f"  {name:<16} {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup import profile")
+    parser.add_argument("--module", default="app.api.main", help="Module to import")
+    parser.add_argument("--top", type=int, default=20, help="Rows to show")
+    parser.add_argument("--sort", choices=["cumulative", "self"], default="cumulative")
+    parser.add_argument("--warmup", action="store_true", help="Also time the API warmup steps")
+    args = parser.parse_args()
+
+    rows, loaded = import_times(args.module)
+    total = next((cumulative for name, _, cumulative in rows if name == args.module), 0)
+    key = 2 if args.sort == "cumulative" else 1
+    print(f"import {args.module}: {total / 1000:.0f} ms, {len(rows)} modules")
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: row[key], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:10.1f}ms {self_us / 1000:8.1f}ms  {name}")
+    print(f"Ingestion-only modules loaded: {', '.join(loaded) or 'none'}")
+
+    if args.warmup:
+        print("Warmup:")
+        run_warmup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Recomputes every user profile so the time decay of inactive users stays current.
+
+Usage:
+    python scripts/reprofile_users.py
+    python scripts/reprofile_users.py --chunk-size 1000
+"""
+
+import sys
+import os
+import time
+import argparse
+
+# Ensure app is in path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.storage.db import SessionLocal
+from app.recommender.reprofile import reprofile_users, USERS_PER_CHUNK
+from app.utils.logger import setup_logger
+
+logger = setup_logger("reprofile_users")
+
+
+def run_reprofile(users_per_chunk: int = USERS_PER_CHUNK) -> dict:
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        stats = reprofile_users(db, users_per_chunk=users_per_chunk)
+    finally:
+        db.close()
+    logger.info(f"Re-profiled {stats['updated']} of {stats['users']} users "
+                f"in {time.perf_counter() - start:.1f}s ({stats['chunks']} chunks)")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute all user profiles")
+    parser.add_argument("--chunk-size", type=int, default=USERS_PER_CHUNK, help="Users per query and transaction")
+    args = parser.parse_args()
+    run_reprofile(args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
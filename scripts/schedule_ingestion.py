@@ -1,27 +1,47 @@
 """
-Production-grade ingestion scheduler using APScheduler with cron triggers.
+Production-grade ingestion scheduler using APScheduler with adaptive per-feed polling.
+
+Every feed runs as its own job. After each fetch the feed's publish rate is
+re-estimated from the number of new items and its next run is scheduled so
+that roughly INGESTION_TARGET_NEW_ITEMS new items are waiting, within the
+configured bounds. Failing feeds back off independently.
 
 Usage:
     python scripts/schedule_ingestion.py          # Run scheduler (continuous)
     python scripts/schedule_ingestion.py --once   # Run ingestion once and exit
+    python scripts/schedule_ingestion.py --status # Print per-feed schedule and freshness lag
 
 Environment Variables:
-    INGESTION_CRON_HOUR: Cron hour expression (default: "*/3" = every 3 hours)
-    INGESTION_CRON_MINUTE: Cron minute expression (default: "0")
+    INGESTION_MIN_INTERVAL_MINUTES: Shortest interval between fetches of a feed (default: 15)
+    INGESTION_MAX_INTERVAL_MINUTES: Longest interval, also the error backoff cap (default: 360)
+    INGESTION_TARGET_NEW_ITEMS: New items a feed should accumulate between fetches (default: 5)
+    INGESTION_STATE_FILE: Where learned rates and next fetch times are kept (default: .ingestion_state.json)
+
+Also archives articles older than ARCHIVE_AFTER_DAYS once a day (see scripts/archive_articles.py)
+and compacts the interaction log (see scripts/compact_interactions.py). Articles
+saved without an embedding are backfilled hourly (see scripts/backfill_embeddings.py).
 """
 
 import sys
 import os
 import signal
 import argparse
+import datetime
 
 # Ensure app is in path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from apscheduler.schedulers.blocking import BlockingScheduler
-from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
 from app.ingestion.service import ingest_feeds
+from app.ingestion.preprocess import load_tokenizer
+from app.ingestion.jobs import INGESTION_LOCK, feed_lock
+from app.storage.locks import advisory_lock
+from app.ingestion.scheduler import AdaptivePoller, MIN_INTERVAL_MINUTES, MAX_INTERVAL_MINUTES, TARGET_NEW_ITEMS
 from app.utils.logger import setup_logger
+from archive_articles import run_archival
+from compact_interactions import run_compaction
+from backfill_embeddings import run_backfill
 
 logger = setup_logger("scheduler")
 
@@ -34,19 +54,105 @@ FEEDS = [
     "https://feeds.npr.org/1001/rss.xml",
 ]
 
-# Cron schedule configuration (configurable via env vars)
-CRON_HOUR = os.getenv("INGESTION_CRON_HOUR", "*/3")  # Every 3 hours
-CRON_MINUTE = os.getenv("INGESTION_CRON_MINUTE", "0")
+# Polling bounds (configurable via env vars)
+MIN_INTERVAL = float(os.getenv("INGESTION_MIN_INTERVAL_MINUTES", MIN_INTERVAL_MINUTES))
+MAX_INTERVAL = float(os.getenv("INGESTION_MAX_INTERVAL_MINUTES", MAX_INTERVAL_MINUTES))
+TARGET_ITEMS = float(os.getenv("INGESTION_TARGET_NEW_ITEMS", TARGET_NEW_ITEMS))
+STATE_FILE = os.getenv("INGESTION_STATE_FILE", ".ingestion_state.json")
+
+# Retry delay when a full ingestion, a swap or another run of the same feed holds a lock
+LOCK_RETRY_MINUTES = 2
+
+poller = AdaptivePoller(
+    FEEDS,
+    min_interval_minutes=MIN_INTERVAL,
+    max_interval_minutes=MAX_INTERVAL,
+    target_new_items=TARGET_ITEMS,
+    state_file=STATE_FILE,
+)
+scheduler = BlockingScheduler(timezone="UTC")
+
+
+def ingest_feed(url: str) -> datetime.datetime:
+    """Ingests one feed and records the outcome. Returns when the feed should run next."""
+    stats = ingest_feeds([url])
+    error = stats.get("feed_errors", {}).get(url) or stats.get("error")
+    if stats.get("status") != "ok" or error:
+        next_run = poller.record_failure(url, error or "ingestion failed")
+        state = poller.feeds[url]
+        logger.warning(f"Feed {url} failed ({state.consecutive_errors} in a row): {error}. Retrying at {next_run:%H:%M}")
+    else:
+        next_run = poller.record_success(url, stats.get("new_articles", 0))
+        state = poller.feeds[url]
+        rate = f"{state.rate_per_hour:.2f}/h" if state.rate_per_hour is not None else "learning"
+        logger.info(f"Feed {url}: {stats.get('new_articles', 0)} new, rate {rate}, "
+                    f"next in {state.interval_minutes:.0f} min")
+    return next_run
+
+
+def run_feed_job(url: str):
+    """
+    Job function: ingest one feed, then schedule its next run.
+    Other feeds may be ingested at the same time (the ingestion lock is held
+    shared); full runs and embedding swaps hold it exclusively.
+    """
+    with advisory_lock(INGESTION_LOCK, shared=True) as ingestion_free, \
+            advisory_lock(feed_lock(url)) as feed_free:
+        if not (ingestion_free and feed_free):
+            # Not the feed's fault: retry shortly without touching its schedule
+            logger.info(f"Another ingestion is running; deferring {url}")
+            schedule_feed(url, datetime.datetime.utcnow() + datetime.timedelta(minutes=LOCK_RETRY_MINUTES))
+            return
+        try:
+            next_run = ingest_feed(url)
+        except Exception as e:
+            logger.error(f"=== Ingestion of {url} failed: {e} ===")
+            next_run = poller.record_failure(url, str(e))
+    schedule_feed(url, next_run)
+
+
+def schedule_feed(url: str, run_date: datetime.datetime):
+    scheduler.add_job(
+        run_feed_job,
+        trigger=DateTrigger(run_date=run_date, timezone="UTC"),
+        args=[url],
+        id=url,
+        name=f"Ingest {url}",
+        replace_existing=True,
+        max_instances=1,  # Prevent overlapping runs of the same feed
+        misfire_grace_time=None,
+    )
 
 
 def run_ingestion():
-    """Job function to run the ingestion pipeline."""
-    logger.info("=== Starting scheduled ingestion ===")
-    try:
-        ingest_feeds(FEEDS)
-        logger.info("=== Ingestion completed successfully ===")
-    except Exception as e:
-        logger.error(f"=== Ingestion failed: {e} ===")
+    """Run every feed once, recording outcomes so the learned schedule stays current."""
+    with advisory_lock(INGESTION_LOCK) as acquired:
+        if not acquired:
+            logger.warning("=== Another ingestion is running; skipping ===")
+            return
+        logger.info("=== Starting ingestion of all feeds ===")
+        for url in FEEDS:
+            try:
+                ingest_feed(url)
+            except Exception as e:
+                logger.error(f"=== Ingestion of {url} failed: {e} ===")
+                poller.record_failure(url, str(e))
+        logger.info("=== Ingestion completed ===")
+
+
+def print_status():
+    for row in poller.status():
+        lag = f"{row['freshness_lag_minutes']} min" if row["freshness_lag_minutes"] is not None else "never fetched"
+        rate = row["rate_per_hour"] if row["rate_per_hour"] is not None else "-"
+        print(f"{row['url']}")
+        print(f"  interval {row['interval_minutes']} min, rate {rate}/h, next fetch {row['next_fetch'] or 'on start'}, "
+              f"freshness lag {lag}, errors {row['consecutive_errors']}")
+
+
+def log_status():
+    for row in poller.status():
+        logger.info(f"{row['url']}: next fetch {row['next_fetch']}, "
+                    f"freshness lag {row['freshness_lag_minutes']} min, interval {row['interval_minutes']} min")
 
 
 def graceful_shutdown(signum, frame):
@@ -62,8 +168,20 @@ def main():
         action="store_true",
         help="Run ingestion once and exit (no scheduling)"
     )
+    parser.add_argument(
+        "--status",
+        action="store_true",
+        help="Print each feed's next scheduled fetch and freshness lag, then exit"
+    )
     args = parser.parse_args()
 
+    if args.status:
+        print_status()
+        return
+
+    # Fetched here if the image build didn't cache it, so no fetch waits on the network
+    load_tokenizer(download=True)
+
     if args.once:
         logger.info("Running one-time ingestion...")
         run_ingestion()
@@ -73,25 +191,21 @@ def main():
     signal.signal(signal.SIGINT, graceful_shutdown)
     signal.signal(signal.SIGTERM, graceful_shutdown)
 
-    scheduler = BlockingScheduler()
+    # One job per feed; feeds without saved state (or overdue) run immediately
+    for url in FEEDS:
+        schedule_feed(url, poller.next_fetch(url))
 
-    # Add the ingestion job with cron trigger
-    trigger = CronTrigger(hour=CRON_HOUR, minute=CRON_MINUTE)
-    scheduler.add_job(
-        run_ingestion,
-        trigger=trigger,
-        id="news_ingestion",
-        name="News RSS Ingestion",
-        replace_existing=True,
-        max_instances=1,  # Prevent overlapping runs
-    )
+    # Periodic status line for freshness monitoring
+    scheduler.add_job(log_status, "interval", minutes=MIN_INTERVAL, id="feed_status", name="Feed status")
 
-    logger.info(f"Scheduler started. Ingestion will run at hour={CRON_HOUR}, minute={CRON_MINUTE}")
-    logger.info("Press Ctrl+C to stop.")
+    # Daily retention pass, off-peak
+    scheduler.add_job(run_archival, "cron", hour=3, minute=30, id="archive_articles", name="Archive old articles")
+    scheduler.add_job(run_compaction, "cron", hour=4, minute=0, id="compact_interactions", name="Compact interactions")
+    scheduler.add_job(run_backfill, "interval", hours=1, id="backfill_embeddings", name="Backfill embeddings")
 
-    # Run initial ingestion on startup
-    logger.info("Running initial ingestion on startup...")
-    run_ingestion()
+    logger.info(f"Scheduler started for {len(FEEDS)} feeds "
+                f"(interval {MIN_INTERVAL:.0f}-{MAX_INTERVAL:.0f} min, target {TARGET_ITEMS:g} new items)")
+    logger.info("Press Ctrl+C to stop.")
 
     try:
         scheduler.start()
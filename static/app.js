@@ -17,6 +17,16 @@ const loginBtn = document.getElementById('login-btn');
 const signupBtn = document.getElementById('signup-btn');
 const userInfo = document.getElementById('user-info');
 const usernameDisplay = document.getElementById('username-display');
+const sentinelEl = document.getElementById('scroll-sentinel');
+
+// Pagination State
+const PAGE_SIZE = 12;
+let nextCursor = null;
+let loadingMore = false;
+const shownArticleIds = new Set();
+
+// Last first page per URL, revalidated with If-None-Match (304 = unchanged)
+const firstPageCache = new Map();
 
 // Auth State
 let currentUserId = parseInt(localStorage.getItem('userId')) || 1; // Default to 1 for generic feed
@@ -110,23 +120,63 @@ function createArticleCard(article) {
     `;
 }
 
+// Fetch one page of recommendations; the server returns the next page's cursor in a header
+// Returns { status, articles, cursor }; first pages reuse the cached copy on 304
+async function fetchPage(cursor) {
+    let url = `${API_BASE}/recommend?user_id=${currentUserId}&limit=${PAGE_SIZE}`;
+    if (cursor) url += `&cursor=${encodeURIComponent(cursor)}`;
+
+    const headers = getAuthHeaders();
+    const cached = cursor ? null : firstPageCache.get(url);
+    if (cached) headers['If-None-Match'] = cached.etag;
+
+    const response = await fetch(url, { headers });
+    if (response.status === 304 && cached) {
+        return { status: 200, articles: cached.articles, cursor: cached.cursor };
+    }
+    if (!response.ok) {
+        const retryAfter = Number(response.headers.get('Retry-After')) || 1;
+        return { status: response.status, articles: [], cursor: null, retryAfter };
+    }
+
+    const page = {
+        status: response.status,
+        articles: await response.json(),
+        cursor: response.headers.get('X-Next-Cursor'),
+    };
+    const etag = response.headers.get('ETag');
+    if (!cursor) {
+        if (etag) firstPageCache.set(url, { etag, articles: page.articles, cursor: page.cursor });
+        else firstPageCache.delete(url);
+    }
+    return page;
+}
+
+// Append articles that aren't on the page yet; returns how many were added
+function appendArticles(articles) {
+    const fresh = articles.filter(article => !shownArticleIds.has(article.id));
+    fresh.forEach(article => shownArticleIds.add(article.id));
+    articlesEl.insertAdjacentHTML('beforeend', fresh.map(createArticleCard).join(''));
+    attachClickHandlers();
+    return fresh.length;
+}
+
 // Load articles from API
 async function loadArticles() {
     loadingEl.classList.remove('hidden');
     errorEl.classList.add('hidden');
     articlesEl.innerHTML = '';
+    shownArticleIds.clear();
+    nextCursor = null;
 
     try {
-        const response = await fetch(`${API_BASE}/recommend?user_id=${currentUserId}&limit=12`, {
-            headers: getAuthHeaders()
-        });
-        if (!response.ok) throw new Error('Failed to fetch');
+        const page = await fetchPage(null);
+        if (page.status !== 200) throw new Error('Failed to fetch');
 
-        const articles = await response.json();
+        nextCursor = page.cursor;
         loadingEl.classList.add('hidden');
 
-        articlesEl.innerHTML = articles.map(createArticleCard).join('');
-        attachClickHandlers();
+        appendArticles(page.articles);
     } catch (error) {
         console.error('Error loading articles:', error);
         loadingEl.classList.add('hidden');
@@ -134,6 +184,40 @@ async function loadArticles() {
     }
 }
 
+// Infinite scroll: load the next page when the sentinel comes into view
+async function loadMore() {
+    if (!nextCursor || loadingMore) return;
+    loadingMore = true;
+    let added = 0;
+
+    try {
+        let page = await fetchPage(nextCursor);
+        if (page.status === 410) {
+            // Ranking changed (new articles or an updated profile): start a fresh list
+            // and keep only what isn't already on the page. The cached first page's
+            // cursor is what just expired, so skip revalidation.
+            firstPageCache.clear();
+            page = await fetchPage(null);
+        }
+        if (page.status === 503) {
+            // Server is shedding load: keep the cursor and try again shortly
+            setTimeout(loadMore, page.retryAfter * 1000);
+            return;
+        }
+        if (page.status !== 200) throw new Error('Failed to fetch');
+
+        nextCursor = page.cursor;
+        added = appendArticles(page.articles);
+    } catch (error) {
+        console.error('Error loading more articles:', error);
+        nextCursor = null;
+    } finally {
+        loadingMore = false;
+    }
+    // Nothing new moved the sentinel, so the observer won't fire again by itself
+    if (added === 0 && nextCursor) loadMore();
+}
+
 // Log interaction to API
 async function logInteraction(articleId, type = 'click') {
     try {
@@ -226,9 +310,10 @@ function handleArticleClick(event) {
     window.open(link, '_blank');
 }
 
-// Attach click handlers to cards
+// Attach click handlers to cards (only those added since the last call)
 function attachClickHandlers() {
-    document.querySelectorAll('.article-card').forEach(card => {
+    document.querySelectorAll('.article-card:not([data-bound])').forEach(card => {
+        card.dataset.bound = 'true';
         card.addEventListener('click', handleArticleClick);
     });
 }
@@ -355,4 +440,8 @@ document.addEventListener('DOMContentLoaded', () => {
         updateUIForAuth(savedEmail);
     }
     loadArticles();
+
+    new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) loadMore();
+    }, { rootMargin: '400px' }).observe(sentinelEl);
 });